@@ -0,0 +1,98 @@
+"""Compare dependency resolution of starlette_dispatch route groups and Kupala's precompiled plans.
+The last case shares a request scoped factory between parameters and a nested factory.
+
+Usage: python benchmarks/dependencies.py [iterations]
+"""
+
+import asyncio
+import contextlib
+import sys
+import time
+import typing
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette_dispatch import RouteGroup as BaseRouteGroup
+from starlette_dispatch.contrib.dependencies import PathParamValue
+
+from kupala import Kupala
+from kupala.dependency_resolvers import DependencyScope, FactoryResolver, VariableResolver
+from kupala.routing import RouteGroup
+
+
+class Service:
+    pass
+
+
+@contextlib.asynccontextmanager
+async def make_session() -> typing.AsyncGenerator[str, None]:
+    yield "session"
+
+
+ServiceDep = typing.Annotated[Service, VariableResolver(Service())]
+CurrentUser = typing.Annotated[str, lambda request: request.scope["user"]]
+Session = typing.Annotated[str, FactoryResolver(make_session)]
+FromPath = typing.Annotated[int, PathParamValue()]
+SharedSession = typing.Annotated[str, DependencyScope.REQUEST, make_session]
+
+
+def make_repository(session: SharedSession) -> str:
+    return "repository"
+
+
+Repository = typing.Annotated[str, make_repository]
+
+response = Response(b"")
+
+
+async def simple_view(request: Request, app: Kupala, service: ServiceDep, user: CurrentUser) -> Response:
+    return response
+
+
+async def full_view(
+    request: Request, app: Kupala, service: ServiceDep, user: CurrentUser, session: Session, user_id: FromPath
+) -> Response:
+    return response
+
+
+async def shared_view(first: SharedSession, second: SharedSession, repository: Repository) -> Response:
+    return response
+
+
+async def receive() -> typing.Any: ...  # pragma: no cover
+
+
+async def send(message: typing.Any) -> None:
+    pass
+
+
+async def run(route_group: BaseRouteGroup, view: typing.Callable[..., typing.Any], iterations: int) -> float:
+    endpoint = route_group.get("/users/{user_id}")(view)
+    app = Kupala()
+    scope = {"type": "http", "app": app, "user": "root", "path_params": {"user_id": "1"}, "headers": []}
+    await (await endpoint(Request(dict(scope))))(scope, receive, send)  # compile the plan
+
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        request = Request(dict(scope))  # request scoped values are stored in the scope
+        await (await endpoint(request))(request.scope, receive, send)
+    return time.perf_counter() - started_at
+
+
+async def main(iterations: int) -> None:
+    per_call = 1_000_000 / iterations
+    cases = [
+        ("constants + request resolvers", simple_view),
+        ("with factory and path param", full_view),
+        ("request scoped factory used 3 times", shared_view),
+    ]
+    for title, view in cases:
+        baseline = await run(BaseRouteGroup(), view, iterations)
+        planned = await run(RouteGroup(), view, iterations)
+        print(title)
+        print(f"  starlette_dispatch: {baseline * per_call:.2f} us/call")
+        print(f"  kupala plans:       {planned * per_call:.2f} us/call ({baseline / planned:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
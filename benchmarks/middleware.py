@@ -0,0 +1,103 @@
+"""Measure per-middleware cost of a no-op request through the stack of Kupala middleware.
+
+Each line adds one middleware (outermost first) and reports the cost it adds to a request.
+
+Usage: python benchmarks/middleware.py [iterations]
+"""
+
+import asyncio
+import sys
+import time
+import typing
+
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message
+
+from kupala.contrib.sqlalchemy.manager import DatabaseManager
+from kupala.contrib.sqlalchemy.middleware import DbSessionMiddleware
+from kupala.metrics import MetricsMiddleware
+from kupala.middleware import (
+    CompressionMiddleware,
+    ConcurrencyLimitMiddleware,
+    CSRFMiddleware,
+    MethodOverrideMiddleware,
+    RequestIDMiddleware,
+    RequestLimitMiddleware,
+    ServerTimingMiddleware,
+    TimeoutMiddleware,
+)
+
+endpoint = PlainTextResponse("ok")
+headers = [
+    (b"host", b"example.com"),
+    (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64; rv:130.0) Gecko/20100101 Firefox/130.0"),
+    (b"accept", b"text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"),
+    (b"accept-language", b"en-US,en;q=0.5"),
+    (b"accept-encoding", b"gzip, deflate, br, zstd"),
+    (b"cookie", b"theme=dark; tracking=abc"),
+]
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+def build(middleware: typing.Sequence[Middleware]) -> ASGIApp:
+    app: ASGIApp = endpoint
+    for cls, args, kwargs in reversed(middleware):
+        app = cls(app, *args, **kwargs)
+    return app
+
+
+async def run(app: ASGIApp, iterations: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "root_path": "",
+            "query_string": b"",
+            "headers": list(headers),
+            "state": {},
+        }
+        await app(scope, receive, send)
+    return time.perf_counter() - started_at
+
+
+async def main(iterations: int) -> None:
+    manager = DatabaseManager("sqlite+aiosqlite://", isolation_level="SERIALIZABLE", dangerously_disable_pool=True)
+    stack = [
+        Middleware(RequestIDMiddleware),
+        Middleware(ServerTimingMiddleware, log_level=None),
+        Middleware(MetricsMiddleware),
+        Middleware(TimeoutMiddleware),
+        Middleware(ConcurrencyLimitMiddleware),
+        Middleware(RequestLimitMiddleware),
+        Middleware(CompressionMiddleware),
+        Middleware(SessionMiddleware, secret_key="secret"),
+        Middleware(CSRFMiddleware, secret_key="secret"),
+        Middleware(MethodOverrideMiddleware),
+        Middleware(DbSessionMiddleware, manager=manager),
+    ]
+
+    per_request = 1_000_000 / iterations
+    async with manager:
+        previous = await run(build([]), iterations)
+        print(f"{'endpoint only':32}{previous * per_request:8.2f} us/request")
+        for index in range(len(stack)):
+            await run(build(stack[: index + 1]), iterations // 10)  # warm up
+            elapsed = await run(build(stack[: index + 1]), iterations)
+            name = stack[index].cls.__name__  # type: ignore[attr-defined]
+            print(f"+ {name:30}{elapsed * per_request:8.2f} us/request (+{(elapsed - previous) * per_request:.2f} us)")
+            previous = elapsed
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
@@ -0,0 +1,56 @@
+"""Measure overhead of ProfilerMiddleware on fast requests.
+
+Usage: python benchmarks/profiler.py [concurrency]
+"""
+
+import asyncio
+import sys
+import time
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message
+
+from kupala.middleware.profiler import ProfilerMiddleware
+
+endpoint = Response(b"")
+scope = {"type": "http", "method": "GET", "path": "/", "root_path": "", "headers": [], "query_string": b""}
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+async def worker(app: ASGIApp, iterations: int) -> None:
+    for _ in range(iterations):
+        await app(dict(scope), receive, send)
+
+
+async def run(app: ASGIApp, concurrency: int, iterations: int) -> float:
+    started_at = time.perf_counter()
+    await asyncio.gather(*[worker(app, iterations) for _ in range(concurrency)])
+    return time.perf_counter() - started_at
+
+
+async def main(concurrency: int) -> None:
+    iterations = 20_000 // concurrency
+    apps: dict[str, ASGIApp] = {
+        "no profiler": endpoint,
+        "threshold only": ProfilerMiddleware(endpoint, threshold=1),
+        "1% sampled": ProfilerMiddleware(endpoint, threshold=1, sample_rate=0.01),
+    }
+    per_request = 1_000_000 / (iterations * concurrency)
+    print(f"concurrency: {concurrency}")
+    baseline = None
+    for name, app in apps.items():
+        await run(app, concurrency, iterations // 10)  # warm up
+        elapsed = await run(app, concurrency, iterations)
+        baseline = baseline or elapsed
+        print(f"{name + ':':16}{elapsed * per_request:.2f} us/request (+{(elapsed - baseline) * per_request:.2f} us)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
@@ -0,0 +1,86 @@
+"""Compare cost of the previous RequestIDMiddleware implementation and the current one.
+
+Usage: python benchmarks/request_id.py [iterations]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from kupala.middleware.request_id import RequestIDMiddleware
+
+
+class PreviousRequestIDMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        connection = HTTPConnection(scope, receive)
+        request_id = connection.headers.get("x-request-id", self.generate_id())
+        scope.setdefault("state", {})
+        scope["state"]["request_id"] = request_id
+
+        async def sender(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                headers["x-request-id"] = request_id
+            await send(message)
+
+        await self.app(scope, receive, sender)
+
+    def generate_id(self) -> str:
+        return str(uuid.uuid4()).replace("-", "")
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+async def run(middleware: ASGIApp, headers: list[tuple[bytes, bytes]], iterations: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+        await middleware(scope, receive, send)
+    return time.perf_counter() - started_at
+
+
+async def main(iterations: int) -> None:
+    browser_headers = [
+        (b"host", b"example.com"),
+        (b"user-agent", b"Mozilla/5.0"),
+        (b"accept", b"text/html"),
+        (b"accept-encoding", b"gzip, br"),
+        (b"cookie", b"session=abc"),
+    ]
+    cases = {
+        "generated id": browser_headers,
+        "client id": [*browser_headers, (b"x-request-id", b"4bf92f3577b34da6a3ce929d0e0e4736")],
+    }
+    per_request = 1_000_000 / iterations
+    baseline_app = await run(app, browser_headers, iterations)
+    for name, headers in cases.items():
+        previous = await run(PreviousRequestIDMiddleware(app), headers, iterations) - baseline_app
+        current = await run(RequestIDMiddleware(app), headers, iterations) - baseline_app
+        traced = await run(RequestIDMiddleware(app, trace_context=True), headers, iterations) - baseline_app
+        print(f"{name}:")
+        print(f"  previous:       {previous * per_request:.2f} us/request")
+        print(f"  current:        {current * per_request:.2f} us/request ({previous / current:.1f}x)")
+        print(f"  trace context:  {traced * per_request:.2f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,65 @@
+"""Compare dispatch cost of Starlette's linear router and Kupala's indexed router.
+
+Usage: python benchmarks/routing.py [routes_count]
+"""
+
+import asyncio
+import sys
+import time
+import typing
+
+from starlette.responses import Response
+from starlette.routing import Mount as BaseMount
+from starlette.routing import Route
+from starlette.routing import Router as BaseRouter
+from starlette.types import Message
+
+from kupala.routing import Mount, Router
+
+endpoint = Response(b"")
+
+
+def make_routes(count: int, mount_class: type[BaseMount]) -> list[typing.Any]:
+    routes_per_mount = 20
+    mounts = []
+    for section in range(count // routes_per_mount):
+        children = []
+        for index in range(routes_per_mount // 2):
+            children.append(Route(f"/items{index}", endpoint))
+            children.append(Route(f"/items{index}/{{id:int}}", endpoint))
+        mounts.append(mount_class(f"/section{section}", routes=children))
+    return mounts
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+async def run(router: BaseRouter, paths: list[str], iterations: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        for path in paths:
+            scope = {"type": "http", "method": "GET", "path": path, "root_path": "", "headers": [], "query_string": b""}
+            await router(scope, receive, send)
+    return time.perf_counter() - started_at
+
+
+async def main(count: int) -> None:
+    sections = count // 20
+    paths = ["/section0/items0", f"/section{sections // 2}/items5/42", f"/section{sections - 1}/items9/1"]
+    iterations = 2000
+
+    baseline = await run(BaseRouter(make_routes(count, BaseMount)), paths, iterations)
+    indexed = await run(Router(make_routes(count, Mount)), paths, iterations)
+    per_request = 1_000_000 / (iterations * len(paths))
+    print(f"routes: {count}")
+    print(f"starlette router: {baseline * per_request:.2f} us/request")
+    print(f"kupala router:    {indexed * per_request:.2f} us/request ({baseline / indexed:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -14,13 +14,27 @@ from starlette.routing import BaseRoute
 from starlette.types import ExceptionHandler
 
 from kupala.dependency_resolvers import DependencyResolver
+from kupala.initializers import Initializer, run_initializers
+from kupala.routing import Router, compile_dependency_plans
+from kupala.urls import get_url_index
 
 
-def multi_lifespan(*lifespan: Lifespan) -> None:
+def multi_lifespan(*lifespan: Lifespan[typing.Any], concurrent: bool = False) -> Lifespan[typing.Any]:
+    """Combine lifespans into one, their states are merged.
+    Lifespans are entered one after another, or all at once when `concurrent` is set;
+    either way they exit in reverse order."""
+
     @contextlib.asynccontextmanager
     async def handler(app: Starlette) -> typing.AsyncGenerator[dict[str, typing.Any], None]:
+        combined: dict[str, typing.Any] = {}
+        if concurrent:
+            async with run_initializers(app, [Initializer(ls) for ls in lifespan]) as report:
+                for state in report.states:
+                    combined.update(state or {})
+                yield combined
+            return
+
         async with contextlib.AsyncExitStack() as stack:
-            combined = {}
             for ls in lifespan:
                 state = await stack.enter_async_context(ls(app))
                 if state:
@@ -33,7 +47,7 @@ def multi_lifespan(*lifespan: Lifespan) -> None:
 T = typing.TypeVar("T")
 
 
-type AppInitializer = typing.Callable[[Kupala], typing.AsyncContextManager[None]]
+type AppInitializer = typing.Callable[[Kupala], typing.AsyncContextManager[None]] | Initializer
 
 
 @dataclasses.dataclass
@@ -54,6 +68,8 @@ class Extension(typing.Protocol):
 class Kupala(Starlette):
     """A Kupala application."""
 
+    router: Router
+
     def __init__(
         self,
         debug: bool = False,
@@ -90,15 +106,25 @@ class Kupala(Starlette):
             middleware=app_config.middleware,
             exception_handlers=app_config.exception_handlers,
         )
+        self.router = Router(app_config.routes, lifespan=_app_lifespan)
         self.state.dependency_resolvers = app_config.dependency_resolvers
+        self.state.dependency_singletons = {}
         for state_key, state_value in app_config.state.items():
             setattr(self.state, state_key, state_value)
 
     @contextlib.asynccontextmanager
     async def initialize(self, app: typing.Self) -> typing.AsyncGenerator[None, None]:
-        async with contextlib.AsyncExitStack() as stack:
-            for initializer in self.initializers:
-                await stack.enter_async_context(initializer(app))
+        async with run_initializers(app, self.initializers) as report, contextlib.AsyncExitStack() as stack:
+            self.state.startup_timings = report.timings
+
+            # context managers of singleton dependencies exit before initializers
+            self.state.dependency_stack = stack
+            stack.callback(self.state.dependency_singletons.clear)
+
+            # warm up route indexes and dependency plans
+            self.router.rebuild_index()
+            get_url_index(self.router)
+            compile_dependency_plans(self.router.routes, app)
             yield
 
     def cli_plugin(self, app: click.Group) -> None:
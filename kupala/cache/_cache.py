@@ -8,6 +8,14 @@ from kupala.cache.backends.base import CacheBackend
 from kupala.cache.backends.memory import MemoryCacheBackend
 from kupala.cache.backends.redis import RedisCacheBackend
 from kupala.cache.serializers import CacheSerializer, JsonCacheSerializer
+from kupala.metrics import Counter
+from kupala.timings import span
+
+cache_requests_total = Counter(
+    "kupala_cache_requests_total",
+    "Total number of cache operations by result.",
+    ["operation", "result"],
+)
 
 
 class Cache:
@@ -23,10 +31,14 @@ class Cache:
 
     async def set(self, key: str, value: typing.Any, ttl: datetime.timedelta | int) -> None:
         ttl_seconds = ttl.total_seconds() if isinstance(ttl, datetime.timedelta) else ttl
-        await self.backend.set(self._make_key(key), self.serializer.serialize(value), int(ttl_seconds))
+        with span("cache"):
+            await self.backend.set(self._make_key(key), self.serializer.serialize(value), int(ttl_seconds))
+        cache_requests_total.labels("set", "ok").inc()
 
     async def get(self, key: str) -> typing.Any | None:
-        value = await self.backend.get(self._make_key(key))
+        with span("cache"):
+            value = await self.backend.get(self._make_key(key))
+        cache_requests_total.labels("get", "miss" if value is None else "hit").inc()
         return self.serializer.deserialize(value) if value is not None else None
 
     def _make_key(self, key: str) -> str:
@@ -0,0 +1,666 @@
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import decimal
+import enum
+import types
+import typing
+import uuid
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+__all__ = [
+    "ROOT_ERROR_KEY",
+    "INVALID",
+    "Coercer",
+    "ValidationErrors",
+    "get_coercer",
+    "coerce",
+    "is_struct",
+    "struct_error_location",
+    "MISSING",
+    "get_text_coercer",
+    "get_fields_reader",
+    "read_fields",
+]
+
+ROOT_ERROR_KEY = "__root__"
+
+type Errors = dict[str, list[str]]
+type Coercer = typing.Callable[[typing.Any, str, Errors], typing.Any]
+
+
+class _Invalid:
+    def __repr__(self) -> str:
+        return "INVALID"
+
+
+INVALID: typing.Any = _Invalid()
+"""Returned by coercers when the value is invalid, the reason is added to errors."""
+
+
+class ValidationErrors(ValueError):
+    def __init__(self, errors: Errors) -> None:
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _add_error(errors: Errors, path: str, message: str) -> typing.Any:
+    errors.setdefault(path or ROOT_ERROR_KEY, []).append(message)
+    return INVALID
+
+
+def _join(path: str, key: str | int) -> str:
+    return f"{path}.{key}" if path else str(key)
+
+
+def is_struct(tp: typing.Any) -> bool:
+    return msgspec is not None and isinstance(tp, type) and issubclass(tp, msgspec.Struct)
+
+
+_coercers: dict[typing.Any, Coercer] = {}
+
+
+def get_coercer(tp: typing.Any) -> Coercer:
+    """Return cached function that validates decoded JSON value against the type and converts it.
+
+    Supported: str, int, float, bool, Decimal, enums, Literal, datetime, date, time, UUID, unions and optional values,
+    list, tuple, set, dict, dataclasses, TypedDicts and msgspec Structs (when msgspec is installed).
+    Other classes are called with the object fields as keyword arguments."""
+    coercer = _coercers.get(tp)
+    if coercer is None:
+        # register a forward reference first, so recursive types don't recurse infinitely
+        def forward(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+            return _coercers[tp](value, path, errors)
+
+        _coercers[tp] = forward
+        try:
+            coercer = _coercers[tp] = _build(tp)
+        except BaseException:
+            del _coercers[tp]
+            raise
+    return coercer
+
+
+def coerce(tp: typing.Any, value: typing.Any) -> typing.Any:
+    """Convert the value to the type, raise ValidationErrors with all field errors when it is invalid."""
+    errors: Errors = {}
+    result = get_coercer(tp)(value, "", errors)
+    if errors:
+        raise ValidationErrors(errors)
+    return result
+
+
+def _build(tp: typing.Any) -> Coercer:
+    if tp is typing.Any or tp is object:
+        return lambda value, path, errors: value
+    if tp is None or tp is types.NoneType:
+        return _build_none()
+
+    origin = typing.get_origin(tp)
+    if origin is typing.Annotated:
+        return get_coercer(typing.get_args(tp)[0])
+    if origin is typing.Union or origin is types.UnionType:
+        return _build_union(typing.get_args(tp))
+    if origin is typing.Literal:
+        return _build_literal(typing.get_args(tp))
+    if origin in (list, set, frozenset, tuple) or origin in _ABSTRACT_SEQUENCES:
+        return _build_sequence(origin, typing.get_args(tp))
+    if origin in (dict,) or origin in _ABSTRACT_MAPPINGS:
+        args = typing.get_args(tp)
+        return _build_mapping(args[1] if len(args) == 2 else typing.Any)
+    if tp in (list, set, frozenset, tuple):
+        return _build_sequence(tp, ())
+    if tp is dict:
+        return _build_mapping(typing.Any)
+
+    if tp in _SCALARS:
+        return _SCALARS[tp]
+    if isinstance(tp, type) and issubclass(tp, enum.Enum):
+        return _build_enum(tp)
+    if is_struct(tp):
+        return _build_struct(tp)
+    if dataclasses.is_dataclass(tp) and isinstance(tp, type):
+        return _build_dataclass(tp)
+    if typing.is_typeddict(tp):
+        return _build_typeddict(tp)
+    if callable(tp):
+        return _build_callable(tp)
+    raise TypeError(f"Unsupported type: {tp!r}.")
+
+
+def _build_none() -> Coercer:
+    def coerce_none(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        return None if value is None else _add_error(errors, path, "Must be null.")
+
+    return coerce_none
+
+
+def _build_union(args: tuple[typing.Any, ...]) -> Coercer:
+    optional = types.NoneType in args
+    coercers = [get_coercer(arg) for arg in args if arg is not types.NoneType]
+
+    if len(coercers) == 1:
+        [inner] = coercers
+
+        def coerce_optional(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+            if value is None and optional:
+                return None
+            return inner(value, path, errors)
+
+        return coerce_optional
+
+    def coerce_union(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        if value is None and optional:
+            return None
+        for coercer in coercers:
+            attempt: Errors = {}
+            result = coercer(value, path, attempt)
+            if not attempt:
+                return result
+        return _add_error(errors, path, "Invalid value.")
+
+    return coerce_union
+
+
+def _build_literal(choices: tuple[typing.Any, ...]) -> Coercer:
+    allowed = set(choices)
+    message = "Must be one of: {}.".format(", ".join(map(repr, choices)))
+
+    def coerce_literal(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        try:
+            if value in allowed:
+                return value
+        except TypeError:  # unhashable value
+            pass
+        return _add_error(errors, path, message)
+
+    return coerce_literal
+
+
+def _build_sequence(origin: typing.Any, args: tuple[typing.Any, ...]) -> Coercer:
+    factory: typing.Callable[[list[typing.Any]], typing.Any] = list
+    if origin in (set, frozenset, tuple):
+        factory = origin
+    elif origin is _abc_set or origin is _abc_mutable_set:
+        factory = set
+
+    if origin is tuple and args and not (len(args) == 2 and args[1] is Ellipsis):
+        item_coercers = [get_coercer(arg) for arg in args]
+
+        def coerce_fixed_tuple(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+            if not isinstance(value, (list, tuple)) or len(value) != len(item_coercers):
+                return _add_error(errors, path, f"Must be a list of {len(item_coercers)} items.")
+            result = tuple(
+                coercer(item, _join(path, i), errors) for i, (coercer, item) in enumerate(zip(item_coercers, value))
+            )
+            return INVALID if INVALID in result else result
+
+        return coerce_fixed_tuple
+
+    item_coercer = get_coercer(args[0] if args else typing.Any)
+
+    def coerce_sequence(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        if not isinstance(value, (list, tuple)):
+            return _add_error(errors, path, "Must be a list.")
+        items = [item_coercer(item, _join(path, index), errors) for index, item in enumerate(value)]
+        if any(item is INVALID for item in items):
+            return INVALID
+        return factory(items)
+
+    return coerce_sequence
+
+
+def _build_mapping(value_type: typing.Any) -> Coercer:
+    value_coercer = get_coercer(value_type)
+
+    def coerce_mapping(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        if not isinstance(value, dict):
+            return _add_error(errors, path, "Must be an object.")
+        result = {key: value_coercer(item, _join(path, key), errors) for key, item in value.items()}
+        return INVALID if any(item is INVALID for item in result.values()) else result
+
+    return coerce_mapping
+
+
+def _build_enum(tp: type[enum.Enum]) -> Coercer:
+    message = "Must be one of: {}.".format(", ".join(str(member.value) for member in tp))
+
+    def coerce_enum(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        try:
+            return tp(value)
+        except ValueError:
+            return _add_error(errors, path, message)
+
+    return coerce_enum
+
+
+def _build_fields(
+    fields: typing.Iterable[tuple[str, typing.Any, bool]],
+) -> typing.Callable[[typing.Any, str, Errors], dict[str, typing.Any] | None]:
+    """Build a function that coerces the object fields, given as (name, type, required) triples."""
+    compiled = [(name, get_coercer(field_type), required) for name, field_type, required in fields]
+
+    def coerce_fields(value: typing.Any, path: str, errors: Errors) -> dict[str, typing.Any] | None:
+        if not isinstance(value, dict):
+            _add_error(errors, path, "Must be an object.")
+            return None
+        result: dict[str, typing.Any] = {}
+        valid = True
+        for name, coercer, required in compiled:
+            if name in value:
+                item = coercer(value[name], _join(path, name), errors)
+                valid = valid and item is not INVALID
+                result[name] = item
+            elif required:
+                _add_error(errors, _join(path, name), "This field is required.")
+                valid = False
+        return result if valid else None
+
+    return coerce_fields
+
+
+def _build_dataclass(tp: type) -> Coercer:
+    hints = typing.get_type_hints(tp)
+    coerce_fields = _build_fields(
+        (
+            field.name,
+            hints.get(field.name, typing.Any),
+            field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING,
+        )
+        for field in dataclasses.fields(tp)
+        if field.init
+    )
+
+    def coerce_dataclass(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        if isinstance(value, tp):
+            return value
+        fields = coerce_fields(value, path, errors)
+        return INVALID if fields is None else tp(**fields)
+
+    return coerce_dataclass
+
+
+def _build_typeddict(tp: typing.Any) -> Coercer:
+    hints = typing.get_type_hints(tp)
+    required_keys = tp.__required_keys__
+    coerce_fields = _build_fields((name, hint, name in required_keys) for name, hint in hints.items())
+
+    def coerce_typeddict(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        fields = coerce_fields(value, path, errors)
+        return INVALID if fields is None else fields
+
+    return coerce_typeddict
+
+
+def struct_error_location(ex: Exception) -> tuple[str, str]:
+    """Split msgspec validation error into the dotted field path and the message."""
+    message, _, location = str(ex).rpartition(" - at `$")
+    if not message:
+        return "", str(ex)
+    return location.rstrip("`").lstrip("."), message
+
+
+def _build_struct(tp: type) -> Coercer:
+    def coerce_struct(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        try:
+            return msgspec.convert(value, tp)
+        except msgspec.ValidationError as ex:
+            location, message = struct_error_location(ex)
+            return _add_error(errors, _join(path, location) if location else path, message)
+
+    return coerce_struct
+
+
+def _build_callable(tp: typing.Callable[..., typing.Any]) -> Coercer:
+    def coerce_callable(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        try:
+            return tp(**value) if isinstance(value, dict) else tp(value)
+        except (TypeError, ValueError) as ex:
+            return _add_error(errors, path, str(ex))
+
+    return coerce_callable
+
+
+def _coerce_str(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+    return value if isinstance(value, str) else _add_error(errors, path, "Must be a string.")
+
+
+def _coerce_int(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return _add_error(errors, path, "Must be an integer.")
+
+
+def _coerce_float(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return _add_error(errors, path, "Must be a number.")
+
+
+def _coerce_bool(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+    return value if isinstance(value, bool) else _add_error(errors, path, "Must be a boolean.")
+
+
+def _coerce_decimal(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+    if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        try:
+            result = decimal.Decimal(str(value))
+            if result.is_finite():
+                return result
+        except decimal.InvalidOperation:
+            pass
+    return _add_error(errors, path, "Must be a number.")
+
+
+def _iso_parser(tp: typing.Any, message: str) -> Coercer:
+    def coerce_iso(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        if isinstance(value, tp) and (tp is datetime.datetime or not isinstance(value, datetime.datetime)):
+            return value
+        if isinstance(value, str):
+            try:
+                return tp.fromisoformat(value)
+            except ValueError:
+                pass
+        return _add_error(errors, path, message)
+
+    return coerce_iso
+
+
+def _coerce_uuid(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+    if isinstance(value, uuid.UUID):
+        return value
+    if isinstance(value, str):
+        try:
+            return uuid.UUID(value)
+        except ValueError:
+            pass
+    return _add_error(errors, path, "Must be a valid UUID.")
+
+
+_SCALARS: dict[typing.Any, Coercer] = {
+    str: _coerce_str,
+    int: _coerce_int,
+    float: _coerce_float,
+    bool: _coerce_bool,
+    decimal.Decimal: _coerce_decimal,
+    datetime.datetime: _iso_parser(datetime.datetime, "Must be a date and time in ISO 8601 format."),
+    datetime.date: _iso_parser(datetime.date, "Must be a date in ISO 8601 format."),
+    datetime.time: _iso_parser(datetime.time, "Must be a time in ISO 8601 format."),
+    uuid.UUID: _coerce_uuid,
+}
+
+_abc_set = typing.get_origin(typing.AbstractSet[int])
+_abc_mutable_set = typing.get_origin(typing.MutableSet[int])
+_ABSTRACT_SEQUENCES = {
+    typing.get_origin(typing.Sequence[int]),
+    typing.get_origin(typing.MutableSequence[int]),
+    typing.get_origin(typing.Iterable[int]),
+    typing.get_origin(typing.Collection[int]),
+    _abc_set,
+    _abc_mutable_set,
+}
+_ABSTRACT_MAPPINGS = {typing.get_origin(typing.Mapping[str, int]), typing.get_origin(typing.MutableMapping[str, int])}
+
+
+# Text values: query parameters and form fields are strings, a parameter may be repeated.
+
+type Fields = typing.Any
+"""Multi-valued mapping of text values, like starlette's QueryParams and FormData."""
+
+type FieldsReader = typing.Callable[[Fields, Errors], typing.Any]
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING: typing.Any = _Missing()
+"""Returned by fields readers when the parameter is absent."""
+
+_TRUE_STRINGS = frozenset({"1", "true", "yes", "on"})
+_FALSE_STRINGS = frozenset({"0", "false", "no", "off"})
+
+_text_coercers: dict[typing.Any, Coercer] = {}
+_fields_readers: dict[tuple[typing.Any, str], FieldsReader] = {}
+
+
+def get_text_coercer(tp: typing.Any) -> Coercer:
+    """Return cached function that parses one text value (e.g. a query parameter) into the scalar type.
+
+    Supported: str, int, float, bool ("1", "true", "yes", "on" and opposites), Decimal, enums (by value), Literal,
+    datetime, date, time (ISO 8601), UUID and unions. Empty string is None for optional types.
+    Other classes accept their instances (e.g. uploaded files in forms) and are called with the string otherwise."""
+    coercer = _text_coercers.get(tp)
+    if coercer is None:
+        coercer = _text_coercers[tp] = _build_text(tp)
+    return coercer
+
+
+def _build_text(tp: typing.Any) -> Coercer:
+    if tp is typing.Any or tp is object or tp is str:
+        return _coerce_str
+
+    origin = typing.get_origin(tp)
+    if origin is typing.Annotated:
+        return get_text_coercer(typing.get_args(tp)[0])
+    if origin is typing.Union or origin is types.UnionType:
+        return _build_text_union(typing.get_args(tp))
+    if origin is typing.Literal:
+        return _build_text_choices({str(choice): choice for choice in typing.get_args(tp)})
+    if isinstance(tp, type) and issubclass(tp, enum.Enum):
+        return _build_text_choices({str(member.value): member for member in tp})
+    if tp is bool:
+        return _coerce_text_bool
+    if tp is int:
+        return _build_text_callable(int, "Must be an integer.")
+    if tp is float:
+        return _build_text_callable(float, "Must be a number.")
+    if tp in _SCALARS:
+        return _SCALARS[tp]
+    if isinstance(tp, type):
+        return _build_text_instance(tp)
+    if callable(tp) and origin is None:
+        return _build_text_callable(tp, "Invalid value.")
+    raise TypeError(f"Unsupported type of text value: {tp!r}.")
+
+
+def _build_text_union(args: tuple[typing.Any, ...]) -> Coercer:
+    optional = types.NoneType in args
+    coercers = [get_text_coercer(arg) for arg in args if arg is not types.NoneType]
+
+    def coerce_text_union(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        if optional and value == "":
+            return None
+        for coercer in coercers:
+            attempt: Errors = {}
+            result = coercer(value, path, attempt)
+            if not attempt:
+                return result
+        if len(coercers) == 1:
+            for key, messages in attempt.items():
+                errors.setdefault(key, []).extend(messages)
+            return INVALID
+        return _add_error(errors, path, "Invalid value.")
+
+    return coerce_text_union
+
+
+def _build_text_choices(choices: dict[str, typing.Any]) -> Coercer:
+    message = "Must be one of: {}.".format(", ".join(choices))
+
+    def coerce_text_choice(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        try:
+            return choices[value]
+        except (KeyError, TypeError):
+            return _add_error(errors, path, message)
+
+    return coerce_text_choice
+
+
+def _build_text_callable(tp: typing.Callable[[str], typing.Any], message: str) -> Coercer:
+    def coerce_text(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        try:
+            return tp(value)
+        except (TypeError, ValueError):
+            return _add_error(errors, path, message)
+
+    return coerce_text
+
+
+def _build_text_instance(tp: type) -> Coercer:
+    """Form values may be objects already, like uploaded files, other values are passed to the class."""
+    construct = _build_text_callable(tp, "Invalid value.")
+
+    def coerce_text_instance(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+        return value if isinstance(value, tp) else construct(value, path, errors)
+
+    return coerce_text_instance
+
+
+def _coerce_text_bool(value: typing.Any, path: str, errors: Errors) -> typing.Any:
+    if isinstance(value, str):
+        lowered = value.lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+    return _add_error(errors, path, "Must be a boolean.")
+
+
+def _is_fields_group(tp: typing.Any) -> bool:
+    return (dataclasses.is_dataclass(tp) and isinstance(tp, type)) or typing.is_typeddict(tp) or is_struct(tp)
+
+
+def _sequence_origin(tp: typing.Any) -> typing.Any:
+    origin = typing.get_origin(tp) or tp
+    if origin in (list, set, frozenset, tuple) or origin in _ABSTRACT_SEQUENCES:
+        return origin
+    return None
+
+
+def get_fields_reader(tp: typing.Any, name: str) -> FieldsReader:
+    """Return cached function that reads the named parameter from multi-valued text fields and converts it.
+
+    Collections (list[int], set[Enum], tuple[str, ...]) collect all values of the repeated parameter,
+    missing collection is empty, or None if the collection is optional. Scalars use the last value, the reader returns MISSING when it is absent.
+    Dataclasses, TypedDicts and msgspec Structs group several parameters: each field is read by its name."""
+    reader = _fields_readers.get((tp, name))
+    if reader is None:
+        reader = _fields_readers[(tp, name)] = _build_fields_reader(tp, name)
+    return reader
+
+
+def read_fields(tp: typing.Any, name: str, fields: Fields) -> typing.Any:
+    """Read the parameter from text fields, raise ValidationErrors with all field errors when it is invalid."""
+    errors: Errors = {}
+    result = get_fields_reader(tp, name)(fields, errors)
+    if errors:
+        raise ValidationErrors(errors)
+    return result
+
+
+def _build_fields_reader(tp: typing.Any, name: str) -> FieldsReader:
+    origin = typing.get_origin(tp)
+    if origin is typing.Annotated:
+        return get_fields_reader(typing.get_args(tp)[0], name)
+    if origin is typing.Union or origin is types.UnionType:
+        args = [arg for arg in typing.get_args(tp) if arg is not types.NoneType]
+        if len(args) == 1 and _sequence_origin(args[0]) is not None:
+            return _build_optional_collection_reader(get_fields_reader(args[0], name), name)
+    if _is_fields_group(tp):
+        return _build_group_reader(tp)
+
+    sequence_origin = _sequence_origin(tp)
+    if sequence_origin is not None:
+        return _build_collection_reader(sequence_origin, typing.get_args(tp), name)
+
+    return _build_value_reader(get_text_coercer(tp), name)
+
+
+def _build_value_reader(coercer: Coercer, name: str) -> FieldsReader:
+    def read_value(fields: Fields, errors: Errors) -> typing.Any:
+        values = fields.getlist(name)
+        return coercer(values[-1], name, errors) if values else MISSING
+
+    return read_value
+
+
+def _build_collection_reader(origin: typing.Any, args: tuple[typing.Any, ...], name: str) -> FieldsReader:
+    factory: typing.Callable[[list[typing.Any]], typing.Any] = list
+    if origin in (set, frozenset, tuple):
+        factory = origin
+    elif origin is _abc_set or origin is _abc_mutable_set:
+        factory = set
+
+    if origin is tuple and args and not (len(args) == 2 and args[1] is Ellipsis):
+        raise TypeError(f'Parameter "{name}" must be a variable-length tuple, like tuple[int, ...].')
+    coercer = get_text_coercer(args[0] if args else str)
+
+    def read_collection(fields: Fields, errors: Errors) -> typing.Any:
+        items = [coercer(value, _join(name, index), errors) for index, value in enumerate(fields.getlist(name))]
+        if any(item is INVALID for item in items):
+            return INVALID
+        return factory(items)
+
+    return read_collection
+
+
+def _build_optional_collection_reader(reader: FieldsReader, name: str) -> FieldsReader:
+    """Optional collection is None when the parameter is absent, instead of an empty collection."""
+
+    def read_optional_collection(fields: Fields, errors: Errors) -> typing.Any:
+        return reader(fields, errors) if name in fields else None
+
+    return read_optional_collection
+
+
+def _group_fields(tp: typing.Any) -> typing.Iterable[tuple[str, str, typing.Any, bool]]:
+    """Yield (attribute, parameter name, type, required) of every group field."""
+    if is_struct(tp):
+        for info in msgspec.structs.fields(tp):
+            yield info.name, info.encode_name, info.type, info.required
+    elif typing.is_typeddict(tp):
+        for field_name, hint in typing.get_type_hints(tp).items():
+            yield field_name, field_name, hint, field_name in tp.__required_keys__
+    else:
+        hints = typing.get_type_hints(tp)
+        for field in dataclasses.fields(tp):
+            if field.init:
+                required = field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+                yield field.name, field.name, hints.get(field.name, str), required
+
+
+def _build_group_reader(tp: typing.Any) -> FieldsReader:
+    readers = []
+    for attribute, param_name, field_type, required in _group_fields(tp):
+        if _is_fields_group(field_type):  # nested groups are not read from fields, the value may be an object already
+            reader = _build_value_reader(get_text_coercer(field_type), param_name)
+        else:
+            reader = get_fields_reader(field_type, param_name)
+        readers.append((attribute, param_name, reader, required))
+
+    def read_group(fields: Fields, errors: Errors) -> typing.Any:
+        values: dict[str, typing.Any] = {}
+        valid = True
+        for attribute, param_name, reader, required in readers:
+            value = reader(fields, errors)
+            if value is MISSING:
+                if required:
+                    _add_error(errors, param_name, "This field is required.")
+                    valid = False
+                continue
+            valid = valid and value is not INVALID
+            values[attribute] = value
+        if not valid:
+            return INVALID
+        return values if typing.is_typeddict(tp) else tp(**values)
+
+    return read_group
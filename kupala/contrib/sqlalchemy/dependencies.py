@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from kupala.contrib.sqlalchemy.manager import DatabaseManager
 from kupala.contrib.sqlalchemy.query import Query
+from kupala.dependency_resolvers import DependencyScope
 
 
 @contextlib.asynccontextmanager
@@ -13,9 +14,11 @@ async def _make_dbsession(manager: DatabaseManager) -> typing.AsyncGenerator[Asy
         yield session
 
 
-async def _make_dbquery(dbsession: AsyncSession) -> Query:
+DbSession = typing.Annotated[AsyncSession, DependencyScope.REQUEST, _make_dbsession]
+
+
+async def _make_dbquery(dbsession: DbSession) -> Query:
     return Query(dbsession)
 
 
-DbSession = typing.Annotated[AsyncSession, _make_dbsession]
-DbQuery = typing.Annotated[Query, _make_dbquery]
+DbQuery = typing.Annotated[Query, DependencyScope.REQUEST, _make_dbquery]
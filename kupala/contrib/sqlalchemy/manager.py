@@ -1,20 +1,85 @@
 import contextlib
 import contextvars
+import time
 import typing
 
 from starlette_dispatch import VariableResolver
 
 from kupala.applications import AppConfig, Kupala
-from sqlalchemy import NullPool
+from kupala.deadlines import DeadlineExceeded, get_remaining_time
+from kupala.metrics import Gauge, Histogram
+from kupala.timings import record
+from sqlalchemy import Connection, ExceptionContext, NullPool, event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session, SessionTransaction
 from starlette.applications import Starlette
 
 
+def get_statement_timeout_sql(dialect_name: str, timeout: float) -> str | None:
+    """Return SQL that limits statements of the current transaction to the timeout (in seconds)."""
+    if dialect_name == "postgresql":
+        return f"SET LOCAL statement_timeout = {max(int(timeout * 1000), 1)}"
+    return None
+
+
+class DeadlineSession(Session):
+    """Session that limits statement execution time to the time left for the current request.
+    Supported on PostgreSQL, on other databases it only refuses to start a transaction after the deadline."""
+
+
+@event.listens_for(DeadlineSession, "after_begin")
+def _apply_statement_timeout(session: Session, transaction: SessionTransaction, connection: Connection) -> None:
+    remaining = get_remaining_time()
+    if remaining is None:
+        return
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded.")
+    if sql := get_statement_timeout_sql(connection.dialect.name, remaining):
+        connection.exec_driver_sql(sql)
+
+
+db_query_duration_seconds = Histogram(
+    "kupala_db_query_duration_seconds",
+    "Database query execution time.",
+)
+db_connections_in_use = Gauge(
+    "kupala_db_connections_in_use",
+    "Number of database connections checked out from the pool.",
+    multiprocess_mode="sum",
+)
+
+
+def _before_cursor_execute(connection: Connection, *args: typing.Any) -> None:
+    connection.info.setdefault("kupala_query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(connection: Connection, *args: typing.Any) -> None:
+    if started_at := connection.info.get("kupala_query_started_at"):
+        duration = time.perf_counter() - started_at.pop()
+        db_query_duration_seconds.observe(duration)
+        record("db", duration)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    # failed queries never reach "after_cursor_execute", drop their start time so it is not reused by the next query
+    connection = context.connection if context.execution_context is not None else None
+    if connection is not None and (started_at := connection.info.get("kupala_query_started_at")):
+        started_at.pop()
+
+
+def _on_checkout(*args: typing.Any) -> None:
+    db_connections_in_use.inc()
+
+
+def _on_checkin(*args: typing.Any) -> None:
+    db_connections_in_use.dec()
+
+
 class DatabaseManager:
     def __init__(
         self,
@@ -28,6 +93,7 @@ class DatabaseManager:
         echo: bool = False,
         isolation_level: str = "READ COMMITTED",
         dangerously_disable_pool: bool = False,
+        apply_deadline: bool = True,
     ) -> None:
         self._url = url
         self._echo = echo
@@ -38,11 +104,12 @@ class DatabaseManager:
         self._max_overflow = max_overflow
         self._dangerously_disable_pool = dangerously_disable_pool
         self._isolation_level = isolation_level
+        self._apply_deadline = apply_deadline
         self._engine: AsyncEngine | None = None
         self._sessionmaker: async_sessionmaker | None = None
         self._current_session: contextvars.ContextVar[AsyncSession] = contextvars.ContextVar("sqla_current_session")
 
-    async def __aenter__(self) -> typing.AsyncGenerator[typing.Self, None]:
+    async def __aenter__(self) -> typing.Self:
         if self._engine is not None:
             return self
 
@@ -62,7 +129,16 @@ class DatabaseManager:
             isolation_level=self._isolation_level,
             **opts,
         )
-        self._sessionmaker = async_sessionmaker(bind=self._engine, expire_on_commit=False)
+        event.listen(self._engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(self._engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(self._engine.sync_engine, "handle_error", _handle_error)
+        event.listen(self._engine.sync_engine, "checkout", _on_checkout)
+        event.listen(self._engine.sync_engine, "checkin", _on_checkin)
+        self._sessionmaker = async_sessionmaker(
+            bind=self._engine,
+            expire_on_commit=False,
+            sync_session_class=DeadlineSession if self._apply_deadline else Session,
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback) -> None:
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import time
+import typing
+
+import httpx
+
+__all__ = [
+    "DeadlineExceeded",
+    "deadline",
+    "get_deadline",
+    "get_remaining_time",
+    "httpx_deadline_hook",
+]
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("kupala_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when an operation starts after the deadline of the current request."""
+
+
+def get_deadline() -> float | None:
+    """Return the deadline of the current request as `time.monotonic()` value, or None if there is no deadline."""
+    return _deadline.get()
+
+
+def get_remaining_time() -> float | None:
+    """Return seconds left before the deadline (never negative), or None if there is no deadline."""
+    value = _deadline.get()
+    if value is None:
+        return None
+    return max(value - time.monotonic(), 0.0)
+
+
+@contextlib.contextmanager
+def deadline(timeout: float | None) -> typing.Generator[float | None, None, None]:
+    """Set the deadline for the code inside the block. The nested deadline can only shorten the outer one.
+    Yields the effective deadline."""
+    current = _deadline.get()
+    if timeout is not None:
+        value = time.monotonic() + timeout
+        current = value if current is None else min(current, value)
+
+    token = _deadline.set(current)
+    try:
+        yield current
+    finally:
+        _deadline.reset(token)
+
+
+async def httpx_deadline_hook(request: httpx.Request) -> None:
+    """Request hook for httpx.AsyncClient that caps request timeouts with time left for the current request.
+
+    Usage: httpx.AsyncClient(event_hooks={"request": [httpx_deadline_hook]})"""
+    remaining = get_remaining_time()
+    if remaining is None:
+        return
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded.")
+
+    timeouts: dict[str, float | None] = dict(request.extensions.get("timeout", {}))
+    for key in ("connect", "read", "write", "pool"):
+        value = timeouts.get(key)
+        timeouts[key] = remaining if value is None else min(value, remaining)
+    request.extensions["timeout"] = timeouts
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import time
+import types
+import typing
+import warnings
+
+import anyio
+from starlette.requests import HTTPConnection, Request
+from starlette.responses import Response, StreamingResponse
+from starlette_dispatch.injections import (
+    DependencyRequiresValueError,
+    DependencyResolver,
+    DependencySpec,
+    NoDependencyResolver,
+    RequestResolver,
+    ResolveContext,
+    VariableResolver,
+    create_dependency_specs,
+)
+
+from kupala.dependency_resolvers import scoped_resolver
+from kupala.timings import get_timings
+
+__all__ = [
+    "ResolutionPlan",
+    "compile_plan",
+    "PlanCache",
+    "call_with_dependencies",
+    "call_endpoint",
+    "TEARDOWN_SCOPE_KEY",
+]
+
+type RequestCall = typing.Callable[[HTTPConnection], typing.Any]
+
+
+def _ensure_value(spec: DependencySpec, value: typing.Any) -> typing.Any:
+    if value is None and not spec.optional:
+        message = f'Dependency "{spec.param_name}" has None value but it is not optional.'
+        raise DependencyRequiresValueError(message)
+    return value
+
+
+class _ConnectionResolver(DependencyResolver):
+    """Resolves Request and HTTPConnection dependencies of nested factories."""
+
+    async def resolve(self, context: ResolveContext, spec: DependencySpec) -> typing.Any:
+        return context.connection
+
+
+def _make_request_call(resolver: RequestResolver, spec: DependencySpec) -> RequestCall:
+    fn = resolver._fn
+    if resolver.takes_spec:
+        return lambda connection: fn(connection, spec)  # type: ignore[call-arg]
+    return typing.cast(RequestCall, fn)
+
+
+@dataclasses.dataclass(slots=True)
+class ResolutionPlan:
+    """Flat list of steps that resolves endpoint dependencies, compiled once per endpoint and app.
+
+    Steps run in this order: constants (VariableResolver values and the app) are copied,
+    the connection is assigned, synchronous request resolvers (like `lambda request: ...`) are called,
+    then the other resolvers are awaited in declaration order. Resolvers marked as concurrent
+    (see `kupala.dependency_resolvers.ConcurrentResolver`) are awaited together in a task group."""
+
+    constants: dict[str, typing.Any] = dataclasses.field(default_factory=dict)
+    connection_params: tuple[str, ...] = ()
+    request_calls: tuple[tuple[DependencySpec, RequestCall], ...] = ()
+    async_steps: tuple[tuple[DependencySpec, DependencyResolver], ...] = ()
+    concurrent_steps: tuple[tuple[DependencySpec, DependencyResolver], ...] = ()
+    static_resolvers: dict[typing.Any, DependencyResolver] = dataclasses.field(default_factory=dict)
+
+    @property
+    def needs_context(self) -> bool:
+        """Async resolvers may enter context managers, so they need exit stacks."""
+        return bool(self.async_steps or self.concurrent_steps)
+
+    def resolve_sync(self, connection: HTTPConnection) -> dict[str, typing.Any]:
+        values = self.constants.copy()
+        for name in self.connection_params:
+            values[name] = connection
+        for spec, call in self.request_calls:
+            values[spec.param_name] = _ensure_value(spec, call(connection))
+        return values
+
+    async def resolve(self, connection: HTTPConnection, context: ResolveContext | None) -> dict[str, typing.Any]:
+        values = self.resolve_sync(connection)
+        if context is None:
+            return values
+
+        for spec, resolver in self.async_steps:
+            values[spec.param_name] = _ensure_value(spec, await resolver.resolve(context, spec))
+
+        if self.concurrent_steps:
+
+            async def resolve_one(spec: DependencySpec, resolver: DependencyResolver) -> None:
+                values[spec.param_name] = _ensure_value(spec, await resolver.resolve(context, spec))
+
+            async with anyio.create_task_group() as tg:
+                for spec, resolver in self.concurrent_steps:
+                    tg.start_soon(resolve_one, spec, resolver)
+        return values
+
+
+def _allows_none(tp: typing.Any) -> bool:
+    return typing.get_origin(tp) in (typing.Union, types.UnionType) and types.NoneType in typing.get_args(tp)
+
+
+def compile_plan(
+    specs: typing.Sequence[DependencySpec],
+    app: typing.Any,
+    app_resolvers: typing.Mapping[typing.Any, DependencyResolver] | None = None,
+) -> ResolutionPlan:
+    """Analyze dependency specs of the endpoint for the app and build the resolution plan."""
+    app_resolvers = app_resolvers or {}
+    plan = ResolutionPlan(
+        static_resolvers={
+            type(app): VariableResolver(app),
+            Request: _ConnectionResolver(),
+            HTTPConnection: _ConnectionResolver(),
+            **app_resolvers,
+        }
+    )
+    connection_params: list[str] = []
+    request_calls: list[tuple[DependencySpec, RequestCall]] = []
+    async_steps: list[tuple[DependencySpec, DependencyResolver]] = []
+    concurrent_steps: list[tuple[DependencySpec, DependencyResolver]] = []
+
+    for spec in specs:
+        if not spec.optional and _allows_none(spec.param_type):
+            # FromQuery[int | None] declares the optional type inside the alias, starlette_dispatch misses it
+            spec = dataclasses.replace(spec, optional=True)
+        resolver = scoped_resolver(spec)
+        if isinstance(resolver, NoDependencyResolver):
+            if spec.param_type is DependencySpec:
+                plan.constants[spec.param_name] = spec
+                continue
+            if spec.param_type in app_resolvers:
+                resolver = app_resolvers[spec.param_type]
+            elif spec.param_type in (Request, HTTPConnection):
+                connection_params.append(spec.param_name)
+                continue
+            elif spec.param_type is type(app):
+                resolver = plan.static_resolvers[type(app)]
+
+        if (prepare := getattr(resolver, "prepare", None)) is not None:
+            prepare(spec)  # resolvers compile their converters here, unsupported types fail at startup
+
+        if type(resolver) is VariableResolver and (resolver._value is not None or spec.optional):
+            plan.constants[spec.param_name] = resolver._value
+        elif type(resolver) is RequestResolver:
+            request_calls.append((spec, _make_request_call(resolver, spec)))
+        elif getattr(resolver, "concurrent", False):
+            concurrent_steps.append((spec, resolver))
+        else:
+            async_steps.append((spec, resolver))
+
+    if len(concurrent_steps) == 1:  # a task group for one resolver is pure overhead
+        async_steps.extend(concurrent_steps)
+        concurrent_steps.clear()
+
+    plan.connection_params = tuple(connection_params)
+    plan.request_calls = tuple(request_calls)
+    plan.async_steps = tuple(async_steps)
+    plan.concurrent_steps = tuple(concurrent_steps)
+    return plan
+
+
+class PlanCache:
+    """Compiled plan of one endpoint. The plan depends on the app (its type and dependency resolvers),
+    so it is recompiled when the endpoint is served by another app."""
+
+    def __init__(self, fn: typing.Callable[..., typing.Any]) -> None:
+        self.specs = create_dependency_specs(fn)
+        self._app: typing.Any = None
+        self._plan: ResolutionPlan | None = None
+
+    def get(self, app: typing.Any) -> ResolutionPlan:
+        if self._plan is None or self._app is not app:
+            app_resolvers: dict[typing.Any, DependencyResolver] = {}
+            with contextlib.suppress(AttributeError):
+                app_resolvers = app.state.dependency_resolvers
+            self._plan = compile_plan(self.specs, app, app_resolvers)
+            self._app = app
+        return self._plan
+
+
+async def _resolve(
+    plan: ResolutionPlan, connection: HTTPConnection, stack: contextlib.AsyncExitStack | None
+) -> dict[str, typing.Any]:
+    timings = get_timings()
+    started_at = time.perf_counter() if timings is not None else 0.0
+    if stack is None:
+        values = plan.resolve_sync(connection)
+    else:
+        # one stack for sync and async context managers, so they exit in exact reverse order
+        context = ResolveContext(connection, stack, stack, plan.static_resolvers)  # type: ignore[arg-type]
+        values = await plan.resolve(connection, context)
+    if timings is not None:
+        timings.add("deps", time.perf_counter() - started_at)
+    return values
+
+
+async def call_with_dependencies(
+    plan: ResolutionPlan,
+    connection: HTTPConnection,
+    fn: typing.Callable[..., typing.Awaitable[typing.Any]],
+) -> typing.Any:
+    """Resolve dependencies by the plan and call `fn` with them, records "deps" timing span.
+    Context managers entered by resolvers exit when `fn` returns."""
+    if not plan.needs_context:
+        return await fn(**await _resolve(plan, connection, None))
+
+    async with contextlib.AsyncExitStack() as stack:
+        return await fn(**await _resolve(plan, connection, stack))
+
+
+TEARDOWN_SCOPE_KEY = "kupala.teardown"
+
+
+async def call_endpoint(
+    plan: ResolutionPlan,
+    request: Request,
+    fn: typing.Callable[..., typing.Awaitable[Response]],
+) -> Response:
+    """Like `call_with_dependencies`, but when the request is routed by `kupala.routing.RouteGroup`,
+    context managers of dependencies (like database sessions) exit after the response is sent,
+    so streaming responses can still use them. If `fn` fails, they exit immediately.
+
+    Only routes added by `RouteGroup` provide the teardown stack (see `TEARDOWN_SCOPE_KEY`).
+    Endpoints called any other way exit dependencies when `fn` returns, before the response is sent,
+    a streaming response returned by such an endpoint triggers a RuntimeWarning."""
+    teardown: contextlib.AsyncExitStack | None = request.scope.get(TEARDOWN_SCOPE_KEY)
+    if not plan.needs_context:
+        return typing.cast(Response, await call_with_dependencies(plan, request, fn))
+    if teardown is None:
+        response = typing.cast(Response, await call_with_dependencies(plan, request, fn))
+        if isinstance(response, StreamingResponse):
+            warnings.warn(
+                f"Endpoint {getattr(fn, '__qualname__', fn)!r} returned a streaming response outside of "
+                "RouteGroup route, its dependencies have exited before the response is sent.",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+        return response
+
+    stack = contextlib.AsyncExitStack()
+    await stack.__aenter__()
+    try:
+        response = await fn(**await _resolve(plan, request, stack))
+    except BaseException as ex:
+        await stack.__aexit__(type(ex), ex, ex.__traceback__)
+        raise
+    teardown.push_async_exit(stack.__aexit__)
+    return response
@@ -1,18 +1,44 @@
+import contextlib
+import dataclasses
+import inspect
+import json
 import typing
 
-from starlette.requests import HTTPConnection, Request
-from starlette.websockets import WebSocket
+import anyio
+from starlette.requests import Request
 from starlette_dispatch import (
     DependencyError,
     DependencyResolver,
     DependencyScope,
     DependencySpec,
-    FactoryResolver,
     RequestResolver,
     ResolveContext,
     VariableResolver,
 )
+from starlette_dispatch import FactoryResolver as BaseFactoryResolver
 from starlette_dispatch.contrib.dependencies import PathParamValue
+from starlette_dispatch.injections import DependencyRequiresValueError
+
+from kupala.coercion import (
+    MISSING,
+    ValidationErrors,
+    coerce,
+    get_coercer,
+    get_fields_reader,
+    read_fields,
+)
+from kupala.exceptions import BadRequest, PayloadTooLarge, UnprocessableEntity
+from kupala.uploads import delete_files, get_uploads, stream_form
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
 
 __all__ = [
     "DependencyError",
@@ -27,28 +53,295 @@ __all__ = [
     "FormDataResolver",
     "ResolveContext",
     "DependencyScope",
+    "ConcurrentResolver",
+    "read_json",
+    "scoped_resolver",
 ]
 
 
+REQUEST_DEPENDENCIES_KEY = "kupala.dependencies"
+
+
+class FactoryResolver(BaseFactoryResolver):
+    """Resolve the dependency by calling the factory, nested dependencies of the factory are resolved first.
+
+    The scope defines how often the factory is called:
+    - transient: for every dependency
+    - request: once per request, the value is shared by all dependencies of the request,
+      including nested ones, that use the same resolver
+    - singleton: once per application
+
+    Context managers returned by the factory are entered, transient and request ones
+    exit in reverse order after the response is sent, singleton ones on application shutdown.
+
+    Usage:
+        DbSession = typing.Annotated[AsyncSession, FactoryResolver(make_session, scope=DependencyScope.REQUEST)]
+        # or
+        DbSession = typing.Annotated[AsyncSession, DependencyScope.REQUEST, make_session]
+    """
+
+    def __init__(
+        self, resolver: typing.Callable[..., typing.Any], *, scope: DependencyScope = DependencyScope.TRANSIENT
+    ) -> None:
+        super().__init__(resolver, scope=scope)
+        self.scope = scope
+        self._dependencies = [dataclasses.replace(spec, resolver=scoped_resolver(spec)) for spec in self._dependencies]
+        self._singletons: dict[typing.Any, typing.Any] = {}
+
+    async def resolve(self, context: ResolveContext, spec: DependencySpec) -> typing.Any:
+        if self.scope == DependencyScope.TRANSIENT:
+            return await self._create(context, context.async_stack)
+
+        if self.scope == DependencyScope.REQUEST:
+            values = context.connection.scope.setdefault(REQUEST_DEPENDENCIES_KEY, {})
+            return await self._memoize(values, context, context.async_stack)
+
+        state = getattr(context.connection.scope.get("app"), "state", None)
+        values = getattr(state, "dependency_singletons", self._singletons)
+        return await self._memoize(values, context, getattr(state, "dependency_stack", None))
+
+    async def _memoize(
+        self, values: dict[typing.Any, typing.Any], context: ResolveContext, stack: typing.Any
+    ) -> typing.Any:
+        # concurrent resolvers wait for the first one, it keeps an event in a separate map while the factory runs,
+        # so factories may return any value, events included
+        pending: dict[DependencyResolver, anyio.Event] = values.setdefault(_PENDING_KEY, {})
+        while (event := pending.get(self)) is not None:
+            await event.wait()
+        if (value := values.get(self, _MISSING)) is not _MISSING:
+            return value
+
+        event = pending[self] = anyio.Event()
+        try:
+            value = values[self] = await self._create(context, stack)
+        finally:
+            del pending[self]
+            event.set()
+        return value
+
+    async def _create(self, context: ResolveContext, stack: contextlib.AsyncExitStack | None) -> typing.Any:
+        dependencies: dict[str, typing.Any] = {}
+        for spec in self._dependencies:
+            value = await spec.resolver.resolve(context, spec)
+            if value is None and not spec.optional:
+                message = f'Dependency "{spec.param_name}" has None value but it is not optional.'
+                raise DependencyRequiresValueError(message)
+            dependencies[spec.param_name] = value
+
+        value = await self._resolver(**dependencies) if self._is_async else self._resolver(**dependencies)
+        if isinstance(value, (contextlib.AbstractContextManager, contextlib.AbstractAsyncContextManager)):
+            if stack is None:
+                raise DependencyError(
+                    f"Singleton {self._resolver.__name__} returns a context manager, "
+                    "it requires the application lifespan to be running."
+                )
+            if isinstance(value, contextlib.AbstractContextManager):
+                return stack.enter_context(value)
+            return await stack.enter_async_context(value)
+        return value
+
+
+_MISSING = object()
+_PENDING_KEY = object()
+_scoped_resolvers: dict[tuple[typing.Callable[..., typing.Any], DependencyScope], FactoryResolver] = {}
+
+
+def scoped_resolver(spec: DependencySpec) -> DependencyResolver:
+    """Replace starlette_dispatch factory resolver, created for `Annotated[T, factory]` aliases, with FactoryResolver.
+    The scope is taken from the alias options: `Annotated[T, DependencyScope.REQUEST, factory]`.
+    There is one resolver per factory and scope, so request and singleton values are shared by all usages."""
+    resolver = spec.resolver
+    if type(resolver) is not BaseFactoryResolver:
+        return resolver
+
+    scope = next((option for option in spec.resolver_options if isinstance(option, DependencyScope)), resolver._scope)
+    key = (resolver._resolver, scope)
+    scoped = _scoped_resolvers.get(key)
+    if scoped is None:
+        scoped = _scoped_resolvers[key] = FactoryResolver(resolver._resolver, scope=scope)
+    return scoped
+
+
 class QueryParamResolver(DependencyResolver):
-    async def resolve(self, spec: DependencySpec, overrides: dict[typing.Any, typing.Any]) -> typing.Any:
-        conn: HTTPConnection | None = overrides.get(Request, overrides.get(WebSocket))
-        if not conn:
-            raise DependencyError(f'Cannot extract path parameter "{spec.param_name}": no HTTP connection found.')
+    """Read the query parameter named as the endpoint parameter and convert it to the parameter type.
+
+    Supports scalars (int, bool, enums, datetime, ...), optional values, collections of repeated parameters
+    (`?tag=a&tag=b` for list[str]) and dataclass, TypedDict or msgspec Struct groups of parameters.
+    Readers are compiled once per type, see `kupala.coercion.get_fields_reader`.
+    Invalid values are reported together with 422 status code."""
+
+    def prepare(self, spec: DependencySpec) -> None:
+        """Compile the reader when the endpoint plan is built, so unsupported types fail at startup."""
+        get_fields_reader(spec.param_type, spec.param_name)
+
+    async def resolve(self, context: ResolveContext, spec: DependencySpec) -> typing.Any:
+        try:
+            value = read_fields(spec.param_type, spec.param_name, context.connection.query_params)
+        except ValidationErrors as ex:
+            raise UnprocessableEntity(errors=ex.errors) from ex
 
-        value = conn.query_params.get(spec.param_name)
-        return self.spec.param_type(value) if value is not None else None
+        return _missing_value(spec) if value is MISSING else value
+
+
+def _missing_value(spec: DependencySpec) -> typing.Any:
+    if spec.default is not inspect.Parameter.empty:
+        return spec.default
+    if spec.optional:
+        return None
+    raise UnprocessableEntity(errors={spec.param_name: ["This field is required."]})
 
 
 class JSONDataResolver(DependencyResolver):
-    async def resolve(self, spec: DependencySpec, overrides: dict[typing.Any, typing.Any]) -> typing.Any:
-        request: Request = overrides[Request]
-        body = await request.json()
-        return spec.param_type(**body)
+    """Decode the JSON request body into the parameter type.
+
+    The body is read and decoded once per request, so several parameters may share it.
+    Values are validated and converted by cached per-type coercers (see `kupala.coercion`),
+    msgspec Structs are converted from the decoded document by msgspec.
+    Bodies larger than `max_size` bytes are rejected with 413 status code before they are read completely,
+    invalid documents with 400, and values not matching the type with 422 listing field errors."""
+
+    def __init__(self, max_size: int | None = 1024 * 1024) -> None:
+        self.max_size = max_size
+
+    def prepare(self, spec: DependencySpec) -> None:
+        get_coercer(spec.param_type)
+
+    async def resolve(self, context: ResolveContext, spec: DependencySpec) -> typing.Any:
+        request = context.connection
+        if not isinstance(request, Request):
+            raise DependencyError(f'Cannot decode JSON for "{spec.param_name}": no HTTP request found.')
+
+        data = await read_json(request, self.max_size)
+        try:
+            return coerce(spec.param_type, data)
+        except ValidationErrors as ex:
+            raise UnprocessableEntity(errors=ex.errors) from ex
+
+
+_JSON_SCOPE_KEY = "kupala.json"
+
+if orjson is not None:
+    _json_loads: typing.Callable[[bytes], typing.Any] = orjson.loads
+elif msgspec is not None:
+    _json_loads = msgspec.json.decode
+else:
+    _json_loads = json.loads
+
+
+async def _read_body(request: Request, max_size: int | None) -> bytes:
+    if hasattr(request, "_body"):
+        body: bytes = request._body
+        if max_size is not None and len(body) > max_size:
+            raise PayloadTooLarge()
+        return body
+
+    if max_size is not None:
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > max_size:
+            raise PayloadTooLarge()
+
+    chunks: list[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if max_size is not None and size > max_size:
+            raise PayloadTooLarge()
+        chunks.append(chunk)
+    request._body = b"".join(chunks)
+    return request._body
+
+
+async def read_json(request: Request, max_size: int | None = None) -> typing.Any:
+    """Read and decode the JSON body using the fastest available decoder (orjson, msgspec or stdlib json).
+    The decoded value is cached in the request scope."""
+    if _JSON_SCOPE_KEY not in request.scope:
+        body = await _read_body(request, max_size)
+        try:
+            request.scope[_JSON_SCOPE_KEY] = _json_loads(body)
+        except ValueError as ex:  # orjson and msgspec errors are ValueError subclasses too
+            raise BadRequest(detail="Invalid JSON body.") from ex
+    return request.scope[_JSON_SCOPE_KEY]
 
 
 class FormDataResolver(DependencyResolver):
-    async def resolve(self, spec: DependencySpec, overrides: dict[typing.Any, typing.Any]) -> typing.Any:
-        request: Request = overrides[Request]
-        body = await request.form()
-        return spec.param_type(**body)
+    """Read urlencoded or multipart form into the parameter type, usually a dataclass, TypedDict or msgspec Struct.
+    Fields are converted the same way as query parameters, see `QueryParamResolver`.
+
+    Multipart bodies of forms declaring upload fields (see `kupala.uploads.Upload`) are parsed while they are read:
+    files of these fields are written straight to the file storage and the fields receive `StoredFile` values,
+    other fields are kept in memory. Other forms are parsed by Starlette, their files are `UploadFile` values.
+    `max_field_size` limits every non-file field in bytes.
+    When an endpoint reads several forms, the streamed form is shared by all of them, so declare the form
+    with upload fields first."""
+
+    def __init__(self, *, max_field_size: int = 1024 * 1024, max_fields: int = 1000, max_files: int = 1000) -> None:
+        self.max_field_size = max_field_size
+        self.max_fields = max_fields
+        self.max_files = max_files
+
+    def prepare(self, spec: DependencySpec) -> None:
+        get_uploads(spec.param_type)
+        get_fields_reader(spec.param_type, spec.param_name)
+
+    async def resolve(self, context: ResolveContext, spec: DependencySpec) -> typing.Any:
+        request = context.connection
+        if not isinstance(request, Request):
+            raise DependencyError(f'Cannot read form for "{spec.param_name}": no HTTP request found.')
+
+        # files stored for the request, shared by all form parameters, deleted when any of them is invalid
+        stored_files: list[typing.Any] = []
+        uploads = get_uploads(spec.param_type)
+        form: typing.Any
+        if _FORM_SCOPE_KEY in request.scope:  # streamed for another parameter, the body is consumed
+            form, stored_files = request.scope[_FORM_SCOPE_KEY]
+        elif uploads and request.headers.get("content-type", "").startswith("multipart/form-data"):
+            request.scope[_FORM_SCOPE_KEY] = await stream_form(
+                request,
+                uploads,
+                max_field_size=self.max_field_size,
+                max_fields=self.max_fields,
+                max_files=self.max_files,
+            )
+            form, stored_files = request.scope[_FORM_SCOPE_KEY]
+        else:
+            form = await request.form(
+                max_files=self.max_files, max_fields=self.max_fields, max_part_size=self.max_field_size
+            )
+
+        try:
+            value = read_fields(spec.param_type, spec.param_name, form)
+            return _missing_value(spec) if value is MISSING else value
+        except ValidationErrors as ex:
+            await _discard_files(stored_files)
+            raise UnprocessableEntity(errors=ex.errors) from ex
+        except UnprocessableEntity:
+            await _discard_files(stored_files)
+            raise
+
+
+async def _discard_files(stored_files: list[typing.Any]) -> None:
+    await delete_files(stored_files)
+    stored_files.clear()  # other form parameters of the request must not delete them again
+
+
+_FORM_SCOPE_KEY = "kupala.form"
+
+
+class ConcurrentResolver(DependencyResolver):
+    """Mark the resolver as independent of others, so endpoints await it concurrently with other
+    concurrent dependencies, for example when each of them makes a network call.
+    The resolver must not read the request body or rely on the order of entered context managers.
+
+    Usage: typing.Annotated[User, ConcurrentResolver(FactoryResolver(load_user))]"""
+
+    concurrent = True
+
+    def __init__(self, resolver: DependencyResolver) -> None:
+        self.resolver = resolver
+
+    def prepare(self, spec: DependencySpec) -> None:
+        if (prepare := getattr(self.resolver, "prepare", None)) is not None:
+            prepare(spec)
+
+    async def resolve(self, context: ResolveContext, spec: DependencySpec) -> typing.Any:
+        return await self.resolver.resolve(context, spec)
@@ -8,6 +8,7 @@ from cryptography.fernet import Fernet
 from starlette_dispatch import VariableResolver
 
 from kupala.applications import AppConfig, Kupala
+from kupala.loop_monitor import check_blocking_call
 
 
 class Encryptor:
@@ -15,9 +16,11 @@ class Encryptor:
         self._fernet = Fernet(key)
 
     def encrypt(self, data: bytes) -> bytes:
+        check_blocking_call("Encryptor.encrypt", "Encryptor.aencrypt")
         return self._fernet.encrypt(data)
 
     def decrypt(self, data: bytes) -> bytes:
+        check_blocking_call("Encryptor.decrypt", "Encryptor.adecrypt")
         return self._fernet.decrypt(data)
 
     async def aencrypt(self, data: bytes) -> bytes:
@@ -103,6 +103,12 @@ class Conflict(HTTPException):
     http_code = 409
 
 
+class PayloadTooLarge(HTTPException):
+    """The request body is larger than the server is willing to process."""
+
+    http_code = 413
+
+
 class UnsupportedMediaType(HTTPException):
     """The server cannot process the request because the payload is in an unsupported format."""
 
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import logging
+import time
+import typing
+
+import anyio
+
+__all__ = [
+    "Initializer",
+    "StartupReport",
+    "run_initializers",
+]
+
+logger = logging.getLogger("kupala.startup")
+
+type InitializerFn = typing.Callable[[typing.Any], typing.AsyncContextManager[typing.Any]]
+
+
+@dataclasses.dataclass(frozen=True)
+class Initializer:
+    """Application initializer that starts after the initializers it depends on and stops before them.
+    Initializers without dependencies between them start concurrently.
+
+    Plain callables may be used as initializers too, they are named by their qualified name and start
+    one after another in declaration order: a plain callable waits for all initializers declared before it.
+    Wrap them into `Initializer` to opt into concurrent startup.
+
+    Usage:
+        Kupala(initializers=[
+            Initializer(database.initializer, name="database"),
+            Initializer(redis_initializer, name="redis"),
+            Initializer(cache_warmup, name="cache_warmup", depends_on=["database", "redis"]),
+        ])
+    """
+
+    fn: InitializerFn
+    name: str = ""
+    depends_on: typing.Sequence[str] = ()
+
+    def __call__(self, app: typing.Any) -> typing.AsyncContextManager[typing.Any]:
+        return self.fn(app)
+
+
+@dataclasses.dataclass
+class StartupReport:
+    """Startup time of every initializer in seconds, and values yielded by them in declaration order."""
+
+    timings: dict[str, float] = dataclasses.field(default_factory=dict)
+    states: list[typing.Any] = dataclasses.field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class _Runner:
+    def __init__(self, initializer: InitializerFn) -> None:
+        self.initializer = initializer
+        self.depends_on: typing.Sequence[str] = ()
+        self.ordered = not isinstance(initializer, Initializer)
+        if isinstance(initializer, Initializer):
+            self.depends_on = initializer.depends_on
+            fn: typing.Any = initializer.fn
+            self.name = initializer.name or getattr(fn, "__qualname__", repr(fn))
+        else:
+            self.name = getattr(initializer, "__qualname__", repr(initializer))
+
+        self.dependencies: list[_Runner] = []
+        self.dependents: list[_Runner] = []
+        self.started = anyio.Event()
+        self.stopped = anyio.Event()
+        self.state: typing.Any = None
+        self.elapsed = 0.0
+
+    async def run(self, app: typing.Any, shutdown: anyio.Event) -> None:
+        """Enter the initializer and exit it on shutdown, in the same task, so it may hold task groups."""
+        try:
+            for dependency in self.dependencies:
+                await dependency.started.wait()
+
+            started_at = time.perf_counter()
+            async with self.initializer(app) as state:
+                self.state = state
+                self.elapsed = time.perf_counter() - started_at
+                logger.info(
+                    "Initializer %s started in %.1f ms.",
+                    self.name,
+                    self.elapsed * 1000,
+                    extra={"initializer": self.name, "elapsed": self.elapsed},
+                )
+                self.started.set()
+
+                await shutdown.wait()
+                for dependent in self.dependents:
+                    await dependent.stopped.wait()
+        finally:
+            self.stopped.set()
+
+
+def _link(runners: list[_Runner]) -> None:
+    by_name: dict[str, list[_Runner]] = {}
+    for runner in runners:
+        by_name.setdefault(runner.name, []).append(runner)
+
+    for index, runner in enumerate(runners):
+        dependencies = runners[:index] if runner.ordered else []  # plain callables keep declaration order
+        for name in runner.depends_on:
+            if name not in by_name:
+                raise ValueError(f'Initializer "{runner.name}" depends on unknown initializer "{name}".')
+            dependencies.extend(by_name[name])
+        for dependency in dependencies:
+            runner.dependencies.append(dependency)
+            dependency.dependents.append(runner)
+
+    # Kahn's algorithm, runners left unvisited are part of a cycle
+    blocking = {runner: len(runner.dependencies) for runner in runners}
+    ready = [runner for runner, count in blocking.items() if count == 0]
+    while ready:
+        for dependent in ready.pop().dependents:
+            blocking[dependent] -= 1
+            if blocking[dependent] == 0:
+                ready.append(dependent)
+    if cycle := [runner.name for runner, count in blocking.items() if count > 0]:
+        raise ValueError("Initializers have circular dependencies: {}.".format(", ".join(cycle)))
+
+
+@contextlib.asynccontextmanager
+async def run_initializers(
+    app: typing.Any, initializers: typing.Sequence[InitializerFn]
+) -> typing.AsyncGenerator[StartupReport, None]:
+    """Enter initializers respecting their dependencies and exit them in reverse order,
+    `Initializer` instances without dependencies between them start concurrently, see `Initializer`.
+    Startup time of every initializer is logged to "kupala.startup" logger."""
+    runners = [_Runner(initializer) for initializer in initializers]
+    _link(runners)
+
+    shutdown = anyio.Event()
+    started_at = time.perf_counter()
+    try:
+        async with anyio.create_task_group() as tg:
+            for runner in runners:
+                tg.start_soon(runner.run, app, shutdown)
+            try:
+                for runner in runners:
+                    await runner.started.wait()
+                report = StartupReport(states=[runner.state for runner in runners])
+                for runner in runners:
+                    key, number = runner.name, 1
+                    while key in report.timings:  # several instances of the same initializer
+                        number += 1
+                        key = f"{runner.name}[{number}]"
+                    report.timings[key] = runner.elapsed
+                report.elapsed = time.perf_counter() - started_at
+                if runners:
+                    logger.info("Started %d initializers in %.1f ms.", len(runners), report.elapsed * 1000)
+                yield report
+            finally:
+                shutdown.set()
+    except BaseExceptionGroup as group:
+        if len(group.exceptions) == 1:  # report the failed initializer's error as is
+            raise group.exceptions[0] from None
+        raise
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+import typing
+import warnings
+
+import anyio
+
+from kupala.applications import AppConfig, Kupala
+from kupala.metrics import Counter, Histogram
+
+__all__ = [
+    "LoopMonitor",
+    "BlockingCallWarning",
+    "check_blocking_call",
+]
+
+logger = logging.getLogger("kupala.loop_monitor")
+
+event_loop_lag_seconds = Histogram(
+    "kupala_event_loop_lag_seconds",
+    "Delay between scheduled and actual wake up of the event loop heartbeat.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float("inf")),
+)
+event_loop_blocked_total = Counter(
+    "kupala_event_loop_blocked_total",
+    "Number of times the event loop was blocked longer than the threshold.",
+)
+
+_check_blocking_calls = False
+
+
+class BlockingCallWarning(RuntimeWarning):
+    """Issued when a blocking Kupala API is called from the event loop."""
+
+
+def check_blocking_call(name: str, alternative: str | None = None) -> None:
+    """Warn if a blocking function is called from the event loop thread.
+    Enabled by `LoopMonitor(debug=True)`, does nothing otherwise."""
+    if not _check_blocking_calls:
+        return
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return  # called from a worker thread or sync code
+
+    message = f"{name} blocks the event loop when called from async code."
+    if alternative:
+        message += f" Use {alternative} instead."
+    warnings.warn(message, BlockingCallWarning, stacklevel=3)
+
+
+class LoopMonitor:
+    """Measure event loop lag and report when the loop is blocked.
+
+    A heartbeat task wakes up every `interval` seconds and records how late it was woken up
+    into the "kupala_event_loop_lag_seconds" metric. A watchdog thread logs the stack of the event loop thread
+    when the heartbeat is late by more than `threshold` seconds, pointing at the code that blocks the loop.
+
+    With `debug=True`, known blocking Kupala APIs (like `Passwords.make`, `Encryptor.encrypt`
+    and `Templates.render`) issue `BlockingCallWarning` when called from async code."""
+
+    def __init__(self, *, interval: float = 0.5, threshold: float = 0.1, debug: bool = False) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self.lag = 0.0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+
+    async def heartbeat(self) -> None:
+        while True:
+            expected_at = time.monotonic() + self.interval
+            await anyio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            self.lag = max(now - expected_at, 0.0)
+            event_loop_lag_seconds.observe(self.lag)
+
+    def watch(self, stop_event: threading.Event) -> None:
+        reported_beat = 0.0
+        while not stop_event.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            blocked_for = time.monotonic() - last_beat - self.interval
+            if blocked_for > self.threshold and last_beat != reported_beat:
+                reported_beat = last_beat
+                self.report_blocked(blocked_for)
+
+    def report_blocked(self, blocked_for: float) -> None:
+        event_loop_blocked_total.inc()
+        frame = sys._current_frames().get(self._loop_thread_id or 0)
+        stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+        logger.warning(
+            "Event loop is blocked for %.0fms:\n%s",
+            blocked_for * 1000,
+            stack,
+            extra={"blocked_for": blocked_for},
+        )
+
+    @contextlib.asynccontextmanager
+    async def initializer(self, app: Kupala) -> typing.AsyncGenerator[None, None]:
+        global _check_blocking_calls
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        stop_event = threading.Event()
+        watchdog = threading.Thread(target=self.watch, args=(stop_event,), name="kupala-loop-monitor", daemon=True)
+        previous_check = _check_blocking_calls
+        _check_blocking_calls = self.debug or previous_check
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self.heartbeat)
+                watchdog.start()
+                try:
+                    yield
+                finally:
+                    tg.cancel_scope.cancel()
+        finally:
+            _check_blocking_calls = previous_check
+            stop_event.set()
+            if watchdog.is_alive():
+                watchdog.join()
+
+    @classmethod
+    def of(cls, app: Kupala) -> typing.Self:
+        return typing.cast(typing.Self, app.state.loop_monitor)
+
+    def configure_application(self, app_config: AppConfig) -> None:
+        app_config.state["loop_monitor"] = self
+        app_config.initializers.append(self.initializer)
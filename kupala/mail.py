@@ -4,6 +4,7 @@ from email.message import EmailMessage
 
 import anyio
 import click
+from anyio.to_thread import run_sync
 from mailers.encrypters import Encrypter
 from mailers.mailer import Mailer
 from mailers.message import Email, Recipients
@@ -24,6 +25,7 @@ from starlette_dispatch import VariableResolver
 
 from kupala import timezone
 from kupala.applications import AppConfig, Kupala
+from kupala.metrics import Counter
 from kupala.templating import Templates
 
 __all__ = [
@@ -46,6 +48,9 @@ __all__ = [
 ]
 
 
+mail_messages_total = Counter("kupala_mail_messages_total", "Total number of sent emails by status.", ["status"])
+
+
 class Mail:
     """Mail extension for sending emails."""
 
@@ -85,7 +90,12 @@ class Mail:
 
     async def send(self, message: typing.Union[Email, EmailMessage]) -> None:
         """Send a pre-built email message."""
-        return await self.mailer.send(message)
+        try:
+            await self.mailer.send(message)
+        except Exception:
+            mail_messages_total.labels("failed").inc()
+            raise
+        mail_messages_total.labels("sent").inc()
 
     async def send_mail(
         self,
@@ -100,7 +110,7 @@ class Mail:
         headers: dict[str, str] | None = None,
     ) -> None:
         """Send an email message to one or more recipients."""
-        return await self.mailer.send(
+        return await self.send(
             Email(
                 to=to,
                 cc=cc,
@@ -142,8 +152,14 @@ class Mail:
             },
         )
 
-        text_content: str | None = self.templates.render(text_template, template_context) if text_template else None
-        html_content: str | None = self.templates.render(html_template, template_context) if html_template else None
+        # rendering is CPU bound, keep it off the event loop
+        render = self.templates.render
+        text_content: str | None = None
+        html_content: str | None = None
+        if text_template:
+            text_content = await run_sync(render, text_template, template_context)
+        if html_template:
+            html_content = await run_sync(render, html_template, template_context)
         await self.send_mail(
             to=to,
             cc=cc,
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import typing
+
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from kupala.applications import AppConfig, Kupala
+from kupala.metrics._metrics import (
+    DEFAULT_BUCKETS,
+    Counter,
+    Gauge,
+    Histogram,
+    Metric,
+    MetricFamily,
+    MetricsRegistry,
+    Sample,
+    default_registry,
+    generate_latest,
+)
+from kupala.metrics._multiprocess import mark_process_dead
+from kupala.metrics.middleware import MetricsMiddleware
+
+__all__ = [
+    "DEFAULT_BUCKETS",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Metric",
+    "MetricFamily",
+    "Metrics",
+    "MetricsMiddleware",
+    "MetricsRegistry",
+    "Sample",
+    "default_registry",
+    "generate_latest",
+    "mark_process_dead",
+]
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metrics:
+    """Metrics extension. Adds request metrics middleware and the route serving metrics in Prometheus text format.
+
+    Set `multiprocess_dir` (or KUPALA_METRICS_DIR environment variable) to aggregate metrics of multiple workers."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry | None = None,
+        *,
+        path: str | None = "/metrics",
+        multiprocess_dir: str | None = None,
+        track_requests: bool = True,
+    ) -> None:
+        self.registry = registry or default_registry
+        self.path = path
+        self.track_requests = track_requests
+        if multiprocess_dir:
+            self.registry.configure_multiprocess(multiprocess_dir)
+
+    async def endpoint(self, request: Request) -> Response:
+        return Response(self.registry.generate_latest(), media_type=CONTENT_TYPE)
+
+    def route(self, path: str = "/metrics") -> Route:
+        """Create route serving metrics, for mounting it manually."""
+        return Route(path, self.endpoint, name="metrics")
+
+    @classmethod
+    def of(cls, app: Kupala) -> typing.Self:
+        return typing.cast(typing.Self, app.state.metrics)
+
+    def configure_application(self, app_config: AppConfig) -> None:
+        app_config.state["metrics"] = self
+        if self.path:
+            app_config.routes.append(self.route(self.path))
+        if self.track_requests:
+            app_config.middleware.insert(0, Middleware(MetricsMiddleware))
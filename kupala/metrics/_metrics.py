@@ -0,0 +1,463 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import dataclasses
+import json
+import math
+import os
+import threading
+import time
+import typing
+
+from kupala.metrics._multiprocess import MmapDict, read_multiprocess_samples
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0, math.inf)
+GAUGE_MODES = ("all", "sum", "max", "min")
+
+
+@dataclasses.dataclass(slots=True)
+class Sample:
+    name: str
+    labels: dict[str, str]
+    value: float
+
+
+@dataclasses.dataclass(slots=True)
+class MetricFamily:
+    name: str
+    type: str
+    documentation: str
+    samples: list[Sample] = dataclasses.field(default_factory=list)
+
+
+class Storage(typing.Protocol):
+    def inc(self, key: str, amount: float) -> None: ...
+
+    def set(self, key: str, value: float) -> None: ...
+
+    def get(self, key: str) -> float: ...
+
+    def items(self) -> typing.Iterable[tuple[str, float]]: ...
+
+
+class MemoryStorage:
+    def __init__(self) -> None:
+        self._values: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key: str, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, key: str, value: float) -> None:
+        self._values[key] = value
+
+    def get(self, key: str) -> float:
+        return self._values.get(key, 0.0)
+
+    def items(self) -> typing.Iterable[tuple[str, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+
+class MmapStorage:
+    """Storage backed by per-process mmap file, shared by all metrics of the same type."""
+
+    def __init__(self, path: str) -> None:
+        self._dict = MmapDict(path)
+        self._lock = threading.Lock()
+
+    def inc(self, key: str, amount: float) -> None:
+        with self._lock:
+            self._dict.write_value(key, self._dict.read_value(key) + amount)
+
+    def set(self, key: str, value: float) -> None:
+        with self._lock:
+            self._dict.write_value(key, value)
+
+    def get(self, key: str) -> float:
+        with self._lock:
+            return self._dict.read_value(key)
+
+    def items(self) -> typing.Iterable[tuple[str, float]]:
+        with self._lock:
+            return list(self._dict.read_all_values())
+
+    def close(self) -> None:
+        self._dict.close()
+
+
+def make_key(metric_name: str, sample_name: str, labels: typing.Mapping[str, str], documentation: str) -> str:
+    return json.dumps([metric_name, sample_name, dict(labels), documentation], sort_keys=True)
+
+
+def parse_key(key: str) -> tuple[str, str, dict[str, str], str]:
+    metric_name, sample_name, labels, documentation = json.loads(key)
+    return metric_name, sample_name, labels, documentation
+
+
+class MetricsRegistry:
+    """Collection of metrics exposed together.
+
+    In multiprocess mode values are written into mmap files in `multiprocess_dir` (one per process and metric type),
+    and collection reads and aggregates files of all processes. Configure the directory before metrics are used
+    and clean it up before starting the workers."""
+
+    def __init__(self, multiprocess_dir: str | os.PathLike[str] | None = None) -> None:
+        self.multiprocess_dir = os.fspath(multiprocess_dir) if multiprocess_dir else None
+        self._metrics: dict[str, Metric] = {}
+        self._storages: dict[str, MmapStorage] = {}
+        self._lock = threading.Lock()
+
+    def configure_multiprocess(self, directory: str | os.PathLike[str] | None) -> None:
+        self.multiprocess_dir = os.fspath(directory) if directory else None
+
+    def register(self, metric: Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics[metric.name] = metric
+
+    def unregister(self, metric: Metric) -> None:
+        with self._lock:
+            self._metrics.pop(metric.name, None)
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+    def create_storage(self, metric: Metric) -> Storage:
+        if self.multiprocess_dir is None:
+            return MemoryStorage()
+
+        file_type = metric.type if metric.type != "gauge" else f"gauge_{typing.cast(Gauge, metric).multiprocess_mode}"
+        path = os.path.join(self.multiprocess_dir, f"{file_type}_{os.getpid()}.db")
+        with self._lock:
+            if path not in self._storages:
+                self._storages[path] = MmapStorage(path)
+            return self._storages[path]
+
+    def collect(self) -> list[MetricFamily]:
+        if self.multiprocess_dir is not None:
+            return self._collect_multiprocess(self.multiprocess_dir)
+
+        families = []
+        for metric in list(self._metrics.values()):
+            family = MetricFamily(metric.name, metric.type, metric.documentation)
+            for key, value in metric.storage_items():
+                _, sample_name, labels, _ = parse_key(key)
+                family.samples.append(Sample(sample_name, labels, value))
+            families.append(_finalize_family(family))
+        return families
+
+    def _collect_multiprocess(self, directory: str) -> list[MetricFamily]:
+        families: dict[str, MetricFamily] = {}
+        values: dict[str, dict[tuple[str, tuple[tuple[str, str], ...]], float]] = {}
+        for file_type, pid, key, value in read_multiprocess_samples(directory):
+            metric_name, sample_name, labels, documentation = parse_key(key)
+            metric_type, _, mode = file_type.partition("_")
+            if metric_name not in families:
+                families[metric_name] = MetricFamily(metric_name, metric_type, documentation)
+                values[metric_name] = {}
+
+            if mode == "all":
+                labels = {**labels, "pid": pid}
+            sample_key = (sample_name, tuple(sorted(labels.items())))
+            samples = values[metric_name]
+            if sample_key not in samples:
+                samples[sample_key] = value
+            elif mode == "max":
+                samples[sample_key] = max(samples[sample_key], value)
+            elif mode == "min":
+                samples[sample_key] = min(samples[sample_key], value)
+            else:
+                samples[sample_key] += value
+
+        for metric_name, family in families.items():
+            for (sample_name, labels_items), value in values[metric_name].items():
+                family.samples.append(Sample(sample_name, dict(labels_items), value))
+            _finalize_family(family)
+        return list(families.values())
+
+    def generate_latest(self) -> bytes:
+        """Render metrics in Prometheus text exposition format."""
+        return generate_latest(self.collect())
+
+
+def _finalize_family(family: MetricFamily) -> MetricFamily:
+    """Convert stored histogram bucket counters into cumulative buckets with _count sample."""
+    if family.type != "histogram":
+        family.samples.sort(key=lambda sample: (sample.name, sorted(sample.labels.items())))
+        return family
+
+    groups: dict[tuple[tuple[str, str], ...], list[Sample]] = {}
+    sums: dict[tuple[tuple[str, str], ...], float] = {}
+    for sample in family.samples:
+        if sample.name.endswith("_bucket"):
+            series = tuple(sorted((k, v) for k, v in sample.labels.items() if k != "le"))
+            groups.setdefault(series, []).append(sample)
+        else:
+            sums[tuple(sorted(sample.labels.items()))] = sample.value
+
+    samples: list[Sample] = []
+    for series in sorted(groups):
+        total = 0.0
+        for sample in sorted(groups[series], key=lambda item: float(item.labels["le"])):
+            total += sample.value
+            samples.append(Sample(family.name + "_bucket", sample.labels, total))
+        samples.append(Sample(family.name + "_count", dict(series), total))
+        samples.append(Sample(family.name + "_sum", dict(series), sums.get(series, 0.0)))
+    family.samples = samples
+    return family
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def generate_latest(families: typing.Iterable[MetricFamily]) -> bytes:
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {_escape(family.documentation)}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for sample in family.samples:
+            labels = ""
+            if sample.labels:
+                labels = "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in sample.labels.items()) + "}"
+            lines.append(f"{sample.name}{labels} {_format_value(sample.value)}")
+    return ("\n".join(lines) + "\n").encode() if lines else b""
+
+
+default_registry = MetricsRegistry(os.environ.get("KUPALA_METRICS_DIR"))
+
+
+class Metric:
+    type: typing.ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        *,
+        registry: MetricsRegistry | None = default_registry,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._registry = registry or MetricsRegistry()
+        self._storage: Storage | None = None
+        self._children: dict[tuple[str, ...], typing.Any] = {}
+        self._lock = threading.RLock()
+        if registry is not None:
+            registry.register(self)
+
+    @property
+    def storage(self) -> Storage:
+        if self._storage is None:
+            with self._lock:
+                if self._storage is None:
+                    self._storage = self._registry.create_storage(self)
+        return self._storage
+
+    def storage_items(self) -> typing.Iterable[tuple[str, float]]:
+        if self._storage is None:
+            return []
+        return [(key, value) for key, value in self._storage.items() if parse_key(key)[0] == self.name]
+
+    def _get_child(self, labelvalues: tuple[str, ...]) -> typing.Any:
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(
+                    labelvalues, self._create_child(dict(zip(self.labelnames, labelvalues)))
+                )
+        return child
+
+    def _create_child(self, labels: dict[str, str]) -> typing.Any:  # pragma: no cover
+        raise NotImplementedError
+
+    def _default_child(self) -> typing.Any:
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} has labels, use .labels() to get a child.")
+        return self._get_child(())
+
+    def _labelvalues(self, values: tuple[typing.Any, ...], kwargs: dict[str, typing.Any]) -> tuple[str, ...]:
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}.")
+        return tuple(str(value) for value in values)
+
+    def _key(self, sample_name: str, labels: typing.Mapping[str, str]) -> str:
+        return make_key(self.name, sample_name, labels, self.documentation)
+
+
+class _CounterChild:
+    def __init__(self, storage: Storage, key: str) -> None:
+        self._storage = storage
+        self._key = key
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented.")
+        self._storage.inc(self._key, amount)
+
+    def get(self) -> float:
+        return self._storage.get(self._key)
+
+
+class Counter(Metric):
+    """Monotonically increasing value, like number of requests."""
+
+    type = "counter"
+
+    def labels(self, *values: typing.Any, **kwargs: typing.Any) -> _CounterChild:
+        return typing.cast(_CounterChild, self._get_child(self._labelvalues(values, kwargs)))
+
+    def _create_child(self, labels: dict[str, str]) -> _CounterChild:
+        return _CounterChild(self.storage, self._key(self.name, labels))
+
+    def inc(self, amount: float = 1) -> None:
+        self._default_child().inc(amount)
+
+    def get(self) -> float:
+        return typing.cast(float, self._default_child().get())
+
+
+class _GaugeChild:
+    def __init__(self, storage: Storage, key: str) -> None:
+        self._storage = storage
+        self._key = key
+
+    def inc(self, amount: float = 1) -> None:
+        self._storage.inc(self._key, amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._storage.inc(self._key, -amount)
+
+    def set(self, value: float) -> None:
+        self._storage.set(self._key, value)
+
+    def get(self) -> float:
+        return self._storage.get(self._key)
+
+    @contextlib.contextmanager
+    def track_inprogress(self) -> typing.Generator[None]:
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Gauge(Metric):
+    """Value that can go up and down, like number of requests in progress.
+
+    `multiprocess_mode` defines how values of processes are aggregated: "all" (labelled by pid), "sum", "max", "min"."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        *,
+        registry: MetricsRegistry | None = default_registry,
+        multiprocess_mode: typing.Literal["all", "sum", "max", "min"] = "all",
+    ) -> None:
+        assert multiprocess_mode in GAUGE_MODES, f"Unsupported multiprocess mode: {multiprocess_mode}."
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(name, documentation, labelnames, registry=registry)
+
+    def labels(self, *values: typing.Any, **kwargs: typing.Any) -> _GaugeChild:
+        return typing.cast(_GaugeChild, self._get_child(self._labelvalues(values, kwargs)))
+
+    def _create_child(self, labels: dict[str, str]) -> _GaugeChild:
+        return _GaugeChild(self.storage, self._key(self.name, labels))
+
+    def inc(self, amount: float = 1) -> None:
+        self._default_child().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default_child().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default_child().set(value)
+
+    def get(self) -> float:
+        return typing.cast(float, self._default_child().get())
+
+    def track_inprogress(self) -> typing.ContextManager[None]:
+        return typing.cast(typing.ContextManager[None], self._default_child().track_inprogress())
+
+
+class _HistogramChild:
+    def __init__(self, storage: Storage, upper_bounds: tuple[float, ...], bucket_keys: list[str], sum_key: str) -> None:
+        self._storage = storage
+        self._upper_bounds = upper_bounds
+        self._bucket_keys = bucket_keys
+        self._sum_key = sum_key
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._upper_bounds, value)
+        self._storage.inc(self._bucket_keys[index], 1)
+        self._storage.inc(self._sum_key, value)
+
+    @contextlib.contextmanager
+    def time(self) -> typing.Generator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in configurable buckets, like request duration."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        *,
+        registry: MetricsRegistry | None = default_registry,
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        upper_bounds = sorted(float(bucket) for bucket in buckets)
+        if upper_bounds[-1] != math.inf:
+            upper_bounds.append(math.inf)
+        self.upper_bounds = tuple(upper_bounds)
+        super().__init__(name, documentation, labelnames, registry=registry)
+
+    def labels(self, *values: typing.Any, **kwargs: typing.Any) -> _HistogramChild:
+        return typing.cast(_HistogramChild, self._get_child(self._labelvalues(values, kwargs)))
+
+    def _create_child(self, labels: dict[str, str]) -> _HistogramChild:
+        bucket_keys = [
+            self._key(self.name + "_bucket", {**labels, "le": _format_value(bound)}) for bound in self.upper_bounds
+        ]
+        sum_key = self._key(self.name + "_sum", labels)
+        for key in [*bucket_keys, sum_key]:  # all buckets must be exposed, even empty ones
+            self.storage.inc(key, 0)
+        return _HistogramChild(self.storage, self.upper_bounds, bucket_keys, sum_key)
+
+    def observe(self, value: float) -> None:
+        self._default_child().observe(value)
+
+    def time(self) -> typing.ContextManager[None]:
+        return typing.cast(typing.ContextManager[None], self._default_child().time())
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import glob
+import mmap
+import os
+import struct
+import typing
+
+_INITIAL_SIZE = 1024 * 1024
+_HEADER = struct.Struct("i")  # number of used bytes, padded to 8 bytes
+_KEY_LENGTH = struct.Struct("i")
+_VALUE = struct.Struct("d")
+
+
+def _entry_size(encoded_key: bytes) -> int:
+    # key length + key padded so the value is 8-byte aligned + value
+    size = _KEY_LENGTH.size + len(encoded_key)
+    return size + (8 - size % 8) % 8 + _VALUE.size
+
+
+def _iter_entries(data: typing.Any, used: int) -> typing.Iterator[tuple[str, float, int]]:
+    position = 8
+    while position < used:
+        (key_length,) = _KEY_LENGTH.unpack_from(data, position)
+        key_end = position + _KEY_LENGTH.size + key_length
+        key = bytes(data[position + _KEY_LENGTH.size : key_end]).decode()
+        value_position = key_end + (8 - key_end % 8) % 8
+        (value,) = _VALUE.unpack_from(data, value_position)
+        yield key, value, value_position
+        position = value_position + _VALUE.size
+
+
+class MmapDict:
+    """Append-only key to float mapping stored in a memory mapped file.
+
+    Written by a single process, values are 8-byte aligned so readers never see torn writes."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "a+b")  # noqa: SIM115, closed by close()
+        capacity = os.fstat(self._file.fileno()).st_size
+        if capacity == 0:
+            self._file.truncate(_INITIAL_SIZE)
+            capacity = _INITIAL_SIZE
+        self._capacity = capacity
+        self._mmap = mmap.mmap(self._file.fileno(), capacity, access=mmap.ACCESS_WRITE)
+        self._positions: dict[str, int] = {}
+
+        self._used: int = _HEADER.unpack_from(self._mmap, 0)[0]
+        if self._used == 0:
+            self._used = 8
+            _HEADER.pack_into(self._mmap, 0, self._used)
+        else:
+            for key, _, position in _iter_entries(self._mmap, self._used):
+                self._positions[key] = position
+
+    def _init_value(self, key: str) -> int:
+        encoded_key = key.encode()
+        size = _entry_size(encoded_key)
+        if self._used + size > self._capacity:
+            while self._used + size > self._capacity:
+                self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), self._capacity, access=mmap.ACCESS_WRITE)
+
+        position = self._used
+        _KEY_LENGTH.pack_into(self._mmap, position, len(encoded_key))
+        self._mmap[position + _KEY_LENGTH.size : position + _KEY_LENGTH.size + len(encoded_key)] = encoded_key
+        value_position = position + size - _VALUE.size
+        _VALUE.pack_into(self._mmap, value_position, 0.0)
+
+        self._used += size
+        _HEADER.pack_into(self._mmap, 0, self._used)
+        self._positions[key] = value_position
+        return value_position
+
+    def read_value(self, key: str) -> float:
+        position = self._positions.get(key)
+        if position is None:
+            return 0.0
+        return typing.cast(float, _VALUE.unpack_from(self._mmap, position)[0])
+
+    def write_value(self, key: str, value: float) -> None:
+        position = self._positions.get(key)
+        if position is None:
+            position = self._init_value(key)
+        _VALUE.pack_into(self._mmap, position, value)
+
+    def read_all_values(self) -> typing.Iterator[tuple[str, float]]:
+        for key, value, _ in _iter_entries(self._mmap, self._used):
+            yield key, value
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+
+def read_mmap_file(path: str) -> typing.Iterator[tuple[str, float]]:
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 8:
+        return
+    (used,) = _HEADER.unpack_from(data, 0)
+    for key, value, _ in _iter_entries(data, used):
+        yield key, value
+
+
+def read_multiprocess_samples(directory: str) -> typing.Iterator[tuple[str, str, str, float]]:
+    """Yield (file type, pid, key, value) from all metric files in the directory."""
+    for path in sorted(glob.glob(os.path.join(directory, "*.db"))):
+        file_type, _, pid = os.path.basename(path).removesuffix(".db").rpartition("_")
+        for key, value in read_mmap_file(path):
+            yield file_type, pid, key, value
+
+
+def mark_process_dead(directory: str | os.PathLike[str], pid: int | None = None) -> None:
+    """Remove gauge files of the dead worker process, so its live values are not reported anymore.
+    Counters and histograms are kept, their totals must not go down."""
+    pid = pid or os.getpid()
+    for path in glob.glob(os.path.join(os.fspath(directory), f"gauge_*_{pid}.db")):
+        os.remove(path)
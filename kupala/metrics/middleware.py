@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from kupala.metrics._metrics import Counter, Gauge, Histogram
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+http_requests_total = Counter(
+    "kupala_http_requests_total",
+    "Total number of HTTP requests by route template and status.",
+    ["method", "route", "status"],
+)
+http_request_duration_seconds = Histogram(
+    "kupala_http_request_duration_seconds",
+    "HTTP request duration by route template.",
+    ["method", "route"],
+)
+http_requests_in_progress = Gauge(
+    "kupala_http_requests_in_progress",
+    "Number of HTTP requests being processed.",
+    multiprocess_mode="sum",
+)
+
+
+class MetricsMiddleware:
+    """Track number, duration and status of HTTP requests.
+
+    Requests are labelled by route path template (like "/users/{id}") that Kupala router stores in the scope,
+    requests that did not match any route are labelled as "<unmatched>"."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress.dec()
+            route = scope.get("route_template", UNMATCHED_ROUTE)
+            http_request_duration_seconds.labels(scope["method"], route).observe(time.perf_counter() - started_at)
+            http_requests_total.labels(scope["method"], route, status_code).inc()
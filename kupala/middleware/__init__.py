@@ -7,10 +7,15 @@ from starlette.middleware.gzip import GZipMiddleware
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 
+from kupala.middleware.compression import CompressionMiddleware
+from kupala.middleware.concurrency import ConcurrencyLimitMiddleware
 from kupala.middleware.csrf import CSRFMiddleware
 from kupala.middleware.method_override import MethodOverrideMiddleware
+from kupala.middleware.profiler import ProfilerMiddleware
+from kupala.middleware.rate_limit import RateLimitMiddleware
 from kupala.middleware.request_id import RequestIDMiddleware
 from kupala.middleware.request_limit import RequestLimitMiddleware
+from kupala.middleware.server_timing import ServerTimingMiddleware
 from kupala.middleware.timeout import TimeoutMiddleware
 
 __all__ = [
@@ -25,4 +30,9 @@ __all__ = [
     "TrustedHostMiddleware",
     "HTTPSRedirectMiddleware",
     "RequestIDMiddleware",
+    "ConcurrencyLimitMiddleware",
+    "ServerTimingMiddleware",
+    "ProfilerMiddleware",
+    "CompressionMiddleware",
+    "RateLimitMiddleware",
 ]
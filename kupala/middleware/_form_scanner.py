@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import typing
+from urllib.parse import unquote_plus
+
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, QuerystringParser, parse_options_header
+from starlette.types import Message, Receive, Scope
+
+from kupala.requests import get_header
+
+URLENCODED_CONTENT_TYPE = b"application/x-www-form-urlencoded"
+MULTIPART_CONTENT_TYPE = b"multipart/form-data"
+
+
+class FormFieldScanner:
+    """Push parser that looks for a single non-file field in urlencoded or multipart body.
+
+    Feed body chunks until `found` is set. Other fields and files are skipped without buffering."""
+
+    def __init__(self, content_type: bytes, field_name: str) -> None:
+        self.field_name = field_name
+        self.value: str | None = None
+        self.found = False
+        self.failed = False
+
+        self._name = bytearray()
+        self._data = bytearray()
+        self._capture: bool | None = None
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+
+        media_type, options = parse_options_header(content_type)
+        self._parser: QuerystringParser | MultipartParser | None = None
+        if media_type == URLENCODED_CONTENT_TYPE:
+            self._parser = QuerystringParser(
+                {
+                    "on_field_start": self._on_start,
+                    "on_field_name": self._on_field_name,
+                    "on_field_data": self._on_field_data,
+                    "on_field_end": self._on_field_end,
+                }
+            )
+        elif media_type == MULTIPART_CONTENT_TYPE and b"boundary" in options:
+            self._parser = MultipartParser(
+                options[b"boundary"],
+                {
+                    "on_part_begin": self._on_start,
+                    "on_header_field": self._on_header_field,
+                    "on_header_value": self._on_header_value,
+                    "on_header_end": self._on_header_end,
+                    "on_part_data": self._on_part_data,
+                    "on_part_end": self._on_part_end,
+                },
+            )
+        else:
+            self.failed = True
+
+    @property
+    def done(self) -> bool:
+        return self.found or self.failed
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done or not chunk:
+            return
+        try:
+            typing.cast(QuerystringParser | MultipartParser, self._parser).write(chunk)
+        except FormParserError:
+            self.failed = True
+
+    def finalize(self) -> None:
+        if self.done:
+            return
+        try:
+            typing.cast(QuerystringParser | MultipartParser, self._parser).finalize()
+        except FormParserError:
+            self.failed = True
+        self.failed = not self.found
+
+    def _on_start(self) -> None:
+        self._name.clear()
+        self._data.clear()
+        self._capture = None
+
+    # urlencoded callbacks
+    def _on_field_name(self, data: bytes, start: int, end: int) -> None:
+        self._name.extend(data[start:end])
+
+    def _on_field_data(self, data: bytes, start: int, end: int) -> None:
+        if self._capture is None:
+            self._capture = unquote_plus(self._name.decode("latin-1")) == self.field_name
+        if self._capture:
+            self._data.extend(data[start:end])
+
+    def _on_field_end(self) -> None:
+        if not self.found and unquote_plus(self._name.decode("latin-1")) == self.field_name:
+            self.value = unquote_plus(self._data.decode("latin-1"))
+            self.found = True
+
+    # multipart callbacks
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field.extend(data[start:end])
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value.extend(data[start:end])
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b"content-disposition":
+            _, options = parse_options_header(bytes(self._header_value))
+            self._capture = options.get(b"name") == self.field_name.encode() and b"filename" not in options
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._capture:
+            self._data.extend(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._capture and not self.found:
+            self.value = self._data.decode("utf-8", errors="replace")
+            self.found = True
+
+
+def replay_receive(messages: list[Message], receive: Receive) -> Receive:
+    """Return receive callable that returns buffered messages first, then reads from the original one."""
+
+    async def wrapper() -> Message:
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return wrapper
+
+
+async def scan_form_field(
+    scope: Scope, receive: Receive, field_name: str, *, max_size: int
+) -> tuple[str | None, Receive]:
+    """Read request body until the form field is found and return its value.
+
+    Only urlencoded and multipart bodies are inspected, and at most `max_size` bytes of them.
+    Returns the field value (or None) and a receive callable that replays consumed body to the downstream app."""
+    scanner = FormFieldScanner(get_header(scope, b"content-type") or b"", field_name)
+    if scanner.done:
+        return None, receive
+
+    messages: list[Message] = []
+    consumed = 0
+    while not scanner.done and consumed < max_size:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+
+        body = message.get("body", b"")
+        scanner.feed(body[: max_size - consumed])
+        consumed += len(body)
+        if not message.get("more_body", False) and consumed <= max_size:
+            scanner.finalize()
+            break
+
+    return scanner.value, replay_receive(messages, receive)
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import functools
+import importlib
+import types
+import typing
+import zlib
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from kupala.requests import get_header, match_path_prefix, parse_accept_encoding
+
+brotli: types.ModuleType | None
+try:
+    brotli = importlib.import_module("brotli")
+except ImportError:  # pragma: no cover
+    brotli = None
+
+zstandard: types.ModuleType | None
+try:
+    zstandard = importlib.import_module("zstandard")
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+__all__ = ["CompressionMiddleware", "DEFAULT_LEVELS"]
+
+DEFAULT_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+UNCOMPRESSIBLE_MEDIA_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "font/woff",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/x-brotli",
+    "application/pdf",
+    "application/octet-stream",
+    "text/event-stream",
+)
+COMPRESSIBLE_IMAGE_TYPES = ("image/svg+xml", "image/x-icon", "image/bmp")
+
+
+def is_compressible_media_type(media_type: str) -> bool:
+    media_type = media_type.partition(";")[0].strip().lower()
+    if media_type in COMPRESSIBLE_IMAGE_TYPES:
+        return True
+    return not media_type.startswith(UNCOMPRESSIBLE_MEDIA_TYPES)
+
+
+def get_available_encodings() -> list[str]:
+    return [
+        encoding
+        for encoding, available in (("br", brotli is not None), ("zstd", zstandard is not None), ("gzip", True))
+        if available
+    ]
+
+
+@functools.lru_cache(maxsize=256)
+def select_encoding(accept_encoding: str, encodings: tuple[str, ...]) -> str | None:
+    """Select the best content coding accepted by the client.
+    Client quality wins, the server preference (order of `encodings`) breaks ties."""
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+@functools.lru_cache(maxsize=32)
+def _get_zstd_compressor(level: int) -> typing.Any:
+    assert zstandard is not None
+    return zstandard.ZstdCompressor(level=level)
+
+
+def compress(encoding: str, level: int, data: bytes) -> bytes:
+    """Compress the whole body at once."""
+    if encoding == "br":
+        assert brotli is not None
+        return typing.cast(bytes, brotli.compress(data, quality=level))
+    if encoding == "zstd":
+        # shared compressor is safe here because the call is synchronous
+        return typing.cast(bytes, _get_zstd_compressor(level).compress(data))
+    return zlib.compress(data, level, wbits=31)
+
+
+class StreamCompressor:
+    """Incremental compressor, each chunk is flushed so the client receives data without waiting for the end."""
+
+    def __init__(self, encoding: str, level: int) -> None:
+        self.encoding = encoding
+        self._compressor: typing.Any
+        if encoding == "br":
+            assert brotli is not None
+            self._compressor = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            # compression objects of the same ZstdCompressor share its context, so streams need own compressors
+            assert zstandard is not None
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        if self.encoding == "br":
+            return typing.cast(
+                bytes,
+                self._compressor.process(data) + (self._compressor.flush() if more else self._compressor.finish()),
+            )
+        if self.encoding == "zstd":
+            assert zstandard is not None
+            flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK if more else zstandard.COMPRESSOBJ_FLUSH_FINISH
+            return typing.cast(bytes, self._compressor.compress(data) + self._compressor.flush(flush_mode))
+        compressed = self._compressor.compress(data)
+        return typing.cast(bytes, compressed + self._compressor.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH))
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli, zstd or gzip, whatever is the best accepted by the client.
+
+    Brotli and zstd require `brotli` and `zstandard` packages, gzip is always available.
+    Responses smaller than `minimum_size`, already encoded responses and responses
+    of already compressed media types (images, video, archives) are sent as is.
+    Streaming responses are compressed chunk by chunk.
+
+    `levels` sets compression level per encoding, `path_levels` overrides them for routes
+    by the longest matching path prefix, None disables compression for the prefix."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 500,
+        encodings: typing.Sequence[str] | None = None,
+        levels: typing.Mapping[str, int] | None = None,
+        path_levels: typing.Mapping[str, typing.Mapping[str, int] | None] | None = None,
+    ) -> None:
+        available = get_available_encodings()
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = tuple(encoding for encoding in encodings or available if encoding in available)
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+        self.path_levels = sorted(
+            (
+                (prefix, None if value is None else {**self.levels, **value})
+                for prefix, value in (path_levels or {}).items()
+            ),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+
+    def get_levels(self, scope: Scope) -> dict[str, int] | None:
+        path = scope["path"]
+        for prefix, levels in self.path_levels:
+            if match_path_prefix(path, prefix):
+                return levels
+        return self.levels
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = get_header(scope, b"accept-encoding")
+        encoding = select_encoding(accept_encoding.decode("latin-1"), self.encodings) if accept_encoding else None
+        levels = self.get_levels(scope) if encoding else None
+        if encoding is None or levels is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, levels[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.compressor: StreamCompressor | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.start_message = message
+            headers = MutableHeaders(raw=list(message.get("headers", [])))
+            if (
+                "content-encoding" in headers
+                or "content-range" in headers  # compressing would break byte ranges
+                or message["status"] == 206
+                or not is_compressible_media_type(headers.get("content-type", ""))
+            ):
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message_type != "http.response.body":
+            # like zero-copy "http.response.pathsend", the body is not available for compression
+            assert self.start_message is not None
+            self.passthrough = True
+            await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self.compressor is None:
+            assert self.start_message is not None
+            headers = MutableHeaders(raw=list(self.start_message.get("headers", [])))
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body and len(body) < self.minimum_size:
+                await self._send({**self.start_message, "headers": headers.raw})
+                await self._send(message)
+                return
+
+            headers["content-encoding"] = self.encoding
+            if not more_body:
+                body = compress(self.encoding, self.level, body)
+                headers["content-length"] = str(len(body))
+                await self._send({**self.start_message, "headers": headers.raw})
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            del headers["content-length"]
+            self.compressor = StreamCompressor(self.encoding, self.level)
+            await self._send({**self.start_message, "headers": headers.raw})
+
+        await self._send(
+            {"type": "http.response.body", "body": self.compressor.compress(body, more_body), "more_body": more_body}
+        )
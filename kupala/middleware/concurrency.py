@@ -0,0 +1,117 @@
+import collections
+import contextlib
+import typing
+
+import anyio
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from kupala.requests import get_header, match_path_prefix
+
+PRIORITY_EXEMPT = "exempt"
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+
+
+class ConcurrencyLimitMiddleware:
+    """Limit number of requests processed by the worker at the same time.
+
+    Requests above `max_concurrency` wait in a queue (up to `max_queue_size` per priority class)
+    for at most `queue_timeout` seconds. When the queue is full or the wait times out,
+    503 response with Retry-After header is returned immediately.
+
+    Every request gets a priority class, by the longest matching path prefix from `priority_paths`,
+    then by the presence of a header from `priority_headers`, otherwise "normal".
+    "exempt" requests (health checks) bypass the limiter, "high" requests (for example, with session cookie)
+    may use `reserved_slots` which "normal" traffic cannot take. Other classes are limited like "normal" requests
+    but get own queues. Override `get_priority` for custom rules.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int = 100,
+        *,
+        max_queue_size: int = 100,
+        queue_timeout: float = 5,
+        reserved_slots: int = 0,
+        priority_paths: typing.Mapping[str, str] | None = None,
+        priority_headers: typing.Mapping[str, str] | None = None,
+        retry_after: int = 1,
+    ) -> None:
+        assert 0 <= reserved_slots < max_concurrency, "reserved_slots must be less than max_concurrency."
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.priority_paths = sorted((priority_paths or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.priority_headers = {key.lower().encode(): value for key, value in (priority_headers or {}).items()}
+
+        self.active = 0
+        self.waiting: collections.defaultdict[str, int] = collections.defaultdict(int)
+        self._slots = anyio.Semaphore(max_concurrency)
+        self._normal_slots = anyio.Semaphore(max_concurrency - reserved_slots)
+
+    def get_priority(self, scope: Scope) -> str:
+        path = scope["path"]
+        for prefix, priority in self.priority_paths:
+            if match_path_prefix(path, prefix):
+                return priority
+
+        for name, priority in self.priority_headers.items():
+            if get_header(scope, name) is not None:
+                return priority
+        return PRIORITY_NORMAL
+
+    async def acquire(self, priority: str, stack: contextlib.AsyncExitStack) -> bool:
+        """Take processing slots for the request. Returns False if the request has to be rejected."""
+        pending = [self._slots] if priority == PRIORITY_HIGH else [self._normal_slots, self._slots]
+        while pending:
+            try:
+                pending[0].acquire_nowait()
+            except anyio.WouldBlock:
+                break
+            stack.callback(pending.pop(0).release)
+
+        if not pending:
+            return True
+
+        if self.waiting[priority] >= self.max_queue_size:
+            return False
+
+        self.waiting[priority] += 1
+        try:
+            with anyio.move_on_after(self.queue_timeout):
+                for semaphore in pending:
+                    await semaphore.acquire()
+                    stack.callback(semaphore.release)
+                return True
+            return False
+        finally:
+            self.waiting[priority] -= 1
+
+    def unavailable_response(self) -> PlainTextResponse:
+        return PlainTextResponse("Service Unavailable", status_code=503, headers={"retry-after": str(self.retry_after)})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.get_priority(scope)
+        if priority == PRIORITY_EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        async with contextlib.AsyncExitStack() as stack:
+            if not await self.acquire(priority, stack):
+                response = self.unavailable_response()
+                await response(scope, receive, send)
+                return
+
+            self.active += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.active -= 1
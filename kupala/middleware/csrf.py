@@ -1,12 +1,15 @@
+import functools
 import hashlib
 import hmac
 import os
 import typing
 from itsdangerous import BadData, SignatureExpired, URLSafeTimedSerializer
+from starlette.datastructures import URL, QueryParams
 from starlette.types import ASGIApp, Receive, Scope, Send
 
 from kupala.exceptions import NotAuthorized
-from kupala.requests import Request, is_submitted
+from kupala.middleware._form_scanner import scan_form_field
+from kupala.requests import HTTPConnection, Request, get_header
 
 CSRF_SESSION_KEY = "_csrf_token"
 CSRF_HEADER = "x-csrf-token"
@@ -42,6 +45,11 @@ def generate_token(secret_key: str, data: str) -> str:
     return hmac.new(secret_key.encode(), data.encode(), "sha256").hexdigest()
 
 
+@functools.lru_cache(maxsize=32)
+def _get_serializer(secret_key: str, salt: str) -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(secret_key, salt=salt)
+
+
 def validate_csrf_token(
     session_token: str,
     timed_token: str,
@@ -53,8 +61,7 @@ def validate_csrf_token(
         raise TokenMissingError("CSRF token is missing.")
 
     try:
-        serializer = URLSafeTimedSerializer(secret_key, salt=salt)
-        raw_token = serializer.loads(timed_token, max_age=max_age)
+        raw_token = _get_serializer(secret_key, salt).loads(timed_token, max_age=max_age)
     except SignatureExpired:
         raise TokenExpiredError("CSRF token has expired.")
     except BadData:
@@ -65,7 +72,26 @@ def validate_csrf_token(
     return True
 
 
+class _CSRFState(dict[str, typing.Any]):
+    """Request state that signs the timed token on the first `request.state.csrf_timed_token` access."""
+
+    def __missing__(self, key: str) -> typing.Any:
+        if key == "csrf_timed_token" and (factory := self.get("csrf_timed_token_factory")) is not None:
+            value = self[key] = str(factory())
+            return value
+        raise KeyError(key)
+
+
 class CSRFMiddleware:
+    """Validates CSRF token of unsafe requests.
+
+    The token is looked up in the header, then in the query string and only then in the form body.
+    The body is scanned incrementally (up to `max_scan_size` bytes) and replayed to the application,
+    so put the token field before file fields in multipart forms.
+
+    Timed token for templates is signed on the first `get_csrf_token` call
+    or `request.state.csrf_timed_token` access."""
+
     exclude_urls: typing.Iterable[str] | None = None
     safe_methods: typing.Iterable[str] = ["get", "head", "options"]
 
@@ -76,33 +102,43 @@ class CSRFMiddleware:
         salt: str = "_csrf_",
         exclude_urls: typing.Iterable[str] | None = None,
         max_age: int = 3600,
+        max_scan_size: int = 1024 * 1024,
     ):
         self.app = app
         self._exclude_urls = exclude_urls or self.exclude_urls or []
         self._secret_key = str(secret_key)
         self._salt = salt
         self._max_age = max_age
+        self._max_scan_size = max_scan_size
+        self._serializer = _get_serializer(self._secret_key, self._salt)
+        self._safe_methods = frozenset(method.upper() for method in self.safe_methods)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         if "session" not in scope:
             raise CSRFError("CsrfMiddleware requires SessionMiddleware.")
 
-        request = Request(scope, receive, send)
-        if CSRF_SESSION_KEY not in request.session:
+        session = scope["session"]
+        if CSRF_SESSION_KEY not in session:
             token = get_generate_random()
-            csrf_token = generate_token(self._secret_key, token)
-            request.session[CSRF_SESSION_KEY] = csrf_token
+            session[CSRF_SESSION_KEY] = generate_token(self._secret_key, token)
 
-        serializer = URLSafeTimedSerializer(self._secret_key, self._salt)
-        timed_token = str(serializer.dumps(request.session[CSRF_SESSION_KEY], self._salt))
-        request.state.csrf_token = request.session[CSRF_SESSION_KEY]
-        request.state.csrf_timed_token = timed_token
+        session_token = session[CSRF_SESSION_KEY]
+        state = scope.get("state")
+        if not isinstance(state, _CSRFState):
+            state = scope["state"] = _CSRFState(state or {})
+        state["csrf_token"] = session_token
+        state["csrf_timed_token_factory"] = functools.partial(self._serializer.dumps, session_token)
 
-        if self.should_check_token(request):
+        if self.should_check_token(scope):
+            timed_token, receive = await self.read_csrf_token(scope, receive)
             try:
                 validate_csrf_token(
-                    session_token=request.session[CSRF_SESSION_KEY],
-                    timed_token=await self.get_csrf_token(request),
+                    session_token=session_token,
+                    timed_token=timed_token,
                     secret_key=self._secret_key,
                     salt=self._salt,
                     max_age=self._max_age,
@@ -111,26 +147,42 @@ class CSRFMiddleware:
                 raise NotAuthorized(detail="CSRF token is invalid.") from ex
         await self.app(scope, receive, send)
 
-    async def get_csrf_token(self, request: Request) -> str:
-        from_headers = request.headers.get(CSRF_HEADER, "")
-        from_query = request.query_params.get(CSRF_QUERY_PARAM, "")
-        from_form_data = ""
-        if is_submitted(request):
-            form_data = await request.form()
-            from_form_data = typing.cast(str, form_data.get(CSRF_POST_FIELD))
-        return from_query or from_form_data or from_headers
-
-    def should_check_token(self, request: Request) -> bool:
-        return not any(
-            [
-                request.method.lower() in self.safe_methods,
-                *[exclusion in str(request.url) for exclusion in self._exclude_urls],
-            ]
-        )
-
-
-def get_csrf_token(request: Request) -> str | None:
-    return request.state.csrf_timed_token if hasattr(request.state, "csrf_timed_token") else None
+    async def read_csrf_token(self, scope: Scope, receive: Receive) -> tuple[str, Receive]:
+        """Read token from the request. Returns the token and receive callable to use downstream."""
+        if from_headers := get_header(scope, CSRF_HEADER.encode()):
+            return from_headers.decode("latin-1"), receive
+
+        query_string = scope["query_string"]
+        if CSRF_QUERY_PARAM.encode() in query_string and (
+            from_query := QueryParams(query_string).get(CSRF_QUERY_PARAM, "")
+        ):
+            return from_query, receive
+
+        if scope["method"] in ("POST", "PUT", "PATCH", "DELETE"):
+            from_form_data, receive = await scan_form_field(
+                scope, receive, CSRF_POST_FIELD, max_size=self._max_scan_size
+            )
+            return from_form_data or "", receive
+        return "", receive
+
+    def should_check_token(self, scope: Scope) -> bool:
+        if scope["method"] in self._safe_methods:
+            return False
+        if self._exclude_urls:
+            url = str(URL(scope=scope))
+            return not any(exclusion in url for exclusion in self._exclude_urls)
+        return True
+
+
+def get_csrf_token(request: HTTPConnection) -> str | None:
+    """Return timed CSRF token for forms, sign it on the first call."""
+    state = request.scope.get("state", {})
+    if "csrf_timed_token" not in state:
+        factory = state.get("csrf_timed_token_factory")
+        if factory is None:
+            return None
+        state["csrf_timed_token"] = str(factory())
+    return typing.cast(str, state["csrf_timed_token"])
 
 
 def get_csrf_input(request: Request) -> str:
@@ -1,24 +1,34 @@
-import typing
-from starlette.requests import Request
 from starlette.types import ASGIApp, Receive, Scope, Send
 
+from kupala.middleware._form_scanner import scan_form_field
+from kupala.requests import get_header
+
 BODY_PARAM = "_method"
+HEADER_NAME = "x-http-method-override"
 
 
 class MethodOverrideMiddleware:
-    def __init__(self, app: ASGIApp) -> None:
+    """Override method of POST requests using X-HTTP-Method-Override header or `_method` form field.
+
+    Only urlencoded and multipart bodies are inspected, at most first `max_scan_size` bytes of them,
+    so put the `_method` field at the beginning of the form. The consumed body is replayed to the application."""
+
+    def __init__(self, app: ASGIApp, max_scan_size: int = 64 * 1024) -> None:
         self.app = app
+        self.max_scan_size = max_scan_size
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":  # pragma: no cover
             return await self.app(scope, receive, send)
 
         if scope["method"] == "POST":
-            request = Request(scope, receive)
-            form_data = await request.form()
-            override = typing.cast(str, form_data.get(BODY_PARAM, ""))
+            override = (get_header(scope, HEADER_NAME.encode()) or b"").decode("latin-1")
+            if not override:
+                value, receive = await scan_form_field(scope, receive, BODY_PARAM, max_size=self.max_scan_size)
+                override = value or ""
+
             if override:
                 scope["original_method"] = scope["method"]
-                scope["method"] = override.upper()
+                scope["method"] = override.strip().upper()
 
         await self.app(scope, receive, send)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import types
+import typing
+
+import anyio.to_thread
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger("kupala.profiler")
+
+
+@dataclasses.dataclass
+class RequestProfile:
+    route: str
+    request_id: str
+    method: str
+    path: str
+    duration: float
+    interval: float
+    stacks: collections.Counter[str]
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def to_collapsed(self) -> str:
+        """Format stacks in collapsed format ("frame;frame;frame count") accepted by flamegraph tools."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class _Target:
+    __slots__ = ("coro", "thread_id", "sample_from", "stacks", "samples")
+
+    def __init__(self, coro: typing.Any, thread_id: int, sample_from: float) -> None:
+        self.coro = coro
+        self.thread_id = thread_id
+        self.sample_from = sample_from
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self.samples = 0
+
+
+def _format_code(code: types.CodeType, _cache: dict[types.CodeType, str] = {}) -> str:  # noqa: B006
+    name = _cache.get(code)
+    if name is None:
+        name = _cache[code] = f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})".replace(";", ",")
+    return name
+
+
+def _walk_awaitables(awaitable: typing.Any, frames: list[types.FrameType]) -> types.FrameType | None:
+    """Collect frames of the chain of awaiting coroutines.
+    Return frame of the innermost coroutine if it is being executed right now."""
+    frame: types.FrameType | None
+    while awaitable is not None:
+        if hasattr(awaitable, "cr_frame"):
+            frame, running, awaitable = awaitable.cr_frame, awaitable.cr_running, awaitable.cr_await
+        elif hasattr(awaitable, "gi_frame"):
+            frame, running, awaitable = awaitable.gi_frame, awaitable.gi_running, awaitable.gi_yieldfrom
+        else:
+            return None
+        if frame is None:
+            return None
+        frames.append(frame)
+        if awaitable is None and running:
+            return frame
+    return None
+
+
+def _collect_stack(coro: typing.Any, thread_frame: types.FrameType | None) -> str:
+    frames: list[types.FrameType] = []
+    running_frame = _walk_awaitables(coro, frames)
+    if running_frame is not None and thread_frame is not None:
+        # the request task is on CPU, add synchronous calls made by the innermost coroutine
+        sync_frames = []
+        frame: types.FrameType | None = thread_frame
+        while frame is not None and frame is not running_frame:
+            sync_frames.append(frame)
+            frame = frame.f_back
+        if frame is not None:
+            frames.extend(reversed(sync_frames))
+    return ";".join(_format_code(frame.f_code) for frame in frames)
+
+
+def _safe_filename(value: str) -> str:
+    """Replace characters that may escape the output directory, request ID comes from the client."""
+    return re.sub(r"[^\w-]+", "_", value).strip("_.")
+
+
+class _Sampler:
+    """Background thread that periodically captures stacks of profiled requests running in the event loop thread.
+    The thread sleeps until the earliest request reaches its sampling start, fast requests never wake it up."""
+
+    def __init__(self, interval: float, max_samples: int) -> None:
+        self.interval = interval
+        self.max_samples = max_samples
+        self.targets: dict[int, _Target] = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="kupala-profiler", daemon=True)
+        self.thread.start()
+
+    def add(self, target: _Target) -> None:
+        with self.lock:
+            self.targets[id(target)] = target
+        self.wakeup.set()
+
+    def remove(self, target: _Target) -> None:
+        with self.lock:
+            self.targets.pop(id(target), None)
+
+    def run(self) -> None:
+        while True:
+            # clear before looking at targets, a target added in between sets the event and is not missed
+            self.wakeup.clear()
+            sample_from = self.next_sample_time()
+            if sample_from is None:
+                self.wakeup.wait()
+            elif (delay := sample_from - time.perf_counter()) > 0:
+                self.wakeup.wait(delay)  # woken up early by a new target that may start sooner
+            else:
+                time.sleep(self.interval)
+                self.sample()
+
+    def next_sample_time(self) -> float | None:
+        with self.lock:
+            return min(
+                (target.sample_from for target in self.targets.values() if target.samples < self.max_samples),
+                default=None,
+            )
+
+    def sample(self) -> None:
+        now = time.perf_counter()
+        with self.lock:
+            if not self.targets:
+                return
+            thread_frames = sys._current_frames()
+            for target in self.targets.values():
+                if now < target.sample_from or target.samples >= self.max_samples:
+                    continue
+                stack = _collect_stack(target.coro, thread_frames.get(target.thread_id))
+                if stack:
+                    target.stacks[stack] += 1
+                    target.samples += 1
+
+
+class ProfilerMiddleware:
+    """Sample stacks of slow requests to find out where they spend time.
+
+    A background thread captures the stack of every request that runs longer than `threshold` seconds,
+    every `interval` seconds, until the request completes. A fraction of requests (`sample_rate`) is sampled
+    from the start regardless of the threshold. Fast requests are only registered and unregistered,
+    so the overhead is bounded to a few microseconds (see benchmarks/profiler.py).
+
+    Samples are wall-clock: a request waiting for I/O is reported with the stack of the awaiting coroutine.
+    Collected profiles are keyed by route template and request ID and either logged
+    or written to `output_dir` as collapsed stack files ready for flamegraph tools.
+    Override `report` to send them elsewhere, it is called in a worker thread."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        threshold: float = 1.0,
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+        max_samples: int = 10_000,
+        output_dir: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self.app = app
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_samples = max_samples
+        self.output_dir = output_dir
+        self._sampler: _Sampler | None = None
+
+    @property
+    def sampler(self) -> _Sampler:
+        if self._sampler is None:
+            self._sampler = _Sampler(self.interval, self.max_samples)
+        return self._sampler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        sample_from = started_at if sampled else started_at + self.threshold
+        coro = self.app(scope, receive, send)
+        target = _Target(coro, threading.get_ident(), sample_from)
+        sampler = self.sampler
+        sampler.add(target)
+        try:
+            await coro
+        finally:
+            sampler.remove(target)
+            duration = time.perf_counter() - started_at
+            if target.stacks and (sampled or duration >= self.threshold):
+                profile = RequestProfile(
+                    route=scope.get("route_template", scope["path"]),
+                    request_id=scope.get("state", {}).get("request_id", "-"),
+                    method=scope["method"],
+                    path=scope["path"],
+                    duration=duration,
+                    interval=self.interval,
+                    stacks=target.stacks,
+                )
+                await anyio.to_thread.run_sync(self.report, profile)
+
+    def report(self, profile: RequestProfile) -> None:
+        if self.output_dir is not None:
+            route = _safe_filename(profile.route) or "root"
+            request_id = _safe_filename(profile.request_id) or "-"
+            filename = os.path.join(self.output_dir, f"{route}.{request_id}.collapsed")
+            with open(filename, "w") as f:
+                f.write(profile.to_collapsed())
+            return
+
+        logger.warning(
+            "Slow request %s %s %s took %.2fms, %d samples:\n%s",
+            profile.request_id,
+            profile.method,
+            profile.route,
+            profile.duration * 1000,
+            profile.samples,
+            profile.to_collapsed(),
+            extra={
+                "request_id": profile.request_id,
+                "route": profile.route,
+                "duration": profile.duration,
+                "stacks": dict(profile.stacks),
+            },
+        )
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import dataclasses
+import inspect
+import math
+import typing
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection, Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Mount
+from starlette.types import ASGIApp, HTTPExceptionHandler, Message, Receive, Scope, Send
+
+from kupala.exceptions import TooManyRequests
+from kupala.rate_limiters import RateLimitedError, RateLimiter, RateLimitPolicy, RateLimitResult
+from kupala.requests import get_client_ip, get_header, match_path_prefix
+from kupala.routing import BaseRoute, Router
+
+__all__ = [
+    "RateLimit",
+    "RateLimitMiddleware",
+    "rate_limit",
+    "client_ip_key",
+    "user_key",
+    "api_key",
+    "get_rate_limit_headers",
+]
+
+KeyFunc = typing.Callable[[HTTPConnection], "str | None"]
+_T = typing.TypeVar("_T")
+
+ENDPOINT_ATTRIBUTE = "__kupala_rate_limits__"
+
+
+def client_ip_key(connection: HTTPConnection) -> str:
+    """Identify actors by client IP address."""
+    return "ip:" + get_client_ip(typing.cast(typing.Any, connection))
+
+
+def user_key(connection: HTTPConnection) -> str:
+    """Identify authenticated users by their identity, anonymous visitors by IP address."""
+    user = connection.scope.get("user")
+    if user is not None and user.is_authenticated:
+        return f"user:{user.identity}"
+    return client_ip_key(connection)
+
+
+def api_key(header: str = "x-api-key") -> KeyFunc:
+    """Identify actors by API key sent in the header. Requests without the key are not limited by the policy."""
+    header_name = header.lower().encode()
+
+    def key_func(connection: HTTPConnection) -> str | None:
+        value = get_header(connection.scope, header_name)
+        return "key:" + value.decode("latin-1") if value else None
+
+    return key_func
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class RateLimit:
+    """Apply the policy to actors identified by `key`. None returned by `key` skips the policy."""
+
+    policy: RateLimitPolicy
+    key: KeyFunc = client_ip_key
+    cost: int = 1
+
+
+def _to_rate_limit(value: RateLimit | RateLimitPolicy) -> RateLimit:
+    return value if isinstance(value, RateLimit) else RateLimit(value)
+
+
+def rate_limit(*limits: RateLimit | RateLimitPolicy) -> typing.Callable[[_T], _T]:
+    """Attach rate limits to the route endpoint, they are checked by RateLimitMiddleware.
+    The decorator marks the endpoint registered in the route, so put it above the route group decorator.
+
+    Usage:
+        @rate_limit(RateLimit(login_policy, key=client_ip_key))
+        @routes.post("/login")
+        async def login_view(...) -> Response: ..."""
+
+    def decorator(endpoint: _T) -> _T:
+        existing = getattr(endpoint, ENDPOINT_ATTRIBUTE, ())
+        setattr(endpoint, ENDPOINT_ATTRIBUTE, (*existing, *map(_to_rate_limit, limits)))
+        return endpoint
+
+    return decorator
+
+
+def _get_endpoint_limits(route: BaseRoute) -> tuple[RateLimit, ...]:
+    return typing.cast(tuple[RateLimit, ...], getattr(getattr(route, "endpoint", None), ENDPOINT_ATTRIBUTE, ()))
+
+
+def _has_endpoint_limits(routes: typing.Iterable[BaseRoute]) -> bool:
+    for route in routes:
+        if _get_endpoint_limits(route):
+            return True
+        if isinstance(route, Mount) and _has_endpoint_limits(route.routes):
+            return True
+    return False
+
+
+def _select_result(results: typing.Sequence[RateLimitResult]) -> RateLimitResult:
+    """Select the result to report in headers: the longest rejection, otherwise the closest to its limit."""
+    if rejected := [result for result in results if not result.allowed]:
+        return max(rejected, key=lambda result: result.retry_after)
+    return min(results, key=lambda result: (result.remaining, -result.reset_after))
+
+
+def _get_exception_handler(scope: Scope, exc: TooManyRequests) -> HTTPExceptionHandler | None:
+    """Look up the app's handler the same way as Starlette's ExceptionMiddleware does:
+    by status code, then by exception class. Handlers of 500 and `Exception` belong to ServerErrorMiddleware."""
+    handlers: typing.Mapping[typing.Any, HTTPExceptionHandler] = getattr(scope.get("app"), "exception_handlers", {})
+    if handler := handlers.get(exc.status_code):
+        return handler
+    for exc_class in type(exc).__mro__:
+        if exc_class is Exception:
+            break
+        if handler := handlers.get(exc_class):
+            return handler
+    return None
+
+
+def get_rate_limit_headers(result: RateLimitResult) -> dict[str, str]:
+    """Build RateLimit-* headers (IETF draft) and Retry-After header for rejected requests."""
+    headers = {
+        "ratelimit-limit": str(result.limit),
+        "ratelimit-remaining": str(result.remaining),
+        "ratelimit-reset": str(math.ceil(result.reset_after)),
+    }
+    if not result.allowed:
+        headers["retry-after"] = str(max(math.ceil(result.retry_after), 1))
+    return headers
+
+
+class RateLimitMiddleware:
+    """Check rate limits of the request before it is handled.
+
+    Limits are selected by the longest matching path prefix (`paths`), the route name (`routes`),
+    and the `rate_limit` decorator of the route endpoint. All selected limits of the request
+    are checked in one storage call (per limiter), and counted only if all of them pass.
+    Limits of different limiters are checked one limiter after another, in the order of selection,
+    and a rejection stops the checks: hits counted by the limiters checked before stay counted.
+    Use one limiter for limits that must be counted together.
+    The route is looked up only when the app has route name rules or decorated endpoints.
+
+    Route name rules use names qualified by names of their mounts ("admin:users"), as `url_path_for` does.
+
+    Rejected requests get 429 response built from `TooManyRequests` exception.
+    The middleware runs outside of the app's exception middleware, so the exception is passed to
+    the app's handler registered for 429 status or `TooManyRequests` (or its base classes) directly,
+    requests are rejected with plain text response when there is no such handler.
+    `RateLimitedError` raised by the endpoint (see `RateLimitPolicy.hit_or_raise`) is translated to 429 too.
+    With `headers=True`, RateLimit-Limit, RateLimit-Remaining and RateLimit-Reset headers
+    of the most restrictive limit are added to all limited responses."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        paths: typing.Mapping[str, typing.Sequence[RateLimit | RateLimitPolicy]] | None = None,
+        routes: typing.Mapping[str, typing.Sequence[RateLimit | RateLimitPolicy]] | None = None,
+        headers: bool = True,
+    ) -> None:
+        self.app = app
+        self.headers = headers
+        self.path_limits = sorted(
+            ((prefix, tuple(map(_to_rate_limit, limits))) for prefix, limits in (paths or {}).items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self.route_limits = {name: tuple(map(_to_rate_limit, limits)) for name, limits in (routes or {}).items()}
+        self._has_endpoint_limits: bool | None = None
+
+    def get_limits(self, scope: Scope) -> list[RateLimit]:
+        limits: list[RateLimit] = []
+        path = scope["path"]
+        for prefix, path_limits in self.path_limits:
+            if match_path_prefix(path, prefix):
+                limits.extend(path_limits)
+                break
+
+        router = getattr(scope.get("app"), "router", None)
+        if isinstance(router, Router) and self._should_find_route(router) and (found := router.find_named_route(scope)):
+            route, name = found
+            limits.extend(self.route_limits.get(name, ()))
+            limits.extend(_get_endpoint_limits(route))
+        return limits
+
+    def _should_find_route(self, router: Router) -> bool:
+        if self._has_endpoint_limits is None:
+            self._has_endpoint_limits = _has_endpoint_limits(router.routes)
+        return bool(self.route_limits) or self._has_endpoint_limits
+
+    async def check(self, scope: Scope, limits: typing.Sequence[RateLimit]) -> list[RateLimitResult]:
+        connection = HTTPConnection(scope)
+        batches: dict[RateLimiter, list[tuple[RateLimitPolicy, str, int]]] = {}
+        for limit in limits:
+            if (actor_id := limit.key(connection)) is not None:
+                batches.setdefault(limit.policy.limiter, []).append((limit.policy, actor_id, limit.cost))
+
+        results: list[RateLimitResult] = []
+        for limiter, hits in batches.items():
+            results.extend(await limiter.check(hits))
+            if not all(results):
+                break  # the request is rejected anyway, don't count it by other limiters
+        return results
+
+    def too_many_requests(self, result: RateLimitResult) -> TooManyRequests:
+        return TooManyRequests(detail="Too Many Requests", headers=get_rate_limit_headers(result))
+
+    async def rejection_response(self, request: Request, exc: TooManyRequests) -> Response:
+        if handler := _get_exception_handler(request.scope, exc):
+            if inspect.iscoroutinefunction(handler):
+                return await typing.cast(typing.Awaitable[Response], handler(request, exc))
+            return typing.cast(Response, await run_in_threadpool(handler, request, exc))
+        return PlainTextResponse(exc.detail, status_code=exc.status_code, headers=exc.headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        results = await self.check(scope, limits) if (limits := self.get_limits(scope)) else []
+        result = _select_result(results) if results else None
+        if result is not None and not result.allowed:
+            response = await self.rejection_response(Request(scope, receive), self.too_many_requests(result))
+            await response(scope, receive, send)
+            return
+
+        extra_headers = (
+            [(name.encode(), value.encode()) for name, value in get_rate_limit_headers(result).items()]
+            if result is not None and self.headers
+            else []
+        )
+        response_started = False
+
+        async def sender(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                if extra_headers:
+                    message["headers"] = [*message.get("headers", ()), *extra_headers]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, sender)
+        except RateLimitedError as exc:
+            if response_started:
+                raise
+            response = await self.rejection_response(Request(scope, receive), self.too_many_requests(exc.result))
+            await response(scope, receive, send)
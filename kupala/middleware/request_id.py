@@ -1,29 +1,123 @@
-import uuid
-from starlette.datastructures import MutableHeaders
-from starlette.requests import HTTPConnection
+from __future__ import annotations
+
+import contextvars
+import random
+import re
+import time
+
+import httpx
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from kupala.requests import get_header
+
+HEADER_NAME = b"x-request-id"
+TRACEPARENT_HEADER_NAME = b"traceparent"
+MAX_REQUEST_ID_LENGTH = 128
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_TRACE_ID_RE = re.compile(r"[0-9a-f]{32}")
+# the ID ends up in logs, headers and file names, so path separators and control characters are not accepted
+_REQUEST_ID_RE = re.compile(rb"[A-Za-z0-9_.:@+=-]{1,%d}" % MAX_REQUEST_ID_LENGTH)
+_RANDOM_BITS = 80
+_RANDOM_MASK = (1 << _RANDOM_BITS) - 1
+_last_timestamp = 0
+_last_random = 0
+
+_traceparent: contextvars.ContextVar[str | None] = contextvars.ContextVar("kupala_traceparent", default=None)
+
+
+def generate_request_id() -> str:
+    """Generate 32 hex chars long ID: 48 bit timestamp in milliseconds followed by 80 random bits, like ULID.
+    IDs generated within the same millisecond increment the random part, so they are sortable."""
+    global _last_timestamp, _last_random
+
+    timestamp = time.time_ns() // 1_000_000
+    if timestamp <= _last_timestamp:
+        timestamp = _last_timestamp
+        _last_random = (_last_random + 1) & _RANDOM_MASK
+    else:
+        _last_timestamp = timestamp
+        _last_random = random.getrandbits(_RANDOM_BITS)
+    return f"{timestamp << _RANDOM_BITS | _last_random:032x}"
+
+
+def get_traceparent() -> str | None:
+    """Return W3C traceparent of the current request to pass to outgoing calls.
+    Available when RequestIDMiddleware is created with `trace_context=True`."""
+    return _traceparent.get()
+
+
+async def httpx_traceparent_hook(request: httpx.Request) -> None:
+    """Propagate trace context of the current request to outgoing httpx requests.
+
+    Usage: httpx.AsyncClient(event_hooks={"request": [httpx_traceparent_hook]})"""
+    traceparent = _traceparent.get()
+    if traceparent is not None and "traceparent" not in request.headers:
+        request.headers["traceparent"] = traceparent
+
+
+def _is_valid_request_id(value: bytes) -> bool:
+    return _REQUEST_ID_RE.fullmatch(value) is not None
+
 
 class RequestIDMiddleware:
-    def __init__(self, app: ASGIApp) -> None:
+    """Assign ID to each request, store it in `request.state.request_id` and send it in X-Request-ID header.
+
+    The ID sent by the client (or proxy) in X-Request-ID header is reused if it consists of letters, digits
+    and "_.:@+=-" characters only, X-Request-ID header set by the application is replaced.
+    With `trace_context=True`, the middleware continues W3C trace from the incoming traceparent header
+    (trace ID becomes the request ID unless X-Request-ID is set) or starts a new one,
+    see `get_traceparent` and `httpx_traceparent_hook`."""
+
+    def __init__(self, app: ASGIApp, *, trace_context: bool = False) -> None:
         self.app = app
+        self.trace_context = trace_context
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":  # pragma: no cover
             return await self.app(scope, receive, send)
 
-        connection = HTTPConnection(scope, receive)
-        request_id = connection.headers.get("x-request-id", self.generate_id())
-        scope.setdefault("state", {})
-        scope["state"]["request_id"] = request_id
+        request_id: str | None = None
+        if (value := get_header(scope, HEADER_NAME)) and _is_valid_request_id(value):
+            request_id = value.decode()
+
+        token = None
+        if self.trace_context:
+            trace_id, flags = self.parse_traceparent(get_header(scope, TRACEPARENT_HEADER_NAME))
+            if trace_id is None:
+                trace_id = request_id if request_id and _TRACE_ID_RE.fullmatch(request_id) else self.generate_id()
+            request_id = request_id or trace_id
+            span_id = f"{random.getrandbits(64):016x}"
+            state_traceparent = f"00-{trace_id}-{span_id}-{flags}"
+            scope.setdefault("state", {})["traceparent"] = state_traceparent
+            token = _traceparent.set(state_traceparent)
+
+        if request_id is None:
+            request_id = self.generate_id()
+        scope.setdefault("state", {})["request_id"] = request_id
+        header = (HEADER_NAME, request_id.encode())
 
         async def sender(message: Message) -> None:
             if message["type"] == "http.response.start":
-                headers = MutableHeaders(raw=message["headers"])
-                headers["x-request-id"] = request_id
+                # don't modify in place, the list may belong to a response instance reused between requests
+                headers = [item for item in message.get("headers", ()) if item[0].lower() != HEADER_NAME]
+                headers.append(header)
+                message["headers"] = headers
             await send(message)
 
-        await self.app(scope, receive, sender)
+        try:
+            await self.app(scope, receive, sender)
+        finally:
+            if token is not None:
+                _traceparent.reset(token)
 
     def generate_id(self) -> str:
-        return str(uuid.uuid4()).replace("-", "")
+        return generate_request_id()
+
+    def parse_traceparent(self, value: bytes | None) -> tuple[str | None, str]:
+        """Return trace ID and flags from the traceparent header or (None, "01") if it is missing or invalid."""
+        if value is not None and (match := _TRACEPARENT_RE.match(value.decode("latin-1"))):
+            trace_id, _, flags = match.groups()
+            if trace_id != "0" * 32:
+                return trace_id, flags
+        return None, "01"
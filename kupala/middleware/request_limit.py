@@ -1,43 +1,143 @@
 import typing
 from starlette import status
+from starlette.requests import ClientDisconnect
 from starlette.responses import PlainTextResponse
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-
-class LargeEntityError(ValueError):
-    pass
+from kupala.requests import get_header, match_path_prefix
 
 
 class RequestLimitMiddleware:
     """
-    Limit request body to a value of max_body_size.
+    Limit request body size.
+
+    Requests with Content-Length above the limit get 413 response before the application is called.
+    Chunked bodies are counted while the application reads them, on overflow the middleware responds with 413
+    and the application receives "http.disconnect" message.
+
+    The limit is selected by the longest matching path prefix from `path_limits`,
+    then by media type from `content_type_limits` ("image/*" patterns are supported),
+    otherwise `max_body_size` is used. None disables the limit.
 
-    When request body exceeds the limit then 413 response returned.
+    `max_inflight_size` caps total size of request bodies being received by the worker at the same time,
+    requests that do not fit get 503 response with Retry-After header.
     """
 
-    def __init__(self, app: ASGIApp, max_body_size: typing.Optional[int] = 2048) -> None:
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_body_size: int | None = 1024 * 1024,
+        *,
+        content_type_limits: typing.Mapping[str, int | None] | None = None,
+        path_limits: typing.Mapping[str, int | None] | None = None,
+        max_inflight_size: int | None = None,
+        retry_after: int = 1,
+    ) -> None:
         self.app = app
         self.max_body_size = max_body_size
+        self.content_type_limits = {key.lower(): value for key, value in (content_type_limits or {}).items()}
+        self.path_limits = sorted((path_limits or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.max_inflight_size = max_inflight_size
+        self.retry_after = retry_after
+        self.inflight_size = 0
+
+    def get_limit(self, scope: Scope) -> int | None:
+        path = scope["path"]
+        for prefix, limit in self.path_limits:
+            if match_path_prefix(path, prefix):
+                return limit
+
+        if self.content_type_limits and (content_type := get_header(scope, b"content-type")):
+            media_type = content_type.decode("latin-1").partition(";")[0].strip().lower()
+            if media_type in self.content_type_limits:
+                return self.content_type_limits[media_type]
+            wildcard = media_type.partition("/")[0] + "/*"
+            if wildcard in self.content_type_limits:
+                return self.content_type_limits[wildcard]
+        return self.max_body_size
+
+    def reserve(self, size: int) -> bool:
+        """Account body bytes against the worker-wide budget. Returns False if they do not fit."""
+        if self.max_inflight_size is not None and self.inflight_size + size > self.max_inflight_size:
+            return False
+        self.inflight_size += size
+        return True
+
+    def bad_request_response(self) -> PlainTextResponse:
+        return PlainTextResponse("Invalid Content-Length", status_code=status.HTTP_400_BAD_REQUEST)
+
+    def too_large_response(self) -> PlainTextResponse:
+        return PlainTextResponse("Entity Too Large", status_code=status.HTTP_413_CONTENT_TOO_LARGE)
+
+    def unavailable_response(self) -> PlainTextResponse:
+        return PlainTextResponse(
+            "Service Unavailable",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"retry-after": str(self.retry_after)},
+        )
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        total_len = 0
         if scope["type"] != "http":
             return await self.app(scope, receive, send)
 
+        limit = self.get_limit(scope)
+        if limit is None and self.max_inflight_size is None:
+            return await self.app(scope, receive, send)
+
+        content_length: int | None = None
+        if (raw_content_length := get_header(scope, b"content-length")) is not None:
+            if not raw_content_length.isdigit():  # negative length would free the in-flight budget
+                return await self.bad_request_response()(scope, receive, send)
+            content_length = int(raw_content_length)
+
+        if limit is not None and content_length is not None and content_length > limit:
+            return await self.too_large_response()(scope, receive, send)
+
+        reserved = 0
+        if content_length:
+            if not self.reserve(content_length):
+                return await self.unavailable_response()(scope, receive, send)
+            reserved = content_length
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if rejected:  # the rejection response has been already sent
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         async def receive_wrapper() -> Message:
+            nonlocal received, reserved, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+
             message = await receive()
-            if message["type"] != "http.request" or self.max_body_size is None:
+            if message["type"] != "http.request":
+                return message
+
+            received += len(message.get("body", b""))
+            if limit is not None and received > limit:
+                response = self.too_large_response()
+            elif received <= reserved or self.reserve(received - reserved):
+                reserved = max(reserved, received)
                 return message
+            else:
+                response = self.unavailable_response()
 
-            nonlocal total_len
-            body = message.get("body", b"")
-            total_len += len(body)
-            if total_len > self.max_body_size:
-                raise LargeEntityError()
-            return message
+            rejected = True
+            if not response_started:
+                await response(scope, receive, send)
+            return {"type": "http.disconnect"}
 
         try:
-            await self.app(scope, receive_wrapper, send)
-        except LargeEntityError:
-            response = PlainTextResponse("Entity Too Large", status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
-            await response(scope, receive, send)
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except ClientDisconnect:
+            if not rejected:
+                raise
+        finally:
+            self.inflight_size -= reserved
@@ -0,0 +1,64 @@
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from kupala.timings import collect_timings
+
+logger = logging.getLogger("kupala.timings")
+
+
+class ServerTimingMiddleware:
+    """Collect time spent in request phases and report them in Server-Timing header and in a log line.
+
+    Kupala records "middleware", "routing", "handler", "template", "db" and "cache" spans,
+    use `kupala.timings.span` to add your own.
+    Place it after RequestIDMiddleware to include request ID into the log record.
+    The header is built when the response starts, so unfinished spans are reported up to that moment."""
+
+    def __init__(self, app: ASGIApp, *, send_header: bool = True, log_level: int | None = logging.INFO) -> None:
+        self.app = app
+        self.send_header = send_header
+        self.log_level = log_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        with collect_timings() as timings:
+
+            async def send_wrapper(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if self.send_header:
+                        message["headers"] = [
+                            *message.get("headers", []),
+                            (b"server-timing", timings.to_header().encode()),
+                        ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if self.log_level is not None and logger.isEnabledFor(self.log_level):
+                    durations = timings.as_dict()
+                    request_id = scope.get("state", {}).get("request_id", "-")
+                    logger.log(
+                        self.log_level,
+                        "%s %s %s %s %s",
+                        request_id,
+                        scope["method"],
+                        scope["path"],
+                        status_code,
+                        " ".join(f"{name}={duration:.2f}ms" for name, duration in durations.items()),
+                        extra={
+                            "request_id": request_id,
+                            "method": scope["method"],
+                            "path": scope["path"],
+                            "status_code": status_code,
+                            "timings": durations,
+                        },
+                    )
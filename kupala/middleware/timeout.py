@@ -1,20 +1,46 @@
+import typing
+
 import anyio
 from starlette.responses import PlainTextResponse
 from starlette.types import ASGIApp, Receive, Scope, Send
 
+from kupala.deadlines import deadline
+from kupala.requests import match_path_prefix
+
 
 class TimeoutMiddleware:
-    def __init__(self, app: ASGIApp, timeout: float = 30) -> None:
+    """Cancel request handling after `timeout` seconds and respond with 504.
+
+    The deadline is available to the code inside the request via `kupala.deadlines.get_remaining_time`,
+    database sessions and httpx clients use it to limit their own timeouts.
+    `path_timeouts` overrides the timeout for routes by the longest matching path prefix, None disables it."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        timeout: float = 30,
+        *,
+        path_timeouts: typing.Mapping[str, float | None] | None = None,
+    ) -> None:
         self.app = app
         self.timeout = timeout
+        self.path_timeouts = sorted((path_timeouts or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def get_timeout(self, scope: Scope) -> float | None:
+        path = scope["path"]
+        for prefix, timeout in self.path_timeouts:
+            if match_path_prefix(path, prefix):
+                return timeout
+        return self.timeout
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
 
+        timeout = self.get_timeout(scope)
         try:
-            with anyio.fail_after(self.timeout):
+            with deadline(timeout), anyio.fail_after(timeout):
                 await self.app(scope, receive, send)
         except TimeoutError:
             response = PlainTextResponse("Gateway Timeout", status_code=504)
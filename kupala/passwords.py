@@ -9,6 +9,7 @@ from passlib.context import CryptContext
 from starlette_dispatch import VariableResolver
 
 from kupala.applications import AppConfig, Kupala
+from kupala.loop_monitor import check_blocking_call
 
 
 class Passwords:
@@ -27,6 +28,7 @@ class Passwords:
 
     def make(self, plain_password: str, *, scheme: str | None = None) -> str:
         """Hash a plain password."""
+        check_blocking_call("Passwords.make", "Passwords.amake")
         return self.context.hash(plain_password, scheme=scheme)
 
     def verify(
@@ -37,6 +39,7 @@ class Passwords:
         scheme: str | None = None,
     ) -> bool:
         """Verify a plain password against a hashed password."""
+        check_blocking_call("Passwords.verify", "Passwords.averify")
         return self.context.verify(plain_password, hashed_password, scheme=scheme)
 
     def verify_and_migrate(
@@ -47,6 +50,7 @@ class Passwords:
         scheme: str | None = None,
     ) -> tuple[bool, str]:
         """Verify password and re-hash the password if needed, all in a single call."""
+        check_blocking_call("Passwords.verify_and_migrate", "Passwords.averify_and_migrate")
         return self.context.verify_and_update(plain_password, hashed_password, scheme=scheme)
 
     def needs_update(self, hashed_password: str, *, scheme: str | None = None) -> bool:
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from kupala.rate_limiters._leased import LeasedRateLimiter
+from kupala.rate_limiters._limiter import (
+    Rate,
+    RateLimitedError,
+    RateLimiter,
+    RateLimitPolicy,
+    RateLimitResult,
+    rate_limit_checks_total,
+)
+from kupala.rate_limiters.backends.base import RateLimitBackend, RateLimitCheck
+from kupala.rate_limiters.backends.memory import MemoryRateLimitBackend
+from kupala.rate_limiters.backends.redis import RedisRateLimitBackend
+
+__all__ = [
+    "LeasedRateLimiter",
+    "MemoryRateLimitBackend",
+    "Rate",
+    "RateLimitBackend",
+    "RateLimitCheck",
+    "RateLimitPolicy",
+    "RateLimitResult",
+    "RateLimitedError",
+    "RateLimiter",
+    "RedisRateLimitBackend",
+    "rate_limit_checks_total",
+]
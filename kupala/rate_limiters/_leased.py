@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import logging
+import time
+import typing
+
+import anyio
+
+from kupala.applications import AppConfig, Kupala
+from kupala.rate_limiters._limiter import RateLimiter, RateLimitPolicy, RateLimitResult, rate_limit_checks_total
+from kupala.rate_limiters.backends.base import RateLimitBackend, RateLimitCheck
+
+logger = logging.getLogger("kupala.rate_limiters")
+
+
+@dataclasses.dataclass(slots=True)
+class _Lease:
+    check: RateLimitCheck
+    allowance: int  # units the worker may spend without asking the storage
+    remaining: int  # estimate of the global remaining quota
+    reset_at: float  # monotonic time
+    expires_at: float  # monotonic time
+    pending: int = 0  # units spent locally and not synced yet
+
+
+class LeasedRateLimiter(RateLimiter):
+    """Local-first rate limiter for very high traffic endpoints.
+
+    A hit that passes the storage check leases a slice of the remaining global quota to the worker:
+    up to `max_error` fraction of the limit (at least 1). The following hits spend the lease in process,
+    without a storage call, until it is used up or `lease_ttl` seconds pass.
+    Locally spent units are synced to the storage in batches, every `sync_interval` seconds,
+    by the task started by the application initializer (see `configure_application`), or by calling `sync`.
+
+    The limit is approximate: every worker may admit up to `max(1, limit * max_error)` units per actor
+    not yet known to the others, so N workers may exceed the limit by N times that.
+    Units that no longer fit into the global quota on sync saturate it, so every worker sees the quota used up."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        namespace: str = "rate_limit",
+        *,
+        max_error: float = 0.05,
+        lease_ttl: float = 1.0,
+        sync_interval: float = 0.1,
+        local_cache_size: int = 10_000,
+    ) -> None:
+        assert 0 <= max_error <= 1, "max_error must be between 0 and 1."
+        super().__init__(backend, namespace, local_cache_size=local_cache_size)
+        self.max_error = max_error
+        self.lease_ttl = lease_ttl
+        self.sync_interval = sync_interval
+        self._leases: dict[str, _Lease] = {}
+
+    async def check(self, hits: typing.Sequence[tuple[RateLimitPolicy, str, int]]) -> list[RateLimitResult]:
+        checks = [policy.make_check(actor_id, cost) for policy, actor_id, cost in hits]
+        now = time.monotonic()
+        leases = [self._leases.get(check.key) for check in checks]
+        if all(
+            lease is not None and lease.expires_at > now and lease.allowance >= check.cost
+            for lease, check in zip(leases, checks)
+        ):
+            results = []
+            for (policy, _, _), check, lease in zip(hits, checks, typing.cast(list[_Lease], leases)):
+                lease.allowance -= check.cost
+                lease.pending += check.cost
+                lease.remaining = max(lease.remaining - check.cost, 0)
+                results.append(RateLimitResult(True, check.limit, lease.remaining, max(lease.reset_at - now, 0), 0))
+                rate_limit_checks_total.labels(policy.namespace, "allowed_local").inc()
+            return results
+
+        results = await super().check(hits)
+        if all(results):
+            for check, result in zip(checks, results):
+                self._grant(check, result, now)
+        return results
+
+    async def clear(self, key: str) -> None:
+        self._leases.pop(key, None)
+        await super().clear(key)
+
+    def _grant(self, check: RateLimitCheck, result: RateLimitResult, now: float) -> None:
+        lease = self._leases.get(check.key)
+        pending = lease.pending if lease else 0
+        remaining = result.remaining - pending  # the storage does not know about unsynced units yet
+        self._leases[check.key] = _Lease(
+            check=check,
+            allowance=max(min(max(1, int(check.limit * self.max_error)), remaining), 0),
+            remaining=max(remaining, 0),
+            reset_at=now + result.reset_after,
+            expires_at=now + min(self.lease_ttl, result.reset_after or self.lease_ttl),
+            pending=pending,
+        )
+
+    async def sync(self) -> None:
+        """Push locally spent units to the storage in one call and drop expired leases."""
+        now = time.monotonic()
+        synced: list[_Lease] = []
+        for key, lease in list(self._leases.items()):
+            if lease.pending:
+                synced.append(lease)
+            elif lease.expires_at <= now:
+                del self._leases[key]
+
+        if not synced:
+            return
+
+        checks = [dataclasses.replace(lease.check, cost=lease.pending) for lease in synced]
+        for lease in synced:
+            lease.pending = 0  # units spent while syncing are kept for the next sync
+
+        try:
+            results = await self.backend.record(checks)
+        except BaseException:
+            for lease, check in zip(synced, checks):
+                lease.pending += check.cost
+            raise
+
+        for lease, result in zip(synced, results):
+            lease.remaining = max(result.remaining - lease.pending, 0)
+            lease.allowance = min(lease.allowance, lease.remaining) if result.allowed else 0
+
+    async def run_sync(self) -> None:
+        while True:
+            await anyio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Failed to sync rate limits.")
+
+    @contextlib.asynccontextmanager
+    async def initializer(self, app: Kupala) -> typing.AsyncGenerator[None]:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(self.run_sync)
+            try:
+                yield
+            finally:
+                tg.cancel_scope.cancel()
+        await self.sync()
+
+    def configure_application(self, app_config: AppConfig) -> None:
+        app_config.initializers.append(self.initializer)
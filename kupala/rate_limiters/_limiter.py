@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import dataclasses
+import re
+import time
+import typing
+from urllib.parse import urlparse
+
+from kupala.error_codes import ErrorCode
+from kupala.exceptions import KupalaError
+from kupala.metrics import Counter
+from kupala.rate_limiters.backends.base import (
+    FIXED_WINDOW,
+    SLIDING_WINDOW,
+    TOKEN_BUCKET,
+    CheckResult,
+    RateLimitBackend,
+    RateLimitCheck,
+)
+from kupala.rate_limiters.backends.memory import MemoryRateLimitBackend
+from kupala.rate_limiters.backends.redis import RedisRateLimitBackend
+
+rate_limit_checks_total = Counter(
+    "kupala_rate_limit_checks_total",
+    "Total number of rate limit checks by result.",
+    ["namespace", "result"],
+)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_PERIOD_ALIASES = {"s": "second", "sec": "second", "m": "minute", "min": "minute", "h": "hour", "d": "day"}
+_PERIOD_UNITS = {
+    **_PERIODS,
+    **{name + "s": seconds for name, seconds in _PERIODS.items()},
+    **{alias: _PERIODS[name] for alias, name in _PERIOD_ALIASES.items()},
+    **{alias + "s": _PERIODS[name] for alias, name in _PERIOD_ALIASES.items() if len(alias) > 1},
+}
+_RATE_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d*)\s*([a-z]+)\s*$")
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Rate:
+    """Number of hits allowed per period (in seconds)."""
+
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> Rate:
+        """Parse rate like "10/minute", "100 per hour" or "5/10s"."""
+        match = _RATE_RE.match(value.lower())
+        if not match:
+            raise ValueError(f"Invalid rate: {value!r}.")
+        limit, multiplier, unit = match.groups()
+        if unit not in _PERIOD_UNITS:  # unknown units like "ms" are rejected rather than read as another period
+            raise ValueError(f"Invalid rate period: {value!r}.")
+        return cls(int(limit), _PERIOD_UNITS[unit] * int(multiplier or 1))
+
+    def __str__(self) -> str:
+        return f"{self.limit}/{self.period:g}s"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class RateLimitResult:
+    """Outcome of a rate limit check. Times are in seconds. Evaluates to True when the hit is allowed."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+    def __bool__(self) -> bool:
+        return self.allowed
+
+
+class RateLimitedError(KupalaError):
+    error_code = ErrorCode("rate_limited")
+
+    def __init__(self, result: RateLimitResult) -> None:
+        super().__init__()
+        self.result = result
+
+
+class RateLimitPolicy:
+    """A rate applied with the given strategy to actors within the namespace."""
+
+    def __init__(self, limiter: RateLimiter, strategy: str, rate: Rate, namespace: str) -> None:
+        self.limiter = limiter
+        self.strategy = strategy
+        self.rate = rate
+        self.namespace = namespace
+
+    def make_check(self, actor_id: str, cost: int = 1) -> RateLimitCheck:
+        return RateLimitCheck(
+            key=self.limiter.make_key(f"{self.namespace}:{actor_id}"),
+            strategy=self.strategy,
+            limit=self.rate.limit,
+            period=int(self.rate.period * 1000),
+            cost=cost,
+        )
+
+    async def hit(self, actor_id: str, cost: int = 1) -> RateLimitResult:
+        [result] = await self.limiter.check([(self, actor_id, cost)])
+        return result
+
+    async def hit_or_raise(self, actor_id: str, cost: int = 1) -> RateLimitResult:
+        result = await self.hit(actor_id, cost)
+        if not result.allowed:
+            raise RateLimitedError(result)
+        return result
+
+    async def clear(self, actor_id: str) -> None:
+        await self.limiter.clear(self.make_check(actor_id).key)
+
+
+class RateLimiter:
+    """Rate limiter with fixed window, sliding window counter and token bucket strategies.
+
+    Actors rejected by the backend are remembered in process until their retry time,
+    so repeated hits from clearly over-limit actors are rejected without a storage round trip.
+    `local_cache_size` bounds the number of remembered actors, 0 disables the cache."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        namespace: str = "rate_limit",
+        *,
+        local_cache_size: int = 10_000,
+    ) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.local_cache_size = local_cache_size
+        self._blocked: dict[str, float] = {}  # key -> monotonic time when the actor may retry
+
+    def make_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    def fixed_window(self, rate: Rate | str, namespace: str) -> RateLimitPolicy:
+        """Count hits in fixed, clock aligned windows. Cheap, but allows bursts of 2x rate at window edges."""
+        return RateLimitPolicy(self, FIXED_WINDOW, _to_rate(rate), namespace)
+
+    def sliding_window(self, rate: Rate | str, namespace: str) -> RateLimitPolicy:
+        """Approximate sliding window using weighted counters of the current and the previous windows."""
+        return RateLimitPolicy(self, SLIDING_WINDOW, _to_rate(rate), namespace)
+
+    def token_bucket(self, rate: Rate | str, namespace: str) -> RateLimitPolicy:
+        """Refill `rate.limit` tokens evenly over the period, allows bursts up to the limit."""
+        return RateLimitPolicy(self, TOKEN_BUCKET, _to_rate(rate), namespace)
+
+    async def check(self, hits: typing.Sequence[tuple[RateLimitPolicy, str, int]]) -> list[RateLimitResult]:
+        """Check (policy, actor_id, cost) hits in one storage call. Hits are counted only if all of them pass.
+
+        When any actor is blocked locally, the storage is not called: blocked hits are rejected
+        and the rest are reported as allowed with their full limit."""
+        checks = [policy.make_check(actor_id, cost) for policy, actor_id, cost in hits]
+        if self._blocked:
+            now = time.monotonic()
+            retry_afters = [self._get_local_retry_after(check.key, now) for check in checks]
+            if any(retry_afters):
+                results = []
+                for (policy, _, _), retry_after in zip(hits, retry_afters):
+                    limit = policy.rate.limit
+                    results.append(RateLimitResult(not retry_after, limit, 0 if retry_after else limit, 0, retry_after))
+                    rate_limit_checks_total.labels(
+                        policy.namespace, "limited_local" if retry_after else "allowed"
+                    ).inc()
+                return results
+
+        check_results = await self.backend.check(checks)
+        results = []
+        for (policy, _, _), check, check_result in zip(hits, checks, check_results):
+            result = _to_result(check, check_result)
+            results.append(result)
+            rate_limit_checks_total.labels(policy.namespace, "allowed" if result.allowed else "limited").inc()
+            if not result.allowed and result.retry_after > 0:
+                self._block(check.key, result.retry_after)
+        return results
+
+    async def clear(self, key: str) -> None:
+        self._blocked.pop(key, None)
+        await self.backend.clear(key)
+
+    def _get_local_retry_after(self, key: str, now: float) -> float:
+        blocked_until = self._blocked.get(key)
+        if blocked_until is None:
+            return 0.0
+        if blocked_until <= now:
+            del self._blocked[key]
+            return 0.0
+        return blocked_until - now
+
+    def _block(self, key: str, retry_after: float) -> None:
+        if self.local_cache_size <= 0:
+            return
+        now = time.monotonic()
+        if len(self._blocked) >= self.local_cache_size:
+            self._blocked = {key: until for key, until in self._blocked.items() if until > now}
+            if len(self._blocked) >= self.local_cache_size:
+                return
+        self._blocked[key] = now + retry_after
+
+    @classmethod
+    def from_url(cls, url: str, namespace: str = "rate_limit") -> RateLimiter:
+        """Create rate limiter from URL like "memory://" or "redis://localhost:6379/0"."""
+        schema = urlparse(url).scheme
+        backend: RateLimitBackend = MemoryRateLimitBackend()
+
+        if schema in ("redis", "rediss"):
+            try:
+                from redis.asyncio import Redis
+
+                backend = RedisRateLimitBackend(Redis.from_url(url))
+            except ImportError:
+                raise ImportError("Redis backend requires `redis` package installed.")
+
+        return cls(backend, namespace)
+
+
+def _to_rate(rate: Rate | str) -> Rate:
+    return Rate.parse(rate) if isinstance(rate, str) else rate
+
+
+def _to_result(check: RateLimitCheck, result: CheckResult) -> RateLimitResult:
+    return RateLimitResult(
+        allowed=result.allowed,
+        limit=check.limit,
+        remaining=max(result.remaining, 0),
+        reset_after=result.reset_after / 1000,
+        retry_after=result.retry_after / 1000,
+    )
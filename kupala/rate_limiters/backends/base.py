@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import abc
+import dataclasses
+import typing
+
+FIXED_WINDOW = "fixed_window"
+SLIDING_WINDOW = "sliding_window"
+TOKEN_BUCKET = "token_bucket"
+STRATEGIES = (FIXED_WINDOW, SLIDING_WINDOW, TOKEN_BUCKET)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class RateLimitCheck:
+    key: str
+    strategy: str
+    limit: int
+    period: int  # milliseconds
+    cost: int = 1
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CheckResult:
+    allowed: bool
+    remaining: int
+    reset_after: int  # milliseconds until the limit is fully restored
+    retry_after: int  # milliseconds until the rejected check would pass, 0 if allowed
+
+
+class RateLimitBackend(abc.ABC):  # pragma: no cover
+    @abc.abstractmethod
+    async def check(self, checks: typing.Sequence[RateLimitCheck]) -> list[CheckResult]:
+        """Evaluate all checks atomically. Hits are counted only when every check passes."""
+
+    @abc.abstractmethod
+    async def record(self, checks: typing.Sequence[RateLimitCheck]) -> list[CheckResult]:
+        """Count each check independently, used to sync hits served locally.
+        A check that does not fit is rejected and saturates the limit: units that still fit are counted."""
+
+    @abc.abstractmethod
+    async def clear(self, key: str) -> None:
+        pass
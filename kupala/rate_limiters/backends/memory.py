@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import dataclasses
+import math
+import time
+import typing
+
+from kupala.rate_limiters.backends.base import (
+    FIXED_WINDOW,
+    SLIDING_WINDOW,
+    TOKEN_BUCKET,
+    CheckResult,
+    RateLimitBackend,
+    RateLimitCheck,
+)
+
+type State = dict[str, float]
+
+
+def evaluate(check: RateLimitCheck, state: State | None, now: int) -> tuple[CheckResult, State, int]:
+    """Apply the strategy to the stored state. Returns the result, new state and its TTL in milliseconds.
+    The same algorithms are implemented in Lua by Redis backend."""
+    limit, period, cost = check.limit, check.period, check.cost
+    state = state or {}
+
+    if check.strategy == FIXED_WINDOW:
+        window = now // period
+        count = state["c"] if state.get("w") == window else 0
+        reset_after = (window + 1) * period - now
+        if count + cost <= limit:
+            count += cost
+            new_state = {"w": window, "c": count}
+            return CheckResult(True, int(limit - count), reset_after, 0), new_state, reset_after
+        return CheckResult(False, int(limit - count), reset_after, reset_after), state, reset_after
+
+    if check.strategy == SLIDING_WINDOW:
+        window = now // period
+        elapsed = now - window * period
+        current = previous = 0.0
+        if state.get("w") == window:
+            current, previous = state["c"], state["p"]
+        elif state.get("w") == window - 1:
+            previous = state["c"]
+
+        count = previous * (period - elapsed) / period + current
+        reset_after = (2 * period if current + cost > 0 else period) - elapsed
+        if count + cost <= limit:
+            new_state = {"w": window, "c": current + cost, "p": previous}
+            return CheckResult(True, int(limit - count - cost), reset_after, 0), new_state, 2 * period - elapsed
+
+        room = limit - current - cost
+        if room >= 0 and previous > 0:
+            retry_after = math.ceil(period - room * period / previous - elapsed)
+        else:
+            retry_after = period - elapsed
+        return CheckResult(False, max(int(limit - count), 0), reset_after, max(retry_after, 1)), state, 2 * period
+
+    if check.strategy == TOKEN_BUCKET:
+        tokens = float(limit)
+        if "t" in state:
+            tokens = min(float(limit), state["t"] + (now - state["ts"]) * limit / period)
+        if tokens >= cost:
+            tokens -= cost
+            reset_after = math.ceil((limit - tokens) * period / limit)
+            return CheckResult(True, int(tokens), reset_after, 0), {"t": tokens, "ts": now}, reset_after + 1
+        reset_after = math.ceil((limit - tokens) * period / limit)
+        retry_after = math.ceil((cost - tokens) * period / limit)
+        return CheckResult(False, int(tokens), reset_after, retry_after), state, reset_after + 1
+
+    raise ValueError(f"Unknown rate limit strategy: {check.strategy}.")
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Keeps counters in process memory. Suitable for tests and single process deployments."""
+
+    def __init__(self, clock: typing.Callable[[], float] = time.time) -> None:
+        self.clock = clock
+        self.states: dict[str, tuple[State, float]] = {}
+        self._sweep_size = 1024
+
+    def now(self) -> int:
+        return int(self.clock() * 1000)
+
+    async def check(self, checks: typing.Sequence[RateLimitCheck]) -> list[CheckResult]:
+        now = self.now()
+        results = []
+        updates = []
+        for check in checks:
+            state = self._get_state(check.key, now)
+            result, new_state, ttl = evaluate(check, state, now)
+            results.append(result)
+            updates.append((check.key, new_state, now + ttl))
+
+        if all(result.allowed for result in results):
+            self._update(updates, now)
+        return results
+
+    async def record(self, checks: typing.Sequence[RateLimitCheck]) -> list[CheckResult]:
+        now = self.now()
+        results = []
+        updates = []
+        for check in checks:
+            state = self._get_state(check.key, now)
+            result, new_state, ttl = evaluate(check, state, now)
+            counted = result.allowed
+            if not result.allowed and result.remaining > 0:  # saturate: count the units that still fit
+                saturated, new_state, ttl = evaluate(dataclasses.replace(check, cost=result.remaining), state, now)
+                result = dataclasses.replace(result, remaining=saturated.remaining, reset_after=saturated.reset_after)
+                counted = True
+            results.append(result)
+            if counted:
+                updates.append((check.key, new_state, now + ttl))
+        self._update(updates, now)
+        return results
+
+    def _update(self, updates: typing.Iterable[tuple[str, State, float]], now: int) -> None:
+        for key, new_state, expires_at in updates:
+            self.states[key] = (new_state, expires_at)
+        if len(self.states) > self._sweep_size:
+            self._sweep(now)
+
+    async def clear(self, key: str) -> None:
+        self.states.pop(key, None)
+
+    def _sweep(self, now: int) -> None:
+        self.states = {key: item for key, item in self.states.items() if item[1] > now}
+        self._sweep_size = max(1024, len(self.states) * 2)
+
+    def _get_state(self, key: str, now: int) -> State | None:
+        item = self.states.get(key)
+        if item is None:
+            return None
+        state, expires_at = item
+        if expires_at <= now:
+            del self.states[key]
+            return None
+        return state
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import importlib
+import types
+import typing
+
+from kupala.rate_limiters.backends.base import CheckResult, RateLimitBackend, RateLimitCheck
+
+if typing.TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+redis: types.ModuleType | None
+try:
+    redis = importlib.import_module("redis")
+except ImportError:  # pragma: no cover
+    redis = None
+
+# Evaluates all checks in one round trip, the algorithms mirror `kupala.rate_limiters.backends.memory.evaluate`.
+# KEYS: state key per check, ARGV: strategy, limit, period (ms), cost per check, followed by the mode:
+# "all" counts the checks only if all of them pass, "each" counts every check independently,
+# a check that does not fit counts the units that still do.
+# Returns allowed, remaining, reset_after (ms), retry_after (ms) per check.
+CHECK_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local results = {}
+local writes = {}
+local all_allowed = true
+local mode = ARGV[#KEYS * 4 + 1]
+
+-- returns allowed, remaining, reset_after, retry_after and the state to write if the check passes
+local function evaluate(key, strategy, limit, period, cost)
+    local allowed, remaining, reset_after, retry_after, write
+
+    if strategy == 'fixed_window' then
+        local state = redis.call('HMGET', key, 'w', 'c')
+        local window = math.floor(now / period)
+        local count = 0
+        if tonumber(state[1]) == window then count = tonumber(state[2]) end
+        reset_after = (window + 1) * period - now
+        if count + cost <= limit then
+            count = count + cost
+            allowed, retry_after = 1, 0
+            write = {key, reset_after, 'w', window, 'c', count}
+        else
+            allowed, retry_after = 0, reset_after
+        end
+        remaining = limit - count
+
+    elseif strategy == 'sliding_window' then
+        local state = redis.call('HMGET', key, 'w', 'c', 'p')
+        local window = math.floor(now / period)
+        local elapsed = now - window * period
+        local current, previous = 0, 0
+        if tonumber(state[1]) == window then
+            current, previous = tonumber(state[2]), tonumber(state[3])
+        elseif tonumber(state[1]) == window - 1 then
+            previous = tonumber(state[2])
+        end
+        local count = previous * (period - elapsed) / period + current
+        if current + cost > 0 then reset_after = 2 * period - elapsed else reset_after = period - elapsed end
+        if count + cost <= limit then
+            allowed, retry_after = 1, 0
+            remaining = math.floor(limit - count - cost)
+            write = {key, 2 * period - elapsed, 'w', window, 'c', current + cost, 'p', previous}
+        else
+            allowed = 0
+            remaining = math.max(math.floor(limit - count), 0)
+            local room = limit - current - cost
+            if room >= 0 and previous > 0 then
+                retry_after = math.ceil(period - room * period / previous - elapsed)
+            else
+                retry_after = period - elapsed
+            end
+            retry_after = math.max(retry_after, 1)
+        end
+
+    elseif strategy == 'token_bucket' then
+        local state = redis.call('HMGET', key, 't', 'ts')
+        local tokens = limit
+        if state[1] then
+            tokens = math.min(limit, tonumber(state[1]) + (now - tonumber(state[2])) * limit / period)
+        end
+        if tokens >= cost then
+            tokens = tokens - cost
+            allowed, retry_after = 1, 0
+            reset_after = math.ceil((limit - tokens) * period / limit)
+            write = {key, reset_after + 1, 't', string.format('%.17g', tokens), 'ts', now}
+        else
+            allowed = 0
+            reset_after = math.ceil((limit - tokens) * period / limit)
+            retry_after = math.ceil((cost - tokens) * period / limit)
+        end
+        remaining = math.floor(tokens)
+    end
+
+    return allowed, remaining, reset_after, retry_after, write
+end
+
+for i, key in ipairs(KEYS) do
+    local base = (i - 1) * 4
+    local strategy = ARGV[base + 1]
+    local limit = tonumber(ARGV[base + 2])
+    local period = tonumber(ARGV[base + 3])
+    local cost = tonumber(ARGV[base + 4])
+    local allowed, remaining, reset_after, retry_after, write = evaluate(key, strategy, limit, period, cost)
+    if allowed == nil then
+        return redis.error_reply('Unknown rate limit strategy: ' .. tostring(strategy))
+    end
+    if allowed == 0 and mode == 'each' and remaining > 0 then
+        -- saturate: count the units that still fit
+        local _
+        _, remaining, reset_after, _, write = evaluate(key, strategy, limit, period, remaining)
+    end
+
+    if allowed == 0 then all_allowed = false end
+    if write then writes[#writes + 1] = write end
+    results[#results + 1] = allowed
+    results[#results + 1] = remaining
+    results[#results + 1] = reset_after
+    results[#results + 1] = retry_after
+end
+
+if all_allowed or mode == 'each' then
+    for _, write in ipairs(writes) do
+        redis.call('HSET', write[1], unpack(write, 3))
+        redis.call('PEXPIRE', write[1], write[2])
+    end
+end
+return results
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Keeps counters in Redis. Every check (or batch of checks) is a single atomic Lua script call,
+    time is taken from Redis server so application clocks don't need to be in sync."""
+
+    def __init__(self, redis_client: Redis) -> None:
+        assert redis is not None, "Redis backend requires `redis` package installed."
+        self.redis_client = redis_client
+        self._script = redis_client.register_script(CHECK_SCRIPT)
+
+    async def check(self, checks: typing.Sequence[RateLimitCheck]) -> list[CheckResult]:
+        return await self._evaluate(checks, "all")
+
+    async def record(self, checks: typing.Sequence[RateLimitCheck]) -> list[CheckResult]:
+        return await self._evaluate(checks, "each")
+
+    async def _evaluate(self, checks: typing.Sequence[RateLimitCheck], mode: str) -> list[CheckResult]:
+        args: list[str | int] = []
+        for check in checks:
+            args.extend((check.strategy, check.limit, check.period, check.cost))
+        args.append(mode)
+
+        values = await self._script(keys=[check.key for check in checks], args=args)
+        return [
+            CheckResult(bool(values[index]), int(values[index + 1]), int(values[index + 2]), int(values[index + 3]))
+            for index in range(0, len(values), 4)
+        ]
+
+    async def clear(self, key: str) -> None:
+        await self.redis_client.delete(key)
@@ -1,7 +1,15 @@
+import typing
+
+from starlette.datastructures import Headers
 from starlette.requests import HTTPConnection, Request, empty_receive, empty_send
+from starlette.types import Scope
 
 __all__ = [
     "get_client_ip",
+    "get_header",
+    "get_headers",
+    "parse_accept_encoding",
+    "match_path_prefix",
     "Request",
     "HTTPConnection",
     "empty_receive",
@@ -9,6 +17,48 @@ __all__ = [
 ]
 
 
+_HEADER_INDEX_KEY = "kupala.header_index"
+_HEADERS_KEY = "kupala.headers"
+
+
+def _get_header_index(scope: Scope) -> dict[bytes, bytes]:
+    raw_headers = scope["headers"]
+    cached = scope.get(_HEADER_INDEX_KEY)
+    if cached is not None and cached[0] is raw_headers:
+        return typing.cast(dict[bytes, bytes], cached[1])
+
+    index = dict(reversed(raw_headers))  # the first value of repeated header wins
+    scope[_HEADER_INDEX_KEY] = (raw_headers, index)
+    return index
+
+
+def get_header(scope: Scope, name: bytes) -> bytes | None:
+    """Return the first raw header value by lowercased header name.
+
+    Headers are indexed once per request and the index is shared by all middleware via the scope.
+    The index is rebuilt when `scope["headers"]` is replaced, in-place modifications are not tracked."""
+    return _get_header_index(scope).get(name)
+
+
+def get_headers(scope: Scope) -> Headers:
+    """Return request headers, the instance is shared by all callers within the request."""
+    raw_headers = scope["headers"]
+    cached = scope.get(_HEADERS_KEY)
+    if cached is not None and cached[0] is raw_headers:
+        return typing.cast(Headers, cached[1])
+
+    headers = Headers(raw=raw_headers)
+    scope[_HEADERS_KEY] = (raw_headers, headers)
+    return headers
+
+
+def match_path_prefix(path: str, prefix: str) -> bool:
+    """Check if the path equals the prefix or lies under it: "/upload" matches "/upload/avatar" but not "/uploads"."""
+    if not path.startswith(prefix):
+        return False
+    return len(path) == len(prefix) or prefix.endswith("/") or path[len(prefix)] == "/"
+
+
 def get_client_ip(request: Request) -> str:
     """Get client IP address from the request."""
     x_forwarded_for = request.headers.get("x-forwarded-for")
@@ -22,3 +72,23 @@ def get_client_ip(request: Request) -> str:
 def is_submitted(request: Request) -> bool:
     """Check if the request is submitted."""
     return request.method in ["POST", "PUT", "PATCH", "DELETE"]
+
+
+def parse_accept_encoding(value: str) -> dict[str, float]:
+    """Parse Accept-Encoding header value into a mapping of content coding to its quality."""
+    encodings: dict[str, float] = {}
+    for item in value.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        quality = 1.0
+        params = params.strip()
+        if params.startswith(("q=", "Q=")):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[coding] = quality
+    return encodings
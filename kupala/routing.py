@@ -1,5 +1,26 @@
-from starlette.routing import BaseRoute, Host, Mount, Route, Router, WebSocketRoute
-from starlette_dispatch import RouteGroup
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import inspect
+import time
+import typing
+
+from starlette._utils import get_route_path
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import URL
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import RedirectResponse, Response
+from starlette.routing import BaseRoute, Host, Match, Route, WebSocketRoute
+from starlette.routing import Mount as BaseMount
+from starlette.routing import Router as BaseRouter
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette_dispatch import RouteGroup as BaseRouteGroup
+from starlette_dispatch.route_group import unwrap_callable
+
+from kupala.dependency_plans import TEARDOWN_SCOPE_KEY, PlanCache, call_endpoint
+from kupala.timings import Timings, get_timings
 
 __all__ = [
     "RouteGroup",
@@ -9,4 +30,273 @@ __all__ = [
     "BaseRoute",
     "Host",
     "WebSocketRoute",
+    "DispatchIndex",
+    "compile_dependency_plans",
 ]
+
+PLAN_ATTRIBUTE = "__kupala_dependency_plan__"
+
+
+def _static_segments(path: str) -> tuple[str, ...]:
+    segments: list[str] = []
+    for segment in path.split("/")[1:]:
+        if "{" in segment:
+            break
+        segments.append(segment)
+    return tuple(segments)
+
+
+def _split_path(route_path: str) -> list[str]:
+    return route_path[1:].split("/") if route_path.startswith("/") else []
+
+
+def _find_route(routes: typing.Iterable[BaseRoute], scope: Scope, prefix: str = "") -> tuple[BaseRoute, str] | None:
+    for route in routes:
+        match, child_scope = route.matches(scope)
+        if match != Match.FULL:
+            continue
+        route_name = getattr(route, "name", None)
+        name = prefix + route_name if route_name else ""
+        if isinstance(route, BaseMount) and route.routes:
+            child_prefix = f"{name}:" if route_name else prefix  # the same naming as in `url_path_for`
+            return _find_route(route.routes, {**scope, **child_scope}, child_prefix) or (route, name)
+        return route, name
+    return None
+
+
+@dataclasses.dataclass(slots=True)
+class _Node:
+    children: dict[str, _Node] = dataclasses.field(default_factory=dict)
+    routes: list[tuple[int, BaseRoute]] = dataclasses.field(default_factory=list)
+
+
+class DispatchIndex:
+    """Prefix tree of routes keyed on the leading static segments of their paths.
+
+    A route with path "/users/{id}" is stored under "users" node and is tried only for paths starting with "/users/".
+    Routes without static prefix, Host routes and routes with custom matching are tried for every path.
+    Candidates are returned in the original order, so the first matching route is the same as with linear scan."""
+
+    def __init__(self, routes: typing.Sequence[BaseRoute]) -> None:
+        self._root = _Node()
+        for index, route in enumerate(routes):
+            node = self._root
+            for segment in self._route_prefix(route):
+                node = node.children.setdefault(segment, _Node())
+            node.routes.append((index, route))
+
+    def candidates(self, route_path: str) -> list[BaseRoute]:
+        """Return routes that may match the path, in the declaration order."""
+        node = self._root
+        found = list(node.routes)
+        for segment in _split_path(route_path):
+            next_node = node.children.get(segment)
+            if next_node is None:
+                break
+            node = next_node
+            found.extend(node.routes)
+
+        found.sort(key=lambda item: item[0])
+        return [route for _, route in found]
+
+    def _route_prefix(self, route: BaseRoute) -> tuple[str, ...]:
+        route_type = type(route)
+        if isinstance(route, Route) and route_type.matches is Route.matches:
+            return _static_segments(route.path)
+        if isinstance(route, WebSocketRoute) and route_type.matches is WebSocketRoute.matches:
+            return _static_segments(route.path)
+        if isinstance(route, BaseMount) and route_type.matches is BaseMount.matches:
+            return _static_segments(route.path)
+        return ()
+
+
+class Router(BaseRouter):
+    """Router that tries only routes sharing the static path prefix with the request path.
+    The matching result is the same as of Starlette's Router.
+
+    The index is built on the first request and rebuilt when the number of routes changes.
+    Call `rebuild_index` after replacing routes in place."""
+
+    _dispatch_index: DispatchIndex | None = None
+    _indexed_routes_count: int = -1
+
+    @property
+    def dispatch_index(self) -> DispatchIndex:
+        if self._dispatch_index is None or self._indexed_routes_count != len(self.routes):
+            self.rebuild_index()
+        return typing.cast(DispatchIndex, self._dispatch_index)
+
+    def rebuild_index(self) -> None:
+        self._dispatch_index = DispatchIndex(self.routes)
+        self._indexed_routes_count = len(self.routes)
+
+    def find_route(self, scope: Scope) -> BaseRoute | None:
+        """Return the route that fully matches the request, without handling it.
+        Routes of mounted routers are searched too, the mount is returned when none of them match."""
+        found = self.find_named_route(scope)
+        return found[0] if found else None
+
+    def find_named_route(self, scope: Scope) -> tuple[BaseRoute, str] | None:
+        """Same as `find_route`, also returns the route name qualified by names of its mounts ("admin:users"),
+        as accepted by `url_path_for`."""
+        return _find_route(self.dispatch_index.candidates(get_route_path(scope)), scope)
+
+    async def app(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] in ("http", "websocket", "lifespan")
+
+        if "router" not in scope:
+            scope["router"] = self
+
+        if scope["type"] == "lifespan":
+            await self.lifespan(scope, receive, send)
+            return
+
+        started_at = 0.0
+        timings = get_timings()
+        if timings is not None:
+            started_at = time.perf_counter()
+            if scope["router"] is self:
+                timings.add("middleware", started_at - timings.started_at)
+
+        partial: BaseRoute | None = None
+        partial_scope: Scope = {}
+        route_path = get_route_path(scope)
+        for route in self.dispatch_index.candidates(route_path):
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                scope["route"] = route
+                scope.update(child_scope)
+                await self.handle_route(route, scope, receive, send, timings, started_at)
+                return
+            elif match == Match.PARTIAL and partial is None:
+                partial = route
+                partial_scope = child_scope
+
+        if partial is not None:
+            scope["route"] = partial
+            scope.update(partial_scope)
+            await self.handle_route(partial, scope, receive, send, timings, started_at)
+            return
+
+        if scope["type"] == "http" and self.redirect_slashes and route_path != "/":
+            redirect_scope = dict(scope)
+            if route_path.endswith("/"):
+                redirect_scope["path"] = redirect_scope["path"].rstrip("/")
+            else:
+                redirect_scope["path"] = redirect_scope["path"] + "/"
+
+            for route in self.dispatch_index.candidates(get_route_path(redirect_scope)):
+                match, child_scope = route.matches(redirect_scope)
+                if match != Match.NONE:
+                    response = RedirectResponse(url=str(URL(scope=redirect_scope)))
+                    await response(scope, receive, send)
+                    return
+
+        await self.default(scope, receive, send)
+
+    async def handle_route(
+        self, route: BaseRoute, scope: Scope, receive: Receive, send: Send, timings: Timings | None, started_at: float
+    ) -> None:
+        if (path := getattr(route, "path", None)) is not None:  # used to label metrics and logs
+            scope["route_template"] = scope.get("route_template", "") + path
+
+        if timings is None:
+            await route.handle(scope, receive, send)
+            return
+
+        timings.add("routing", time.perf_counter() - started_at)
+        if isinstance(route, BaseMount) and isinstance(route.app, BaseRouter):
+            await route.handle(scope, receive, send)  # the child router records the handler span
+            return
+
+        timings.begin("handler")
+        try:
+            await route.handle(scope, receive, send)
+        finally:
+            timings.end("handler")
+
+
+class Mount(BaseMount):
+    """Mount that dispatches child routes with indexed Router."""
+
+    def __init__(
+        self,
+        path: str,
+        app: ASGIApp | None = None,
+        routes: typing.Sequence[BaseRoute] | None = None,
+        name: str | None = None,
+        *,
+        middleware: typing.Sequence[Middleware] | None = None,
+    ) -> None:
+        if app is None and routes is not None:
+            app = Router(routes=routes)
+        super().__init__(path, app=app, name=name, middleware=middleware)
+
+
+class _EndpointRoute(Route):
+    """Route that exits context managers of endpoint dependencies after the response is sent."""
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async with contextlib.AsyncExitStack() as stack:
+            scope[TEARDOWN_SCOPE_KEY] = stack
+            try:
+                await super().handle(scope, receive, send)
+            finally:
+                del scope[TEARDOWN_SCOPE_KEY]
+
+
+class RouteGroup(BaseRouteGroup):
+    """Route group which resolves endpoint dependencies with precompiled plans,
+    see `kupala.dependency_plans.ResolutionPlan`.
+
+    Context managers of dependencies exit after the response is sent only when the request is handled
+    by the route added by the group. Decorated endpoints mounted or called some other way exit them
+    when the endpoint returns, see `kupala.dependency_plans.call_endpoint`."""
+
+    def add(
+        self,
+        path: str,
+        *,
+        methods: list[str] | None = None,
+        name: str | None = None,
+        middleware: typing.Sequence[Middleware] | None = None,
+    ) -> typing.Callable[[typing.Callable[..., typing.Any]], typing.Callable[[Request], typing.Awaitable[Response]]]:
+        path = self.prefix.removesuffix("/") + path if self.prefix else path
+
+        def decorator(
+            view_callable: typing.Callable[..., typing.Any],
+        ) -> typing.Callable[[Request], typing.Awaitable[Response]]:
+            # find the original view callable in order to parse the dependencies
+            plans = PlanCache(unwrap_callable(view_callable))
+            if inspect.iscoroutinefunction(view_callable):
+                call = view_callable
+            else:
+
+                async def call(**dependencies: typing.Any) -> typing.Any:
+                    return await run_in_threadpool(view_callable, **dependencies)
+
+            async def endpoint(request: Request) -> Response:
+                return await call_endpoint(plans.get(request.app), request, call)
+
+            setattr(endpoint, PLAN_ATTRIBUTE, plans)
+            self.routes.append(
+                _EndpointRoute(
+                    path,
+                    endpoint,
+                    name=name,
+                    methods=methods,
+                    middleware=[*self._common_middleware, *(middleware or [])],
+                )
+            )
+            return endpoint
+
+        return decorator
+
+
+def compile_dependency_plans(routes: typing.Iterable[BaseRoute], app: typing.Any) -> None:
+    """Compile dependency resolution plans of all route group endpoints, so the first requests don't pay for it."""
+    for route in routes:
+        if plans := getattr(getattr(route, "endpoint", None), PLAN_ATTRIBUTE, None):
+            plans.get(app)
+        if isinstance(route, BaseMount):
+            compile_dependency_plans(route.routes, app)
@@ -1,3 +1,439 @@
-from starlette.staticfiles import StaticFiles
+from __future__ import annotations
 
-__all__ = ["StaticFiles"]
+import collections
+import dataclasses
+import gzip
+import hashlib
+import importlib
+import json
+import mimetypes
+import os
+import pathlib
+import shutil
+import stat
+import threading
+import time
+import types
+import typing
+from email.utils import formatdate
+
+import anyio
+import click
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, PathLike
+from starlette.staticfiles import StaticFiles as BaseStaticFiles
+from starlette.types import Scope
+
+from kupala.applications import AppConfig, Kupala
+from kupala.requests import get_headers, parse_accept_encoding
+
+brotli: types.ModuleType | None
+try:
+    brotli = importlib.import_module("brotli")
+except ImportError:  # pragma: no cover
+    brotli = None
+
+zstandard: types.ModuleType | None
+try:
+    zstandard = importlib.import_module("zstandard")
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+__all__ = ["StaticFiles", "StaticManifest", "get_precompress_encodings", "precompress_file"]
+
+
+class StaticManifest:
+    """Maps static file paths to their content-hashed copies.
+
+    The manifest is written by `static collect` command and loaded into memory on first lookup."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        *,
+        sources: typing.Sequence[str | os.PathLike[str]] = (),
+        manifest_file: str = "manifest.json",
+        hash_length: int = 12,
+    ) -> None:
+        self.directory = pathlib.Path(directory)
+        self.sources = [pathlib.Path(source) for source in sources]
+        self.manifest_file = manifest_file
+        self.hash_length = hash_length
+        self._paths: dict[str, str] | None = None
+        self._hashed_paths: frozenset[str] = frozenset()
+
+    @property
+    def paths(self) -> dict[str, str]:
+        if self._paths is None:
+            self.load()
+        return typing.cast(dict[str, str], self._paths)
+
+    def load(self) -> None:
+        """Read the manifest file from disk. Missing manifest means an empty one."""
+        manifest_path = self.directory / self.manifest_file
+        paths: dict[str, str] = {}
+        if manifest_path.is_file():
+            paths = json.loads(manifest_path.read_text())["paths"]
+        self._set_paths(paths)
+
+    def lookup(self, path: str) -> str | None:
+        """Return content-hashed path for the given static path."""
+        return self.paths.get(path)
+
+    def is_hashed(self, path: str) -> bool:
+        """Test if the path points to a content-hashed file."""
+        if self._paths is None:
+            self.load()
+        return path in self._hashed_paths
+
+    def hashed_name(self, path: str, digest: str) -> str:
+        file_path = pathlib.PurePosixPath(path)
+        return file_path.with_name(f"{file_path.stem}.{digest[: self.hash_length]}{file_path.suffix}").as_posix()
+
+    def collect(self) -> dict[str, str]:
+        """Copy files from sources into the directory under original and content-hashed names,
+        then write the manifest. If several sources contain the same path, the first one wins."""
+        paths: dict[str, str] = {}
+        for source in self.sources:
+            assert source.resolve() != self.directory.resolve(), "Source directory must differ from the output one."
+            for file_path in sorted(source.rglob("*")):
+                if not file_path.is_file():
+                    continue
+
+                path = file_path.relative_to(source).as_posix()
+                if path in paths:
+                    continue
+
+                with file_path.open("rb") as f:
+                    digest = hashlib.file_digest(f, "md5").hexdigest()
+
+                paths[path] = self.hashed_name(path, digest)
+                for target in (path, paths[path]):
+                    destination = self.directory / target
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(file_path, destination)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.directory / self.manifest_file
+        temp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        temp_path.write_text(json.dumps({"version": 1, "paths": paths}, indent=2, sort_keys=True))
+        os.replace(temp_path, manifest_path)
+        self._set_paths(paths)
+        return paths
+
+    def _set_paths(self, paths: dict[str, str]) -> None:
+        self._paths = paths
+        self._hashed_paths = frozenset(paths.values())
+
+    def configure_application(self, app_config: AppConfig) -> None:
+        app_config.state["static_manifest"] = self
+        app_config.commands.append(static_command)
+
+    @classmethod
+    def of(cls, app: Kupala) -> typing.Self:
+        return typing.cast(typing.Self, app.state.static_manifest)
+
+
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+COMPRESSIBLE_EXTENSIONS = frozenset(
+    {".css", ".js", ".mjs", ".map", ".json", ".svg", ".html", ".txt", ".xml", ".wasm", ".ttf", ".otf", ".ico"}
+)
+
+
+def _stat_key(stat_result: os.stat_result) -> tuple[int, int, int]:
+    return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+
+
+@dataclasses.dataclass(slots=True)
+class _FileVariant:
+    path: str
+    stat_result: os.stat_result
+    etag: str
+    content: bytes | None = None
+
+
+@dataclasses.dataclass(slots=True)
+class _StaticFile:
+    media_type: str
+    variants: dict[str, _FileVariant]  # content coding -> variant, "identity" is the file itself
+    checked_at: float = 0.0  # monotonic time of the last check that the files are unchanged
+
+    def is_fresh(self) -> bool:
+        """Check that the files were not replaced or modified since they were loaded. Executed in a worker thread."""
+        for variant in self.variants.values():
+            try:
+                stat_result = os.stat(variant.path)
+            except OSError:
+                return False
+            if _stat_key(stat_result) != _stat_key(variant.stat_result):
+                return False
+        return True
+
+    @property
+    def memory_size(self) -> int:
+        return sum(len(variant.content) for variant in self.variants.values() if variant.content is not None)
+
+
+class StaticFiles(BaseStaticFiles):
+    """Static files application.
+
+    Content-hashed files listed in the manifest are served with long-lived immutable `Cache-Control` header.
+    When no manifest given, the one registered in the application is used.
+
+    If a file has precompressed siblings (`app.css.br`, `app.css.zst`, `app.css.gz`),
+    the best one accepted by the client is served. File lookups are cached in memory, small files
+    are kept in memory too. Cached files are checked for changes (modification time, size and inode)
+    at most once per `cache_revalidate_interval` seconds, so files replaced in place are picked up.
+    The cache is bypassed in debug mode, set `cache_size=0` to disable it completely."""
+
+    def __init__(
+        self,
+        *,
+        directory: PathLike | None = None,
+        packages: list[str | tuple[str, str]] | None = None,
+        html: bool = False,
+        check_dir: bool = True,
+        follow_symlink: bool = False,
+        manifest: StaticManifest | None = None,
+        immutable_max_age: int = 365 * 24 * 60 * 60,
+        precompressed: typing.Sequence[str] = ("br", "zstd", "gzip"),
+        cache_size: int = 1024,
+        cache_file_size: int = 64 * 1024,
+        cache_memory_limit: int = 16 * 1024 * 1024,
+        cache_revalidate_interval: float = 1.0,
+    ) -> None:
+        super().__init__(
+            directory=directory,
+            packages=packages,
+            html=html,
+            check_dir=check_dir,
+            follow_symlink=follow_symlink,
+        )
+        self.manifest = manifest
+        self.immutable_max_age = immutable_max_age
+        self.precompressed = [encoding for encoding in precompressed if encoding in PRECOMPRESSED_SUFFIXES]
+        self.cache_size = cache_size
+        self.cache_file_size = cache_file_size
+        self.cache_memory_limit = cache_memory_limit
+        self.cache_revalidate_interval = cache_revalidate_interval
+        self._cache: collections.OrderedDict[str, _StaticFile] = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_memory = 0
+
+    def get_manifest(self, scope: Scope) -> StaticManifest | None:
+        if self.manifest is None and "app" in scope:
+            return getattr(scope["app"].state, "static_manifest", None)
+        return self.manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        static_file = self._cache_get(path)
+        if static_file is not None and time.monotonic() - static_file.checked_at >= self.cache_revalidate_interval:
+            if await anyio.to_thread.run_sync(static_file.is_fresh):
+                static_file.checked_at = time.monotonic()
+            else:
+                static_file = None
+
+        if static_file is None:
+            use_cache = self.cache_size > 0 and not getattr(scope.get("app"), "debug", False)
+            try:
+                static_file = await anyio.to_thread.run_sync(self.load_file, path, use_cache)
+            except (OSError, ValueError):
+                static_file = None
+
+            # directories, missing files and lookup errors are handled by the default implementation
+            if static_file is None:
+                return await super().get_response(path, scope)
+
+        return self.static_file_response(static_file, scope)
+
+    def load_file(self, path: str, use_cache: bool = True) -> _StaticFile | None:
+        """Look up the file and its precompressed siblings. Executed in a worker thread."""
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+
+        variants = {"identity": self._load_variant(full_path, stat_result, "identity", use_cache)}
+        for encoding in self.precompressed:
+            variant_path = full_path + PRECOMPRESSED_SUFFIXES[encoding]
+            try:
+                variant_stat = os.stat(variant_path)
+            except OSError:
+                continue
+            if stat.S_ISREG(variant_stat.st_mode):
+                variants[encoding] = self._load_variant(variant_path, variant_stat, encoding, use_cache)
+
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        static_file = _StaticFile(media_type=media_type, variants=variants, checked_at=time.monotonic())
+        if use_cache:
+            self._cache_put(path, static_file)
+        return static_file
+
+    def select_encoding(self, static_file: _StaticFile, accept_encoding: str) -> str:
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in self.precompressed:
+            if encoding in static_file.variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return "identity"
+
+    def static_file_response(self, static_file: _StaticFile, scope: Scope) -> Response:
+        request_headers = get_headers(scope)
+        has_range = "range" in request_headers
+
+        encoding = "identity"
+        if not has_range and len(static_file.variants) > 1:
+            encoding = self.select_encoding(static_file, request_headers.get("accept-encoding", ""))
+
+        variant = static_file.variants[encoding]
+        headers = {"etag": variant.etag}
+        if len(static_file.variants) > 1:
+            headers["vary"] = "Accept-Encoding"
+        if encoding != "identity":
+            headers["content-encoding"] = encoding
+
+        response: Response
+        if variant.content is not None and not has_range:
+            headers["last-modified"] = formatdate(variant.stat_result.st_mtime, usegmt=True)
+            response = Response(variant.content, media_type=static_file.media_type, headers=headers)
+        else:
+            # FileResponse uses zero-copy "http.response.pathsend" when the server supports it
+            response = FileResponse(
+                variant.path,
+                stat_result=variant.stat_result,
+                media_type=static_file.media_type,
+                headers=headers,
+            )
+
+        self.set_cache_headers(response, scope)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def file_response(
+        self,
+        full_path: PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = get_headers(scope)
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        self.set_cache_headers(response, scope)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def set_cache_headers(self, response: Response, scope: Scope) -> None:
+        manifest = self.get_manifest(scope)
+        if manifest and manifest.is_hashed(pathlib.PurePath(self.get_path(scope)).as_posix()):
+            response.headers["cache-control"] = f"public, max-age={self.immutable_max_age}, immutable"
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_memory = 0
+
+    def _load_variant(self, path: str, stat_result: os.stat_result, encoding: str, use_cache: bool) -> _FileVariant:
+        etag_base = f"{stat_result.st_mtime_ns}-{stat_result.st_size}-{encoding}"
+        etag = f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+        content: bytes | None = None
+        if use_cache and stat_result.st_size <= self.cache_file_size:
+            with open(path, "rb") as f:
+                content = f.read()
+        return _FileVariant(path=path, stat_result=stat_result, etag=etag, content=content)
+
+    def _cache_get(self, path: str) -> _StaticFile | None:
+        with self._cache_lock:
+            static_file = self._cache.get(path)
+            if static_file is not None:
+                self._cache.move_to_end(path)
+            return static_file
+
+    def _cache_put(self, path: str, static_file: _StaticFile) -> None:
+        with self._cache_lock:
+            if (previous := self._cache.pop(path, None)) is not None:
+                self._cache_memory -= previous.memory_size
+
+            self._cache[path] = static_file
+            self._cache_memory += static_file.memory_size
+            while self._cache and (len(self._cache) > self.cache_size or self._cache_memory > self.cache_memory_limit):
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_memory -= evicted.memory_size
+
+
+def get_precompress_encodings() -> list[str]:
+    """Return content codings available for precompression in this environment."""
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.insert(0, "br")
+    if zstandard is not None:
+        encodings.insert(-1, "zstd")
+    return encodings
+
+
+def precompress_file(path: pathlib.Path, encodings: typing.Sequence[str] | None = None) -> list[pathlib.Path]:
+    """Write compressed siblings of the file. Up-to-date siblings are not rewritten,
+    siblings that are not smaller than the original are not written at all.
+    Raises ValueError if the compression package of a requested encoding is not installed."""
+    available = get_precompress_encodings()
+    for encoding in encodings or ():
+        if encoding not in available:
+            package = {"br": "brotli", "zstd": "zstandard"}.get(encoding)
+            hint = f', install "{package}" package' if package else ""
+            raise ValueError(f'Encoding "{encoding}" is not available for precompression{hint}.')
+
+    written: list[pathlib.Path] = []
+    content = path.read_bytes()
+    source_mtime = path.stat().st_mtime
+    for encoding in encodings or available:
+        destination = path.with_name(path.name + PRECOMPRESSED_SUFFIXES[encoding])
+        if destination.exists() and destination.stat().st_mtime >= source_mtime:
+            continue
+
+        if encoding == "br":
+            assert brotli is not None
+            compressed = brotli.compress(content, quality=11)
+        elif encoding == "zstd":
+            assert zstandard is not None
+            compressed = zstandard.ZstdCompressor(level=19).compress(content)
+        else:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+
+        if len(compressed) < len(content):
+            destination.write_bytes(compressed)
+            written.append(destination)
+    return written
+
+
+static_command = click.Group("static", help="Static files commands.")
+
+
+@static_command.command("collect")
+@click.pass_obj
+def collect_command(app: Kupala) -> None:
+    """Copy static files under content-hashed names and write the manifest."""
+    manifest = StaticManifest.of(app)
+    paths = manifest.collect()
+    click.echo(f"Collected {len(paths)} files into {manifest.directory}.")
+
+
+@static_command.command("compress")
+@click.argument("directory", required=False, type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path))
+@click.option("--min-size", default=256, help="Skip files smaller than this, in bytes.")
+@click.pass_obj
+def compress_command(app: Kupala, directory: pathlib.Path | None, min_size: int) -> None:
+    """Write precompressed siblings (.br, .zst, .gz) next to static files."""
+    if directory is None:
+        manifest: StaticManifest | None = getattr(app.state, "static_manifest", None)
+        if manifest is None:
+            raise click.ClickException("No directory given and no static manifest configured.")
+        directory = manifest.directory
+
+    encodings = get_precompress_encodings()
+    written = 0
+    for path in sorted(directory.rglob("*")):
+        if path.suffix in COMPRESSIBLE_EXTENSIONS and path.is_file() and path.stat().st_size >= min_size:
+            written += len(precompress_file(path, encodings))
+    click.echo(f"Written {written} compressed files ({', '.join(encodings)}) into {directory}.")
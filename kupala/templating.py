@@ -12,6 +12,8 @@ from starlette_dispatch import VariableResolver
 from starlette_flash import flash
 
 from kupala.applications import AppConfig, Kupala
+from kupala.loop_monitor import check_blocking_call
+from kupala.timings import span
 from kupala.translations import get_language
 from kupala.urls import (
     abs_url_for,
@@ -64,9 +66,15 @@ class Templates(Jinja2Templates):
             context_processors=list(context_processors),
         )
 
+    def TemplateResponse(self, *args: typing.Any, **kwargs: typing.Any) -> Response:  # type: ignore[override]
+        with span("template"):
+            return super().TemplateResponse(*args, **kwargs)
+
     def render(self, name: str, context: dict[str, typing.Any] | None = None) -> str:
-        template = self.env.get_template(name)
-        return template.render(context or {})
+        check_blocking_call("Templates.render")
+        with span("template"):
+            template = self.env.get_template(name)
+            return template.render(context or {})
 
     def render_macro(
         self,
@@ -74,10 +82,12 @@ class Templates(Jinja2Templates):
         macro: str,
         args: dict[str, typing.Any] | None = None,
     ) -> str:
-        template: jinja2.Template = self.env.get_template(name)
-        template_module = template.make_module({})
-        callback = getattr(template_module, macro)
-        return typing.cast(str, callback(**args or {}))
+        check_blocking_call("Templates.render_macro")
+        with span("template"):
+            template: jinja2.Template = self.env.get_template(name)
+            template_module = template.make_module({})
+            callback = getattr(template_module, macro)
+            return typing.cast(str, callback(**args or {}))
 
     def render_block(
         self,
@@ -85,10 +95,12 @@ class Templates(Jinja2Templates):
         block: str,
         context: dict[str, typing.Any] | None = None,
     ) -> str:
-        template = self.env.get_template(name)
-        callback = template.blocks[block]
-        template_context = template.new_context(context or {})
-        return "".join(callback(template_context))
+        check_blocking_call("Templates.render_block")
+        with span("template"):
+            template = self.env.get_template(name)
+            callback = template.blocks[block]
+            template_context = template.new_context(context or {})
+            return "".join(callback(template_context))
 
     def render_to_response(
         self,
@@ -99,7 +111,7 @@ class Templates(Jinja2Templates):
         headers: typing.Mapping[str, str] | None = None,
         media_type: str | None = None,
     ) -> Response:
-        return super().TemplateResponse(
+        return self.TemplateResponse(
             request,
             name,
             context,
@@ -121,7 +133,7 @@ def app_processor(request: Request) -> dict[str, typing.Any]:
     """Add general context to the template."""
     return {
         "app": request.app,
-        "url": request.url_for,
+        "url": functools.partial(abs_url_for, request),
         "abs_url": functools.partial(abs_url_for, request),
         "static_url": functools.partial(static_url, request),
         "media_url": functools.partial(media_url, request),
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import dataclasses
+import time
+import typing
+
+__all__ = [
+    "Timings",
+    "get_timings",
+    "record",
+    "span",
+    "collect_timings",
+]
+
+
+@dataclasses.dataclass(slots=True)
+class Span:
+    duration: float = 0.0
+    count: int = 0
+    started_at: float | None = None
+
+
+class Timings:
+    """Accumulates time spent in request phases. Spans with the same name are summed up."""
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.spans: dict[str, Span] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        item = self.spans.get(name)
+        if item is None:
+            item = self.spans[name] = Span()
+        item.duration += duration
+        item.count += 1
+
+    def begin(self, name: str) -> None:
+        """Start a span that is finished by `end` call. Open spans are measured up to now when reported."""
+        item = self.spans.setdefault(name, Span())
+        item.started_at = time.perf_counter()
+
+    def end(self, name: str) -> None:
+        item = self.spans.get(name)
+        if item is not None and item.started_at is not None:
+            item.duration += time.perf_counter() - item.started_at
+            item.count += 1
+            item.started_at = None
+
+    def as_dict(self) -> dict[str, float]:
+        """Return durations in milliseconds, including "total" elapsed since the start."""
+        now = time.perf_counter()
+        result = {"total": (now - self.started_at) * 1000}
+        for name, item in self.spans.items():
+            duration = item.duration + (now - item.started_at if item.started_at is not None else 0)
+            result[name] = duration * 1000
+        return result
+
+    def to_header(self) -> str:
+        """Format timings as a Server-Timing header value."""
+        parts = []
+        for name, duration in self.as_dict().items():
+            count = self.spans[name].count if name in self.spans else 0
+            part = f"{name};dur={duration:.2f}"
+            if count > 1:
+                part += f';desc="{count}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+_current_timings: contextvars.ContextVar[Timings | None] = contextvars.ContextVar("kupala_timings", default=None)
+
+
+def get_timings() -> Timings | None:
+    """Return timings of the current request or None if they are not collected."""
+    return _current_timings.get()
+
+
+def record(name: str, duration: float) -> None:
+    """Add measured duration (in seconds) to the current request timings."""
+    if (timings := _current_timings.get()) is not None:
+        timings.add(name, duration)
+
+
+@contextlib.contextmanager
+def span(name: str) -> typing.Generator[None, None, None]:
+    """Measure the block and add it to the current request timings. Does nothing when timings are not collected."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started_at)
+
+
+@contextlib.contextmanager
+def collect_timings() -> typing.Generator[Timings, None, None]:
+    """Collect timings of the code inside the block."""
+    timings = Timings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
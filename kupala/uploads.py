@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import collections
+import dataclasses
+import fnmatch
+import typing
+
+import anyio
+from async_storages import generate_file_path
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import ImmutableMultiDict
+from starlette.requests import Request
+
+from kupala.exceptions import BadRequest, PayloadTooLarge, UnprocessableEntity
+
+if typing.TYPE_CHECKING:
+    from kupala.files import Files
+
+__all__ = [
+    "Upload",
+    "StoredFile",
+    "get_uploads",
+    "stream_form",
+    "delete_files",
+]
+
+MULTIPART_CONTENT_TYPE = b"multipart/form-data"
+
+
+@dataclasses.dataclass(frozen=True)
+class Upload:
+    """Declares a form field whose files are streamed to the file storage while the request is read.
+
+    `destination` is the path template, see `kupala.files.generate_file_path` for the tokens.
+    `max_size` limits every file in bytes, `content_types` is a list of allowed types, wildcards are supported.
+    Files are written to `storage` or to the application's `Files` when omitted.
+
+    Usage:
+        @dataclasses.dataclass
+        class ProfileForm:
+            name: str
+            avatar: typing.Annotated[StoredFile, Upload("avatars/{uuid}.{extension}", content_types=["image/*"])]
+    """
+
+    destination: str
+    max_size: int | None = None
+    content_types: typing.Sequence[str] | None = None
+    storage: Files | None = None
+
+    def accepts(self, content_type: str) -> bool:
+        if self.content_types is None:
+            return True
+        return any(fnmatch.fnmatchcase(content_type, pattern) for pattern in self.content_types)
+
+
+@dataclasses.dataclass(frozen=True)
+class StoredFile:
+    """Uploaded file written to the file storage."""
+
+    path: str
+    filename: str
+    content_type: str
+    size: int
+
+
+_uploads: dict[typing.Any, dict[str, Upload]] = {}
+
+
+def get_uploads(tp: typing.Any) -> dict[str, Upload]:
+    """Return upload declarations of the form class fields, keyed by the field name. Cached per class."""
+    uploads = _uploads.get(tp)
+    if uploads is None:
+        uploads = {}
+        if isinstance(tp, type):
+            for name, hint in typing.get_type_hints(tp, include_extras=True).items():
+                for meta in getattr(hint, "__metadata__", ()):
+                    if isinstance(meta, Upload):
+                        uploads[name] = meta
+        _uploads[tp] = uploads
+    return uploads
+
+
+@dataclasses.dataclass(slots=True)
+class _Part:
+    name: str = ""
+    filename: str | None = None
+    content_type: str = "application/octet-stream"
+
+
+type _Event = (
+    tuple[typing.Literal["begin"], _Part] | tuple[typing.Literal["data"], bytes] | tuple[typing.Literal["end"], None]
+)
+
+
+class _MultipartStream:
+    """Pull parser: yields multipart events, reading the request body only when no parsed events are left."""
+
+    def __init__(self, request: Request, boundary: bytes) -> None:
+        self._chunks = request.stream().__aiter__()
+        self._events: collections.deque[_Event] = collections.deque()
+        self._finished = False
+        self._part = _Part()
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    async def next_event(self) -> _Event | None:
+        while not self._events:
+            if self._finished:
+                return None
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._finished = True
+                self._call(self._parser.finalize)
+            else:
+                self._call(self._parser.write, chunk)
+        return self._events.popleft()
+
+    def _call(self, fn: typing.Callable[..., typing.Any], *args: typing.Any) -> None:
+        try:
+            fn(*args)
+        except FormParserError as ex:
+            raise BadRequest(detail="Invalid multipart body.") from ex
+
+    def _on_part_begin(self) -> None:
+        self._part = _Part()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field.extend(data[start:end])
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value.extend(data[start:end])
+
+    def _on_header_end(self) -> None:
+        field = self._header_field.lower()
+        if field == b"content-disposition":
+            _, options = parse_options_header(bytes(self._header_value))
+            self._part.name = options.get(b"name", b"").decode("utf-8", errors="replace")
+            if b"filename" in options:
+                self._part.filename = options[b"filename"].decode("utf-8", errors="replace")
+        elif field == b"content-type":
+            self._part.content_type = self._header_value.decode("latin-1").strip()
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        self._events.append(("begin", self._part))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append(("data", data[start:end]))
+
+    def _on_part_end(self) -> None:
+        self._events.append(("end", None))
+
+
+class _PartReader:
+    """Async reader of one part body, consumed by file storage backends."""
+
+    def __init__(self, stream: _MultipartStream, max_size: int | None) -> None:
+        self.size = 0
+        self._stream = stream
+        self._max_size = max_size
+        self._buffer = bytearray()
+        self._eof = False
+
+    async def read(self, n: int = -1) -> bytes:
+        while not self._eof and (n < 0 or len(self._buffer) < n):
+            event = await self._stream.next_event()
+            if event is None or event[0] != "data":
+                self._eof = True
+                break
+            self.size += len(event[1])
+            if self._max_size is not None and self.size > self._max_size:
+                raise PayloadTooLarge()
+            self._buffer.extend(event[1])
+
+        size = len(self._buffer) if n < 0 else min(n, len(self._buffer))
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def drain(self) -> None:
+        while await self.read(64 * 1024):
+            pass
+
+
+async def delete_files(files: typing.Sequence[tuple[Files, StoredFile]]) -> None:
+    """Delete stored files, even if the current task is cancelled."""
+    with anyio.CancelScope(shield=True):
+        for storage, stored_file in files:
+            await storage.delete(stored_file.path)
+
+
+async def stream_form(
+    request: Request,
+    uploads: typing.Mapping[str, Upload],
+    *,
+    max_field_size: int = 1024 * 1024,
+    max_fields: int = 1000,
+    max_files: int = 1000,
+) -> tuple[ImmutableMultiDict[str, typing.Any], list[tuple[Files, StoredFile]]]:
+    """Parse multipart body, writing files of the declared upload fields to the storage as they arrive.
+
+    Other fields are read into memory, up to `max_field_size` bytes each. Files of undeclared fields are skipped.
+    Bodies with more than `max_fields` fields or `max_files` files (including skipped ones) are rejected.
+    Returns the form with StoredFile values in place of uploads and the list of stored files.
+    Written files are deleted when the body is invalid or exceeds the limits."""
+    media_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if media_type != MULTIPART_CONTENT_TYPE or b"boundary" not in options:
+        raise BadRequest(detail="Multipart body expected.")
+
+    stream = _MultipartStream(request, options[b"boundary"])
+    items: list[tuple[str, typing.Any]] = []
+    stored: list[tuple[Files, StoredFile]] = []
+    errors: dict[str, list[str]] = {}
+    files = 0
+    try:
+        while event := await stream.next_event():
+            if event[0] != "begin":
+                continue
+
+            part = event[1]
+            upload = uploads.get(part.name)
+            if part.filename is None:
+                reader = _PartReader(stream, max_field_size)
+                if len(items) >= max_fields:
+                    raise PayloadTooLarge(detail="Too many form fields.")
+                items.append((part.name, (await reader.read()).decode("utf-8", errors="replace")))
+                continue
+
+            files += 1
+            if files > max_files:
+                raise PayloadTooLarge(detail="Too many files.")
+            if upload is None or not part.filename:  # not declared or the file was not selected
+                await _PartReader(stream, None).drain()
+            elif not upload.accepts(part.content_type):
+                errors.setdefault(part.name, []).append("File type is not allowed.")
+                await _PartReader(stream, None).drain()
+            else:
+                storage: Files = upload.storage or request.app.state.files
+                path = generate_file_path(part.filename, upload.destination)
+                reader = _PartReader(stream, upload.max_size)
+                try:
+                    await storage.write(path, reader)
+                except BaseException:
+                    await delete_files([(storage, StoredFile(path, part.filename, part.content_type, 0))])
+                    raise
+                stored_file = StoredFile(path, part.filename, part.content_type, reader.size)
+                stored.append((storage, stored_file))
+                items.append((part.name, stored_file))
+
+        if errors:
+            raise UnprocessableEntity(errors=errors)
+    except BaseException:
+        await delete_files(stored)
+        raise
+    return ImmutableMultiDict(items), stored
@@ -1,20 +1,161 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import re
 import time
 import typing
+import urllib.parse
 
-from starlette.datastructures import URL
-from starlette.requests import Request
+from starlette.convertors import Convertor
+from starlette.datastructures import URL, URLPath
+from starlette.requests import HTTPConnection, Request
+from starlette.routing import BaseRoute, Mount, Route, Router, WebSocketRoute
 
 boot_time = time.time()
 
+_PARAM_REGEX = re.compile(r"{([a-zA-Z_][a-zA-Z0-9_]*)}")
+
+
+class _UnsupportedRoute(Exception): ...
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class _PathTemplate:
+    param_names: frozenset[str]
+    parts: tuple[str | tuple[str, Convertor[typing.Any]], ...]
+    protocol: typing.Literal["http", "websocket", ""]
+    strip_path: bool = False  # mount URLs strip leading slash from "path" param
+
+    def format(self, path_params: typing.Mapping[str, typing.Any]) -> URLPath:
+        if self.strip_path:
+            path_params = {**path_params, "path": path_params["path"].lstrip("/")}
+        path = "".join(
+            part if isinstance(part, str) else part[1].to_string(path_params[part[0]]) for part in self.parts
+        )
+        return URLPath(path=path, protocol=self.protocol)
+
+
+def _compile_template(
+    path_format: str,
+    param_convertors: typing.Mapping[str, Convertor[typing.Any]],
+    protocol: typing.Literal["http", "websocket", ""],
+    strip_path: bool = False,
+) -> _PathTemplate:
+    parts: list[str | tuple[str, Convertor[typing.Any]]] = []
+    param_names: set[str] = set()
+    for index, chunk in enumerate(_PARAM_REGEX.split(path_format)):
+        if index % 2 == 0:
+            if chunk:
+                parts.append(chunk)
+        else:
+            parts.append((chunk, param_convertors[chunk]))
+            param_names.add(chunk)
+    return _PathTemplate(frozenset(param_names), tuple(parts), protocol, strip_path)
+
+
+class URLIndex:
+    """Route name to path template index, an equivalent of `Router.url_path_for` without walking the route tree.
+
+    Supports Route, WebSocketRoute and Mount (including nested ones). Routes that come after
+    any other route type (Host, custom routes) are not indexed and resolved by the router."""
+
+    def __init__(self, routes: typing.Iterable[BaseRoute]) -> None:
+        self._templates: dict[str, list[_PathTemplate]] = {}
+        self.complete = True
+        try:
+            self._add_routes(routes, name_prefix="", path_prefix="", prefix_params={})
+        except _UnsupportedRoute:
+            self.complete = False
+
+    def lookup(self, name: str, path_params: typing.Mapping[str, typing.Any]) -> URLPath | None:
+        """Return URL path for the route name or None if the index cannot resolve it."""
+        for template in self._templates.get(name, ()):
+            if template.param_names == path_params.keys():
+                return template.format(path_params)
+        return None
+
+    def _add(self, name: str, template: _PathTemplate) -> None:
+        self._templates.setdefault(name, []).append(template)
+
+    def _add_routes(
+        self,
+        routes: typing.Iterable[BaseRoute],
+        name_prefix: str,
+        path_prefix: str,
+        prefix_params: typing.Mapping[str, Convertor[typing.Any]],
+    ) -> None:
+        for route in routes:
+            route_type = type(route)
+            if isinstance(route, Route | WebSocketRoute) and route_type.url_path_for in (
+                Route.url_path_for,
+                WebSocketRoute.url_path_for,
+            ):
+                if route.name is not None:
+                    protocol: typing.Literal["http", "websocket"] = "http" if isinstance(route, Route) else "websocket"
+                    convertors = {**prefix_params, **route.param_convertors}
+                    template = _compile_template(path_prefix + route.path_format, convertors, protocol)
+                    self._add(name_prefix + route.name, template)
+            elif isinstance(route, Mount) and route_type.url_path_for is Mount.url_path_for:
+                convertors = {**prefix_params, **route.param_convertors}
+                if route.name is not None:
+                    template = _compile_template(path_prefix + route.path_format, convertors, "", strip_path=True)
+                    self._add(name_prefix + route.name, template)
+
+                child_convertors = {key: value for key, value in convertors.items() if key != "path"}
+                child_prefix = path_prefix + route.path_format.removesuffix("/{path}").rstrip("/")
+                child_name_prefix = name_prefix + (route.name + ":" if route.name is not None else "")
+                self._add_routes(route.routes, child_name_prefix, child_prefix, child_convertors)
+            else:
+                raise _UnsupportedRoute()
+
+
+def get_url_index(router: Router | typing.Any) -> URLIndex:
+    """Return URL index for the router (or application), build it on the first call."""
+    router = getattr(router, "router", router)  # applications delegate URL lookups to their routers
+    index: URLIndex | None = router.__dict__.get("_url_index")
+    if index is None:
+        index = router.__dict__["_url_index"] = URLIndex(router.routes)
+    return index
+
+
+def reset_url_index(router: Router | typing.Any) -> None:
+    """Drop cached URL index, call after modifying routes at runtime."""
+    router = getattr(router, "router", router)
+    router.__dict__.pop("_url_index", None)
+
+
+def url_path_for(conn: HTTPConnection, name: str, /, **path_params: typing.Any) -> URLPath:
+    """Return URL path for route. Same as `Router.url_path_for` but uses precomputed index."""
+    router = conn.scope.get("router") or conn.scope.get("app")
+    if router is None:
+        raise RuntimeError(
+            "The `url_path_for` function can only be used inside a Starlette application or with a router."
+        )
+
+    if (url_path := get_url_index(router).lookup(name, path_params)) is not None:
+        return url_path
+    return typing.cast(URLPath, router.url_path_for(name, **path_params))
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_path(url: str) -> str:
+    return urllib.parse.urlsplit(url).path
+
 
 def static_url(request: Request, path: str, *, path_name: str = "static") -> URL:
     """Return URL for static file.
-    If path is absolute, return it as is."""
+    If path is absolute, return it as is.
+    If static manifest is configured, return URL of content-hashed file (except in debug mode)."""
     if path.startswith(("http://", "https://")):
         return URL(path)
 
+    manifest = getattr(request.app.state, "static_manifest", None)
+    if manifest is not None and not request.app.debug and (hashed_path := manifest.lookup(path)):
+        return abs_url_for(request, path_name, path=hashed_path)
+
     version = time.time() if request.app.debug else boot_time
-    return request.url_for(path_name, path=path).include_query_params(v=version)
+    return abs_url_for(request, path_name, path=path).include_query_params(v=version)
 
 
 def media_url(request: Request, path: str, *, path_name: str = "media") -> URL:
@@ -24,23 +165,25 @@ def media_url(request: Request, path: str, *, path_name: str = "media") -> URL:
         return URL(path)
     if path == "":
         return URL("")
-    return request.url_for(path_name, path=path)
+    return abs_url_for(request, path_name, path=path)
 
 
 def abs_url_for(request: Request, name: str, **path_params: typing.Any) -> URL:
     """Return absolute URL for route."""
-    return request.url_for(name, **path_params)
+    return url_path_for(request, name, **path_params).make_absolute_url(request.base_url)
 
 
 def url_matches(request: Request, url: URL | str) -> bool:
     """Return True if request URL matches URL."""
-    value = URL(str(url))
-    return request.url.path.removesuffix("/") == value.path.removesuffix("/")
+    path = url.path if isinstance(url, URL) else _parse_path(str(url))
+    return request.url.path.removesuffix("/") == path.removesuffix("/")
 
 
 def pathname_matches(request: Request, pathname: str, *, path_params: dict[str, typing.Any] | None = None) -> bool:
-    url = request.url_for(pathname, **(path_params or {}))
-    return url_matches(request, url)
+    """Return True if request URL matches URL of the named route."""
+    url_path = url_path_for(request, pathname, **(path_params or {}))
+    path = request.base_url.path.rstrip("/") + url_path
+    return request.url.path.removesuffix("/") == path.removesuffix("/")
 
 
 def safe_referer(request: Request, url: str | URL) -> URL:
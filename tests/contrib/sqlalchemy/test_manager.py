@@ -0,0 +1,45 @@
+import pytest
+import sqlalchemy as sa
+
+from kupala.contrib.sqlalchemy.manager import DatabaseManager, get_statement_timeout_sql
+from kupala.deadlines import DeadlineExceeded, deadline
+from kupala.timings import collect_timings
+from tests.contrib.sqlalchemy.conftest import DATABASE_URL
+
+
+def test_statement_timeout_sql() -> None:
+    assert get_statement_timeout_sql("postgresql", 1.5) == "SET LOCAL statement_timeout = 1500"
+    assert get_statement_timeout_sql("postgresql", 0.0001) == "SET LOCAL statement_timeout = 1"
+    assert get_statement_timeout_sql("sqlite", 1) is None
+
+
+async def test_session_refuses_to_start_after_deadline() -> None:
+    async with DatabaseManager(DATABASE_URL, isolation_level="SERIALIZABLE", dangerously_disable_pool=True) as manager:
+        async with manager.session() as session:
+            with deadline(10):
+                assert (await session.scalar(sa.text("select 1"))) == 1
+
+        async with manager.session() as session:
+            with deadline(-1), pytest.raises(DeadlineExceeded):
+                await session.scalar(sa.text("select 1"))
+
+
+async def test_records_query_timings() -> None:
+    manager = DatabaseManager(DATABASE_URL, isolation_level="SERIALIZABLE", dangerously_disable_pool=True)
+    async with manager, manager.session() as session:
+        with collect_timings() as timings:
+            await session.scalar(sa.text("select 1"))
+            await session.scalar(sa.text("select 2"))
+    assert timings.spans["db"].count == 2
+
+
+async def test_failed_queries_do_not_leak_timings() -> None:
+    manager = DatabaseManager(DATABASE_URL, isolation_level="SERIALIZABLE", dangerously_disable_pool=True)
+    async with manager, manager.session() as session:
+        connection = await session.connection()
+        with pytest.raises(sa.exc.DBAPIError):
+            await connection.exec_driver_sql("select * from missing_table")
+        assert connection.info["kupala_query_started_at"] == []
+        with collect_timings() as timings:
+            await session.scalar(sa.text("select 1"))
+    assert timings.spans["db"].count == 1
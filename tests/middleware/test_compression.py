@@ -0,0 +1,122 @@
+import typing
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.testclient import TestClient
+
+from kupala.middleware.compression import CompressionMiddleware, select_encoding
+from kupala.routing import Route, Router
+
+TEXT = "Hello, world! " * 100
+
+
+def text_view(request: Request) -> Response:
+    return PlainTextResponse(TEXT)
+
+
+def small_view(request: Request) -> Response:
+    return PlainTextResponse("small")
+
+
+def image_view(request: Request) -> Response:
+    return Response(b"\x89PNG" * 500, media_type="image/png")
+
+
+def encoded_view(request: Request) -> Response:
+    return Response(b"x" * 1000, headers={"content-encoding": "identity-custom"})
+
+
+def range_view(request: Request) -> Response:
+    return PlainTextResponse(TEXT[:500], status_code=206, headers={"content-range": "bytes 0-499/1400"})
+
+
+def stream_view(request: Request) -> Response:
+    async def stream() -> typing.AsyncGenerator[str, None]:
+        for _ in range(10):
+            yield TEXT
+
+    return StreamingResponse(stream(), media_type="text/html")
+
+
+app = CompressionMiddleware(
+    Router(
+        [
+            Route("/text", text_view),
+            Route("/small", small_view),
+            Route("/image", image_view),
+            Route("/encoded", encoded_view),
+            Route("/stream", stream_view),
+            Route("/range", range_view),
+            Route("/raw/text", text_view),
+            Route("/rawtext", text_view),
+        ]
+    ),
+    path_levels={"/raw": None},
+)
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("encoding", ["br", "zstd", "gzip"])
+def test_compresses_response(encoding: str) -> None:
+    response = client.get("/text", headers={"accept-encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(TEXT)
+    assert response.text == TEXT
+
+
+@pytest.mark.parametrize("encoding", ["br", "zstd", "gzip"])
+def test_compresses_streaming_response(encoding: str) -> None:
+    response = client.get("/stream", headers={"accept-encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert "content-length" not in response.headers
+    assert response.text == TEXT * 10
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate, br, zstd", "br"),
+        ("gzip;q=1, br;q=0.5", "gzip"),
+        ("*", "br"),
+        ("br;q=0, *;q=0.1", "zstd"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_select_encoding(accept_encoding: str, expected: str | None) -> None:
+    assert select_encoding(accept_encoding, ("br", "zstd", "gzip")) == expected
+
+
+def test_skips_small_responses() -> None:
+    response = client.get("/small", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == "small"
+
+
+@pytest.mark.parametrize("path", ["/image", "/encoded", "/raw/text", "/range"])
+def test_skips_responses(path: str) -> None:
+    response = client.get(path, headers={"accept-encoding": "gzip"})
+    assert response.headers.get("content-encoding") in (None, "identity-custom")
+    assert "vary" not in response.headers
+
+
+def test_path_levels_match_whole_segments() -> None:
+    response = client.get("/rawtext", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+
+
+def test_skips_when_not_accepted() -> None:
+    response = client.get("/text", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.text == TEXT
+
+
+def test_levels() -> None:
+    fast = TestClient(CompressionMiddleware(Router([Route("/", text_view)]), levels={"gzip": 1}))
+    best = TestClient(CompressionMiddleware(Router([Route("/", text_view)]), levels={"gzip": 9}))
+    fast_size = int(fast.get("/", headers={"accept-encoding": "gzip"}).headers["content-length"])
+    best_size = int(best.get("/", headers={"accept-encoding": "gzip"}).headers["content-length"])
+    assert fast_size >= best_size
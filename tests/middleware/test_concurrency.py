@@ -0,0 +1,136 @@
+import anyio
+import pytest
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+from starlette.types import Message, Receive, Scope, Send
+
+from kupala.middleware.concurrency import ConcurrencyLimitMiddleware
+
+
+class BlockingApp:
+    def __init__(self) -> None:
+        self.release = anyio.Event()
+        self.started = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.started += 1
+        await self.release.wait()
+        await PlainTextResponse("ok")(scope, receive, send)
+
+
+async def call(
+    app: ConcurrencyLimitMiddleware, path: str = "/", headers: list[tuple[bytes, bytes]] | None = None
+) -> int:
+    scope: Scope = {"type": "http", "method": "GET", "path": path, "headers": headers or [], "query_string": b""}
+    messages: list[Message] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}  # pragma: no cover
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return int(messages[0]["status"])
+
+
+@pytest.mark.asyncio
+async def test_allows_requests_within_limit() -> None:
+    client = TestClient(ConcurrencyLimitMiddleware(PlainTextResponse("ok"), max_concurrency=1))
+    assert client.get("/").status_code == 200
+    assert client.get("/").status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_queue_is_full() -> None:
+    blocking_app = BlockingApp()
+    app = ConcurrencyLimitMiddleware(blocking_app, max_concurrency=1, max_queue_size=0)
+    statuses: list[int] = []
+
+    async def run() -> None:
+        statuses.append(await call(app))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run)
+        await anyio.wait_all_tasks_blocked()
+        assert await call(app) == 503
+        blocking_app.release.set()
+
+    assert statuses == [200]
+    assert app.active == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_request_waits_for_slot() -> None:
+    blocking_app = BlockingApp()
+    app = ConcurrencyLimitMiddleware(blocking_app, max_concurrency=1, max_queue_size=1, queue_timeout=5)
+    statuses: list[int] = []
+
+    async def run() -> None:
+        statuses.append(await call(app))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run)
+        tg.start_soon(run)
+        await anyio.wait_all_tasks_blocked()
+        assert blocking_app.started == 1
+        assert app.waiting["normal"] == 1
+        blocking_app.release.set()
+
+    assert statuses == [200, 200]
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout() -> None:
+    blocking_app = BlockingApp()
+    app = ConcurrencyLimitMiddleware(blocking_app, max_concurrency=1, queue_timeout=0.01, retry_after=5)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(call, app)
+        await anyio.wait_all_tasks_blocked()
+        assert await call(app) == 503
+        blocking_app.release.set()
+
+
+@pytest.mark.asyncio
+async def test_priority_classes() -> None:
+    blocking_app = BlockingApp()
+    app = ConcurrencyLimitMiddleware(
+        blocking_app,
+        max_concurrency=2,
+        max_queue_size=0,
+        reserved_slots=1,
+        priority_paths={"/health": "exempt"},
+        priority_headers={"Authorization": "high"},
+    )
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(call, app)
+        await anyio.wait_all_tasks_blocked()
+        assert await call(app) == 503  # the only remaining slot is reserved
+
+        tg.start_soon(call, app, "/", [(b"authorization", b"Bearer token")])
+        tg.start_soon(call, app, "/health")
+        await anyio.wait_all_tasks_blocked()
+        assert blocking_app.started == 3
+        assert app.active == 2
+        blocking_app.release.set()
+
+
+@pytest.mark.asyncio
+async def test_custom_priority_classes() -> None:
+    blocking_app = BlockingApp()
+    app = ConcurrencyLimitMiddleware(
+        blocking_app, max_concurrency=1, max_queue_size=1, priority_paths={"/api": "api", "/health": "exempt"}
+    )
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(call, app, "/api/users")
+        tg.start_soon(call, app, "/api/users")
+        await anyio.wait_all_tasks_blocked()
+        assert app.waiting["api"] == 1
+        assert await call(app, "/api/users") == 503  # the "api" queue is full
+        blocking_app.release.set()
+    assert blocking_app.started == 2
+    assert app.get_priority({"path": "/health/db", "headers": []}) == "exempt"
+    assert app.get_priority({"path": "/healthz", "headers": []}) == "normal"
@@ -209,3 +209,73 @@ def test_get_csrf_input_helper(test_client_factory: ClientFactory) -> None:
 def test_get_csrf_meta_tag_helper(test_client_factory: ClientFactory) -> None:
     request = Request({"type": "http", "state": {"csrf_timed_token": "token"}})
     assert get_csrf_meta_tag(request) == '<meta name="csrf-token" content="token">'
+
+
+def test_middleware_signs_timed_token_lazily(test_client_factory: ClientFactory) -> None:
+    def view(request: Request) -> PlainTextResponse:
+        assert "csrf_timed_token" not in request.scope["state"]
+        token = get_csrf_token(request)
+        assert get_csrf_token(request) == token
+        assert request.state.csrf_timed_token == token
+        return PlainTextResponse(token)
+
+    client = test_client_factory(
+        routes=[Route("/", view)],
+        middleware=[
+            Middleware(SessionMiddleware, secret_key="key", max_age=80000),
+            Middleware(CSRFMiddleware, secret_key="secret"),
+        ],
+    )
+    assert client.get("/").text
+
+
+def test_middleware_reads_token_from_multipart_and_replays_body(test_client_factory: ClientFactory) -> None:
+    async def view(request: Request) -> PlainTextResponse:
+        if request.method == "GET":
+            return PlainTextResponse(get_csrf_token(request))
+
+        form = await request.form()
+        upload = form["file"]
+        assert not isinstance(upload, str)
+        return PlainTextResponse(f"{form['name']}:{(await upload.read()).decode()}")
+
+    client = test_client_factory(
+        routes=[Route("/", view, methods=["get", "post"])],
+        middleware=[
+            Middleware(SessionMiddleware, secret_key="key", max_age=80000),
+            Middleware(CSRFMiddleware, secret_key="secret", max_scan_size=1024),
+        ],
+    )
+    token = client.get("/").text
+    response = client.post("/", data={"_token": token, "name": "root"}, files={"file": ("a.txt", b"content")})
+    assert response.text == "root:content"
+
+    with pytest.raises(NotAuthorized):
+        client.post("/", data={"_token": "invalid", "name": "root"}, files={"file": ("a.txt", b"content")})
+
+    # token placed after a large file is beyond the scan limit
+    with pytest.raises(NotAuthorized):
+        client.post("/", data={"name": "root"}, files={"file": ("a.txt", b"x" * 4096), "_token": (None, token)})
+
+
+def test_middleware_prefers_header_token(test_client_factory: ClientFactory) -> None:
+    async def view(request: Request) -> PlainTextResponse:
+        if request.method == "GET":
+            return PlainTextResponse(get_csrf_token(request))
+        return PlainTextResponse((await request.body()).decode())
+
+    client = test_client_factory(
+        routes=[Route("/", view, methods=["get", "post"])],
+        middleware=[
+            Middleware(SessionMiddleware, secret_key="key", max_age=80000),
+            Middleware(CSRFMiddleware, secret_key="secret"),
+        ],
+    )
+    token = client.get("/").text
+    response = client.post(
+        "/", content=b'{"a": 1}', headers={"x-csrf-token": token, "content-type": "application/json"}
+    )
+    assert response.text == '{"a": 1}'
+
+    with pytest.raises(NotAuthorized):
+        client.post("/", content=b'{"_token": "x"}', headers={"content-type": "application/json"})
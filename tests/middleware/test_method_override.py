@@ -22,3 +22,41 @@ async def test_overrides_method() -> None:
 async def test_bypass_read_methods() -> None:
     client = TestClient(MethodOverrideMiddleware(app))
     assert client.get("/").text == "GET"
+
+
+@pytest.mark.asyncio
+async def test_overrides_method_from_header() -> None:
+    client = TestClient(MethodOverrideMiddleware(app))
+    assert client.post("/", headers={"x-http-method-override": "patch"}).text == "PATCH"
+
+
+@pytest.mark.asyncio
+async def test_replays_body() -> None:
+    async def form_app(scope: Scope, receive: Receive, send: Send) -> None:
+        request = Request(scope, receive, send)
+        form = await request.form()
+        upload = form["file"]
+        assert not isinstance(upload, str)
+        content = await upload.read()
+        await PlainTextResponse(f"{request.method}:{form['name']}:{content.decode()}")(scope, receive, send)
+
+    client = TestClient(MethodOverrideMiddleware(form_app))
+    response = client.post("/", data={"_method": "put", "name": "root"}, files={"file": ("a.txt", b"content")})
+    assert response.text == "PUT:root:content"
+
+
+@pytest.mark.asyncio
+async def test_ignores_non_form_bodies() -> None:
+    async def json_app(scope: Scope, receive: Receive, send: Send) -> None:
+        request = Request(scope, receive, send)
+        await PlainTextResponse(f"{request.method}:{(await request.body()).decode()}")(scope, receive, send)
+
+    client = TestClient(MethodOverrideMiddleware(json_app))
+    response = client.post("/", content=b"_method=delete", headers={"content-type": "application/json"})
+    assert response.text == "POST:_method=delete"
+
+
+@pytest.mark.asyncio
+async def test_scans_bounded_prefix() -> None:
+    client = TestClient(MethodOverrideMiddleware(app, max_scan_size=16))
+    assert client.post("/", data={"text": "x" * 32, "_method": "delete"}).text == "POST"
@@ -0,0 +1,138 @@
+import collections
+import logging
+import pathlib
+import time
+import typing
+
+import anyio
+import pytest
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from kupala.middleware.profiler import ProfilerMiddleware, RequestProfile, _Sampler, _Target
+from kupala.middleware.request_id import RequestIDMiddleware
+from kupala.routing import Route, Router
+
+
+def busy_work() -> None:
+    time.sleep(0.05)
+
+
+async def blocking_view(request: Request) -> PlainTextResponse:
+    busy_work()
+    return PlainTextResponse("ok")
+
+
+async def waiting_view(request: Request) -> PlainTextResponse:
+    await anyio.sleep(0.05)
+    return PlainTextResponse("ok")
+
+
+async def fast_view(request: Request) -> PlainTextResponse:
+    return PlainTextResponse("ok")
+
+
+routes = [
+    Route("/blocking/{id}", blocking_view),
+    Route("/waiting", waiting_view),
+    Route("/fast", fast_view),
+]
+
+
+class CollectingProfiler(ProfilerMiddleware):
+    profiles: list[RequestProfile]
+
+    def report(self, profile: RequestProfile) -> None:
+        self.profiles.append(profile)
+
+
+def make_app(**kwargs: object) -> tuple[RequestIDMiddleware, CollectingProfiler]:
+    profiler = CollectingProfiler(Router(routes), interval=0.001, **kwargs)  # type: ignore[arg-type]
+    profiler.profiles = []
+    return RequestIDMiddleware(profiler), profiler
+
+
+def test_profiler_samples_blocking_code() -> None:
+    app, profiler = make_app(threshold=0.01)
+    TestClient(app).get("/blocking/1", headers={"x-request-id": "abc"})
+
+    [profile] = profiler.profiles
+    assert profile.route == "/blocking/{id}"
+    assert profile.request_id == "abc"
+    assert profile.duration >= 0.05
+    assert profile.samples > 0
+    stack, _ = profile.stacks.most_common(1)[0]
+    assert "blocking_view" in stack
+    assert stack.split(";")[-1].startswith("busy_work ")
+
+
+def test_profiler_samples_awaiting_coroutine() -> None:
+    app, profiler = make_app(threshold=0.01)
+    TestClient(app).get("/waiting")
+
+    [profile] = profiler.profiles
+    assert profile.route == "/waiting"
+    assert any("waiting_view" in stack for stack in profile.stacks)
+
+
+def test_profiler_ignores_fast_requests() -> None:
+    app, profiler = make_app(threshold=1)
+    client = TestClient(app)
+    client.get("/fast")
+    client.get("/waiting")
+    assert profiler.profiles == []
+
+
+def test_sampler_sleeps_until_sampling_starts() -> None:
+    class CountingSampler(_Sampler):
+        calls = 0
+
+        def sample(self) -> None:
+            self.calls += 1
+            super().sample()
+
+    sampler = CountingSampler(interval=0.001, max_samples=100)
+    slow = _Target(None, 0, time.perf_counter() + 60)
+    sampler.add(slow)
+    time.sleep(0.05)
+    assert sampler.calls == 0  # in-flight requests below the threshold do not wake the thread
+
+    sampler.add(_Target(None, 0, time.perf_counter()))
+    time.sleep(0.05)
+    assert sampler.calls > 0
+
+
+def test_profiler_sample_rate() -> None:
+    app, profiler = make_app(threshold=10, sample_rate=1)
+    TestClient(app).get("/waiting")
+    assert len(profiler.profiles) == 1
+
+
+def test_profiler_logs_collapsed_stacks(caplog: pytest.LogCaptureFixture) -> None:
+    app = ProfilerMiddleware(Router(routes), threshold=0.01, interval=0.001)
+    with caplog.at_level(logging.WARNING, logger="kupala.profiler"):
+        TestClient(app).get("/blocking/1")
+
+    record = typing.cast(typing.Any, caplog.records[-1])  # extra fields are record attributes
+    assert record.getMessage().startswith("Slow request - GET /blocking/{id} took")
+    assert record.route == "/blocking/{id}"
+    assert "blocking_view" in record.getMessage()
+
+
+def test_profiler_writes_files(tmp_path: pathlib.Path) -> None:
+    app = RequestIDMiddleware(ProfilerMiddleware(Router(routes), threshold=0.01, interval=0.001, output_dir=tmp_path))
+    TestClient(app).get("/blocking/1", headers={"x-request-id": "abc"})
+
+    content = (tmp_path / "blocking_id.abc.collapsed").read_text()
+    stack, count = content.splitlines()[0].rsplit(" ", 1)
+    assert "blocking_view" in stack
+    assert int(count) > 0
+
+
+def test_profiler_sanitizes_file_names(tmp_path: pathlib.Path) -> None:
+    profiler = ProfilerMiddleware(Router(routes), output_dir=tmp_path / "profiles")
+    (tmp_path / "profiles").mkdir()
+    profile = RequestProfile("/fast", "../../evil/id", "GET", "/fast", 1, 0.001, collections.Counter({"view": 1}))
+    profiler.report(profile)
+    assert [path.name for path in (tmp_path / "profiles").iterdir()] == ["fast.evil_id.collapsed"]
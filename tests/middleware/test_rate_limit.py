@@ -0,0 +1,245 @@
+import typing
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.testclient import TestClient
+
+from kupala import Kupala
+from kupala.exceptions import TooManyRequests
+from kupala.middleware import Middleware, RateLimitMiddleware
+from kupala.middleware.rate_limit import RateLimit, api_key, get_rate_limit_headers, rate_limit, user_key
+from kupala.rate_limiters import MemoryRateLimitBackend, RateLimitCheck, RateLimiter, RateLimitResult
+from kupala.rate_limiters.backends.base import CheckResult
+from kupala.routing import Mount, Route, RouteGroup
+
+
+class CountingBackend(MemoryRateLimitBackend):
+    calls = 0
+
+    async def check(self, checks: typing.Sequence[RateLimitCheck]) -> list[CheckResult]:
+        self.calls += 1
+        return await super().check(checks)
+
+
+@pytest.fixture
+def backend() -> CountingBackend:
+    return CountingBackend()
+
+
+@pytest.fixture
+def limiter(backend: CountingBackend) -> RateLimiter:
+    return RateLimiter(backend, local_cache_size=0)
+
+
+def view(request: Request) -> Response:
+    return PlainTextResponse("ok")
+
+
+def make_app(routes: typing.Sequence[typing.Any], /, **options: typing.Any) -> TestClient:
+    return TestClient(Kupala(routes=routes, middleware=[Middleware(RateLimitMiddleware, **options)]))
+
+
+def test_limits_by_path_prefix(limiter: RateLimiter) -> None:
+    policy = limiter.fixed_window("2/minute", "api")
+    client = make_app(
+        [Route("/api/users", view), Route("/home", view)],
+        paths={"/api": [policy]},
+    )
+
+    response = client.get("/api/users")
+    assert response.status_code == 200
+    assert response.headers["ratelimit-limit"] == "2"
+    assert response.headers["ratelimit-remaining"] == "1"
+    assert int(response.headers["ratelimit-reset"]) <= 60
+
+    assert client.get("/api/users").status_code == 200
+    response = client.get("/api/users")
+    assert response.status_code == 429
+    assert response.headers["ratelimit-remaining"] == "0"
+    assert 1 <= int(response.headers["retry-after"]) <= 60
+
+    response = client.get("/home")
+    assert response.status_code == 200
+    assert "ratelimit-limit" not in response.headers
+
+
+def test_path_prefix_matches_whole_segments(limiter: RateLimiter) -> None:
+    client = make_app(
+        [Route("/login", view), Route("/login-help", view)],
+        paths={"/login": [limiter.fixed_window("1/minute", "login")]},
+    )
+    assert client.get("/login").status_code == 200
+    assert client.get("/login").status_code == 429
+    assert client.get("/login-help").status_code == 200
+    assert client.get("/login-help").status_code == 200
+
+
+def test_longest_path_prefix_wins(limiter: RateLimiter) -> None:
+    client = make_app(
+        [Route("/api/login", view)],
+        paths={
+            "/api": [limiter.fixed_window("10/minute", "api")],
+            "/api/login": [limiter.fixed_window("1/minute", "login")],
+        },
+    )
+    assert client.get("/api/login").status_code == 200
+    assert client.get("/api/login").status_code == 429
+
+
+def test_limits_by_route_name(limiter: RateLimiter) -> None:
+    client = make_app(
+        [
+            Route("/login", view, name="login"),
+            Mount("/admin", name="admin", routes=[Route("/users/{id}", view, name="users")]),
+            Mount("/api", routes=[Route("/users/{id}", view, name="users")]),
+        ],
+        routes={
+            "login": [limiter.fixed_window("1/minute", "login")],
+            "admin:users": [limiter.fixed_window("1/minute", "admin_users")],
+        },
+    )
+    assert client.get("/login").status_code == 200
+    assert client.get("/login").status_code == 429
+    assert client.get("/admin/users/1").status_code == 200
+    assert client.get("/admin/users/2").status_code == 429
+    assert client.get("/api/users/1").status_code == 200  # names are qualified by mount names
+    assert client.get("/api/users/1").status_code == 200
+
+
+def test_limits_by_decorator(limiter: RateLimiter) -> None:
+    routes = RouteGroup()
+
+    @rate_limit(limiter.fixed_window("1/minute", "decorated"))
+    @routes.get("/decorated")
+    async def decorated_view() -> Response:
+        return PlainTextResponse("ok")
+
+    @routes.get("/plain")
+    async def plain_view() -> Response:
+        return PlainTextResponse("ok")
+
+    client = make_app(routes)
+    assert client.get("/decorated").status_code == 200
+    assert client.get("/decorated").status_code == 429
+    assert client.get("/plain").status_code == 200
+    assert client.get("/plain").status_code == 200
+
+
+def test_checks_all_limits_in_one_call(limiter: RateLimiter, backend: CountingBackend) -> None:
+    burst = limiter.token_bucket("1/minute", "burst")
+    sustained = limiter.sliding_window("10/hour", "sustained")
+
+    @rate_limit(burst)
+    def login_view(request: Request) -> Response:
+        return PlainTextResponse("ok")
+
+    client = make_app(
+        [Route("/login", login_view, name="login")],
+        paths={"/": [sustained]},
+        routes={"login": [RateLimit(limiter.fixed_window("5/minute", "named"), cost=2)]},
+    )
+
+    response = client.get("/login")
+    assert response.status_code == 200
+    assert response.headers["ratelimit-limit"] == "1"  # the most restrictive limit is reported
+    assert backend.calls == 1
+
+    assert client.get("/login").status_code == 429
+    assert backend.calls == 2
+
+    # the rejected request is not counted by the other limits
+    [(sustained_state, _)] = [item for key, item in backend.states.items() if ":sustained:" in key]
+    assert sustained_state["c"] == 1
+
+
+def test_checks_limiters_one_after_another(limiter: RateLimiter, backend: CountingBackend) -> None:
+    strict_backend = CountingBackend()
+    strict = RateLimiter(strict_backend, local_cache_size=0).fixed_window("1/minute", "strict")
+    other_backend = CountingBackend()
+    other = RateLimiter(other_backend, local_cache_size=0).fixed_window("10/minute", "other")
+    client = make_app(
+        [Route("/login", view, name="login")],
+        paths={"/": [limiter.fixed_window("10/minute", "sustained"), strict]},
+        routes={"login": [other]},
+    )
+
+    assert client.get("/login").status_code == 200
+    assert client.get("/login").status_code == 429
+    assert (backend.calls, strict_backend.calls, other_backend.calls) == (2, 2, 1)  # rejection stops the checks
+
+    # hits counted by the limiter checked before the rejection stay counted
+    [(sustained_state, _)] = [item for key, item in backend.states.items() if ":sustained:" in key]
+    assert sustained_state["c"] == 2
+
+
+def test_actor_keys(limiter: RateLimiter) -> None:
+    policy = limiter.fixed_window("1/minute", "api")
+    client = make_app([Route("/", view)], paths={"/": [RateLimit(policy, key=api_key())]})
+
+    assert client.get("/", headers={"x-api-key": "one"}).status_code == 200
+    assert client.get("/", headers={"x-api-key": "one"}).status_code == 429
+    assert client.get("/", headers={"x-api-key": "two"}).status_code == 200
+    assert client.get("/").status_code == 200  # requests without the key are not limited
+    assert client.get("/").status_code == 200
+
+
+def test_user_key_falls_back_to_ip() -> None:
+    class User:
+        is_authenticated = True
+        identity = "root"
+
+    request = Request({"type": "http", "headers": [], "client": ("1.2.3.4", 80), "user": User()})
+    assert user_key(request) == "user:root"
+
+    request = Request({"type": "http", "headers": [], "client": ("1.2.3.4", 80)})
+    assert user_key(request) == "ip:1.2.3.4"
+
+
+def test_translates_rate_limited_error(limiter: RateLimiter) -> None:
+    policy = limiter.fixed_window("1/minute", "manual")
+
+    async def manual_view(request: Request) -> Response:
+        await policy.hit_or_raise("actor")
+        return PlainTextResponse("ok")
+
+    client = make_app([Route("/", manual_view)])
+    assert client.get("/").status_code == 200
+    response = client.get("/")
+    assert response.status_code == 429
+    assert response.text == "Too Many Requests"
+    assert "retry-after" in response.headers
+
+
+def test_uses_app_exception_handler(limiter: RateLimiter) -> None:
+    async def handle_too_many_requests(request: Request, exc: Exception) -> Response:
+        assert isinstance(exc, TooManyRequests)
+        return PlainTextResponse("Slow down", status_code=exc.status_code, headers=exc.headers)
+
+    app = Kupala(
+        routes=[Route("/", view)],
+        middleware=[Middleware(RateLimitMiddleware, paths={"/": [limiter.fixed_window("1/minute", "api")]})],
+        exception_handlers={429: handle_too_many_requests},
+    )
+    client = TestClient(app)
+    assert client.get("/").status_code == 200
+    response = client.get("/")
+    assert response.status_code == 429
+    assert response.text == "Slow down"
+    assert "retry-after" in response.headers
+
+
+def test_headers_can_be_disabled(limiter: RateLimiter) -> None:
+    client = make_app([Route("/", view)], paths={"/": [limiter.fixed_window("1/minute", "api")]}, headers=False)
+    assert "ratelimit-limit" not in client.get("/").headers
+    assert "retry-after" in client.get("/").headers
+
+
+def test_get_rate_limit_headers() -> None:
+    result = RateLimitResult(allowed=False, limit=10, remaining=0, reset_after=1.2, retry_after=0.3)
+    assert get_rate_limit_headers(result) == {
+        "ratelimit-limit": "10",
+        "ratelimit-remaining": "0",
+        "ratelimit-reset": "2",
+        "retry-after": "1",
+    }
@@ -1,9 +1,15 @@
+import httpx
 import pytest
 from starlette.responses import PlainTextResponse
 from starlette.testclient import TestClient
 from starlette.types import Receive, Scope, Send
 
-from kupala.middleware.request_id import RequestIDMiddleware
+from kupala.middleware.request_id import (
+    RequestIDMiddleware,
+    generate_request_id,
+    get_traceparent,
+    httpx_traceparent_hook,
+)
 from kupala.requests import Request
 
 
@@ -26,3 +32,76 @@ async def test_reuses_request_id() -> None:
     response = client.get("/")
     assert client.get("/", headers={"x-request-id": "id"}).text == "id"
     assert response.headers["x-request-id"] == response.text
+
+
+def test_generated_ids_are_sortable() -> None:
+    ids = [generate_request_id() for _ in range(1000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 1000
+    assert all(len(request_id) == 32 for request_id in ids)
+
+
+def test_replaces_invalid_request_id() -> None:
+    client = TestClient(RequestIDMiddleware(app))
+    assert len(client.get("/", headers={"x-request-id": "a" * 200}).text) == 32
+    assert len(client.get("/", headers={"x-request-id": "a\tb"}).text) == 32
+    assert len(client.get("/", headers={"x-request-id": "../../etc"}).text) == 32
+    assert client.get("/", headers={"x-request-id": "req-1.a:b"}).text == "req-1.a:b"
+
+
+def test_keeps_response_headers() -> None:
+    async def app_with_headers(scope: Scope, receive: Receive, send: Send) -> None:
+        await PlainTextResponse("ok", headers={"x-custom": "1"})(scope, receive, send)
+
+    response = TestClient(RequestIDMiddleware(app_with_headers)).get("/", headers={"x-request-id": "id"})
+    assert response.headers["x-custom"] == "1"
+    assert response.headers["x-request-id"] == "id"
+
+
+def test_replaces_response_request_id() -> None:
+    async def app_with_request_id(scope: Scope, receive: Receive, send: Send) -> None:
+        await PlainTextResponse("ok", headers={"x-request-id": "inner"})(scope, receive, send)
+
+    response = TestClient(RequestIDMiddleware(app_with_request_id)).get("/", headers={"x-request-id": "id"})
+    assert response.headers.get_list("x-request-id") == ["id"]
+
+
+async def traceparent_app(scope: Scope, receive: Receive, send: Send) -> None:
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text=request.headers["traceparent"])),
+        event_hooks={"request": [httpx_traceparent_hook]},
+    ) as client:
+        outgoing = (await client.get("http://example.com")).text
+
+    assert get_traceparent() == scope["state"]["traceparent"] == outgoing
+    await PlainTextResponse(outgoing)(scope, receive, send)
+
+
+def test_continues_trace() -> None:
+    client = TestClient(RequestIDMiddleware(traceparent_app, trace_context=True))
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    response = client.get("/", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-00"})
+    assert response.headers["x-request-id"] == trace_id
+    _, response_trace_id, span_id, flags = response.text.split("-")
+    assert response_trace_id == trace_id
+    assert span_id != "00f067aa0ba902b7"
+    assert flags == "00"
+
+
+def test_starts_trace() -> None:
+    client = TestClient(RequestIDMiddleware(traceparent_app, trace_context=True))
+    response = client.get("/", headers={"traceparent": "invalid"})
+    assert response.text.split("-")[1] == response.headers["x-request-id"]
+
+    response = client.get("/", headers={"x-request-id": "custom"})
+    assert response.headers["x-request-id"] == "custom"
+    assert len(response.text.split("-")[1]) == 32
+    assert get_traceparent() is None
+
+
+def test_does_not_modify_reused_response() -> None:
+    response = PlainTextResponse("ok")
+    client = TestClient(RequestIDMiddleware(response))
+    client.get("/")
+    assert len(client.get("/").headers.get_list("x-request-id")) == 1
+    assert response.raw_headers == PlainTextResponse("ok").raw_headers
@@ -1,7 +1,9 @@
+import typing
+
 import pytest
 from starlette.responses import PlainTextResponse
 from starlette.testclient import TestClient
-from starlette.types import Receive, Scope, Send
+from starlette.types import Message, Receive, Scope, Send
 from starlette.websockets import WebSocket
 
 from kupala.middleware import RequestLimitMiddleware
@@ -44,3 +46,81 @@ async def test_request_limit_middleware_ignores_websockets() -> None:
     client = TestClient((RequestLimitMiddleware(app, max_body_size=1)))
     with client.websocket_connect("/") as session:
         session.send_text("content")
+
+
+@pytest.mark.asyncio
+async def test_request_limit_middleware_rejects_before_calling_app() -> None:
+    calls: list[str] = []
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        calls.append(scope["path"])  # pragma: no cover
+
+    client = TestClient(RequestLimitMiddleware(app, max_body_size=5))
+    assert client.post("/", content=b"0123456789").status_code == 413
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_request_limit_middleware_limits_chunked_body() -> None:
+    def body() -> typing.Iterator[bytes]:
+        yield b"01234"
+        yield b"56789"
+
+    async def body_app(scope: Scope, receive: Receive, send: Send) -> None:
+        request = Request(scope, receive, send)
+        await PlainTextResponse(await request.body())(scope, receive, send)
+
+    client = TestClient(RequestLimitMiddleware(body_app, max_body_size=8))
+    response = client.post("/", content=body())
+    assert response.status_code == 413
+    assert response.text == "Entity Too Large"
+
+
+@pytest.mark.asyncio
+async def test_request_limit_middleware_selects_limit() -> None:
+    middleware = RequestLimitMiddleware(
+        app,
+        max_body_size=5,
+        content_type_limits={"multipart/form-data": 1024, "image/*": 2048},
+        path_limits={"/uploads": None, "/uploads/avatars": 10},
+    )
+    client = TestClient(middleware)
+    assert client.post("/", data={"content": "value"}).status_code == 413
+    assert client.post("/", files={"file": ("a.txt", b"content")}).status_code == 200
+    assert client.post("/uploads", data={"content": "value"}).status_code == 200
+    assert client.post("/uploads/avatars", data={"content": "value" * 10}).status_code == 413
+    assert client.post("/uploads-admin", data={"content": "value"}).status_code == 413
+
+    scope: Scope = {"type": "http", "path": "/", "headers": [(b"content-type", b"image/png")]}
+    assert middleware.get_limit(scope) == 2048
+
+
+@pytest.mark.asyncio
+async def test_request_limit_middleware_limits_inflight_bytes() -> None:
+    middleware = RequestLimitMiddleware(app, max_body_size=None, max_inflight_size=20)
+    client = TestClient(middleware)
+    assert client.post("/", data={"content": "value"}).status_code == 200
+    assert middleware.inflight_size == 0
+
+    middleware.inflight_size = 15  # simulate other requests receiving bodies
+    response = client.post("/", data={"content": "value"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_length", [b"-100", b"abc", b"+5", b""])
+async def test_request_limit_middleware_rejects_invalid_content_length(content_length: bytes) -> None:
+    middleware = RequestLimitMiddleware(app, max_body_size=None, max_inflight_size=20)
+    scope: Scope = {"type": "http", "path": "/", "headers": [(b"content-length", content_length)]}
+    messages: list[Message] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}  # pragma: no cover
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    assert messages[0]["status"] == 400
+    assert middleware.inflight_size == 0
@@ -0,0 +1,44 @@
+import logging
+import typing
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from kupala.middleware.request_id import RequestIDMiddleware
+from kupala.middleware.server_timing import ServerTimingMiddleware
+from kupala.routing import Mount, Route, Router
+from kupala.timings import span
+
+
+def view(request: Request) -> PlainTextResponse:
+    with span("cache"):
+        pass
+    with span("cache"):
+        pass
+    return PlainTextResponse("ok")
+
+
+def test_server_timing_header() -> None:
+    app = ServerTimingMiddleware(Router([Mount("/api", routes=[Route("/", view)])]), log_level=None)
+    response = TestClient(app).get("/api/")
+    names = [item.split(";")[0] for item in response.headers["server-timing"].split(", ")]
+    assert names == ["total", "middleware", "routing", "handler", "cache"]
+    assert 'desc="2"' in response.headers["server-timing"].split(", ")[-1]
+
+
+def test_server_timing_disabled_header() -> None:
+    app = ServerTimingMiddleware(Router([Route("/", view)]), send_header=False, log_level=None)
+    assert "server-timing" not in TestClient(app).get("/").headers
+
+
+def test_server_timing_log(caplog: pytest.LogCaptureFixture) -> None:
+    app = RequestIDMiddleware(ServerTimingMiddleware(Router([Route("/", view)])))
+    with caplog.at_level(logging.INFO, logger="kupala.timings"):
+        TestClient(app).get("/", headers={"x-request-id": "abc"})
+
+    record = typing.cast(typing.Any, caplog.records[-1])  # extra fields are record attributes
+    assert record.getMessage().startswith("abc GET / 200 total=")
+    assert record.request_id == "abc"
+    assert set(record.timings) == {"total", "middleware", "routing", "handler", "cache"}
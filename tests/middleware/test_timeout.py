@@ -4,6 +4,7 @@ from starlette.responses import PlainTextResponse
 from starlette.testclient import TestClient
 from starlette.types import Receive, Scope, Send
 
+from kupala.deadlines import DeadlineExceeded, get_remaining_time
 from kupala.middleware.timeout import TimeoutMiddleware
 
 
@@ -22,3 +23,30 @@ async def test_timeout_middleware() -> None:
 async def test_timeout_middleware_not_fails_withing_timespan() -> None:
     client = TestClient(TimeoutMiddleware(app, timeout=1))
     assert client.get("/").status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_timeout_middleware_path_timeouts() -> None:
+    client = TestClient(TimeoutMiddleware(app, timeout=0.1, path_timeouts={"/reports": 1, "/reports/slow": None}))
+    assert client.get("/").status_code == 504
+    assert client.get("/reports").status_code == 200
+    assert client.get("/reports/slow").status_code == 200
+    assert client.get("/reportsv2").status_code == 504  # prefixes match whole path segments
+
+
+@pytest.mark.asyncio
+async def test_timeout_middleware_exposes_deadline() -> None:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        await PlainTextResponse(str(get_remaining_time()))(scope, receive, send)
+
+    client = TestClient(TimeoutMiddleware(app, timeout=5))
+    assert 4 < float(client.get("/").text) <= 5
+
+
+@pytest.mark.asyncio
+async def test_timeout_middleware_handles_deadline_exceeded() -> None:
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        raise DeadlineExceeded()
+
+    client = TestClient(TimeoutMiddleware(app, timeout=5))
+    assert client.get("/").status_code == 504
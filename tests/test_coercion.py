@@ -0,0 +1,157 @@
+import dataclasses
+import datetime
+import enum
+import typing
+import uuid
+
+import pytest
+from starlette.datastructures import MultiDict
+
+from kupala.coercion import MISSING, ValidationErrors, coerce, get_coercer, get_text_coercer, read_fields
+
+
+class Color(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+
+@dataclasses.dataclass
+class Address:
+    city: str
+    zip_code: str | None = None
+
+
+@dataclasses.dataclass
+class User:
+    name: str
+    age: int
+    address: Address
+    tags: list[str] = dataclasses.field(default_factory=list)
+
+
+class Point(typing.TypedDict):
+    x: float
+    y: float
+    label: typing.NotRequired[str]
+
+
+@dataclasses.dataclass
+class Node:
+    value: int
+    children: list["Node"] = dataclasses.field(default_factory=list)
+
+
+@pytest.mark.parametrize(
+    "tp, value, expected",
+    [
+        (int, 1, 1),
+        (float, 1, 1.0),
+        (str, "a", "a"),
+        (bool, True, True),
+        (int | None, None, None),
+        (Color, "red", Color.RED),
+        (typing.Literal["a", "b"], "b", "b"),
+        (datetime.date, "2024-01-02", datetime.date(2024, 1, 2)),
+        (datetime.datetime, "2024-01-02T03:04:05", datetime.datetime(2024, 1, 2, 3, 4, 5)),
+        (uuid.UUID, "12345678123456781234567812345678", uuid.UUID("12345678123456781234567812345678")),
+        (list[int], [1, 2], [1, 2]),
+        (tuple[int, str], [1, "a"], (1, "a")),
+        (set[int], [1, 1], {1}),
+        (dict[str, int], {"a": 1}, {"a": 1}),
+        (typing.Any, {"a": [1]}, {"a": [1]}),
+        (Point, {"x": 1, "y": 2.5}, {"x": 1.0, "y": 2.5}),
+    ],
+)
+def test_coerce(tp: typing.Any, value: typing.Any, expected: typing.Any) -> None:
+    assert coerce(tp, value) == expected
+
+
+def test_coerce_dataclass() -> None:
+    user = coerce(User, {"name": "root", "age": 30, "address": {"city": "Minsk"}, "extra": 1})
+    assert user == User(name="root", age=30, address=Address(city="Minsk"))
+
+
+def test_coerce_recursive_type() -> None:
+    assert coerce(Node, {"value": 1, "children": [{"value": 2}]}) == Node(1, [Node(2)])
+
+
+def test_collects_field_errors() -> None:
+    with pytest.raises(ValidationErrors) as ex:
+        coerce(User, {"name": 1, "age": True, "address": {}, "tags": ["a", 2]})
+    assert ex.value.errors == {
+        "name": ["Must be a string."],
+        "age": ["Must be an integer."],
+        "address.city": ["This field is required."],
+        "tags.1": ["Must be a string."],
+    }
+
+
+def test_root_errors() -> None:
+    with pytest.raises(ValidationErrors) as ex:
+        coerce(Point, [])
+    assert ex.value.errors == {"__root__": ["Must be an object."]}
+
+
+def test_caches_coercers() -> None:
+    assert get_coercer(User) is get_coercer(User)
+
+
+def test_unsupported_type() -> None:
+    with pytest.raises(TypeError):
+        get_coercer(1)
+
+
+@dataclasses.dataclass
+class Filters:
+    search: str
+    page: int = 1
+    colors: list[Color] = dataclasses.field(default_factory=list)
+    since: datetime.date | None = None
+
+
+@pytest.mark.parametrize(
+    "tp, value, expected",
+    [
+        (int, "1", 1),
+        (float, "1.5", 1.5),
+        (bool, "on", True),
+        (bool, "False", False),
+        (Color, "green", Color.GREEN),
+        (typing.Literal[1, 2], "2", 2),
+        (datetime.datetime, "2024-01-02T03:04:05", datetime.datetime(2024, 1, 2, 3, 4, 5)),
+        (int | None, "", None),
+        (int | None, "3", 3),
+    ],
+)
+def test_coerce_text(tp: typing.Any, value: str, expected: typing.Any) -> None:
+    errors: dict[str, list[str]] = {}
+    assert get_text_coercer(tp)(value, "field", errors) == expected
+    assert not errors
+
+
+def test_read_fields() -> None:
+    fields = MultiDict([("page", "1"), ("page", "2"), ("ids", "1"), ("ids", "2")])
+    assert read_fields(int, "page", fields) == 2
+    assert read_fields(list[int], "ids", fields) == [1, 2]
+    assert read_fields(tuple[int, ...], "ids", fields) == (1, 2)
+    assert read_fields(list[int], "missing", fields) == []
+    assert read_fields(int, "missing", fields) is MISSING
+    assert read_fields(list[int] | None, "ids", fields) == [1, 2]
+    assert read_fields(list[int] | None, "missing", fields) is None
+
+
+def test_read_fields_group() -> None:
+    fields = MultiDict([("search", "shoes"), ("colors", "red"), ("colors", "green"), ("since", "2024-01-02")])
+    assert read_fields(Filters, "filters", fields) == Filters(
+        search="shoes", colors=[Color.RED, Color.GREEN], since=datetime.date(2024, 1, 2)
+    )
+
+
+def test_read_fields_errors() -> None:
+    with pytest.raises(ValidationErrors) as ex:
+        read_fields(Filters, "filters", MultiDict([("page", "x"), ("colors", "red"), ("colors", "blue")]))
+    assert ex.value.errors == {
+        "search": ["This field is required."],
+        "page": ["Must be an integer."],
+        "colors.1": ["Must be one of: red, green."],
+    }
@@ -0,0 +1,57 @@
+import httpx
+import pytest
+
+from kupala.deadlines import DeadlineExceeded, deadline, get_deadline, get_remaining_time, httpx_deadline_hook
+
+
+def test_deadline() -> None:
+    assert get_deadline() is None
+    assert get_remaining_time() is None
+
+    with deadline(10) as outer:
+        assert outer is not None
+        remaining = get_remaining_time()
+        assert remaining is not None and 9 < remaining <= 10
+
+        with deadline(1) as inner:
+            assert get_deadline() == inner
+            assert inner is not None and inner < outer
+
+        with deadline(100):
+            assert get_deadline() == outer
+
+        with deadline(None):
+            assert get_deadline() == outer
+
+        assert get_deadline() == outer
+    assert get_deadline() is None
+
+
+def test_remaining_time_is_not_negative() -> None:
+    with deadline(-1):
+        assert get_remaining_time() == 0
+
+
+@pytest.mark.asyncio
+async def test_httpx_hook_caps_timeouts() -> None:
+    timeouts: list[dict[str, float | None]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        timeout=httpx.Timeout(5, connect=0.5),
+        event_hooks={"request": [httpx_deadline_hook]},
+    ) as client:
+        await client.get("http://example.com")
+        assert timeouts[-1] == {"connect": 0.5, "read": 5, "write": 5, "pool": 5}
+
+        with deadline(2):
+            await client.get("http://example.com")
+        assert timeouts[-1]["connect"] == 0.5
+        assert 1 < (timeouts[-1]["read"] or 0) <= 2
+
+        with deadline(-1), pytest.raises(DeadlineExceeded):  # the deadline has already passed
+            await client.get("http://example.com")
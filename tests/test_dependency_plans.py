@@ -0,0 +1,319 @@
+import contextlib
+import typing
+
+import anyio
+import anyio.lowlevel
+import pytest
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.testclient import TestClient
+from starlette_dispatch.injections import DependencyRequiresValueError
+
+from kupala import Kupala
+from kupala.dependencies import FromPath
+from kupala.dependency_plans import PlanCache, call_with_dependencies, compile_plan
+from kupala.dependency_resolvers import (
+    ConcurrentResolver,
+    DependencyScope,
+    DependencySpec,
+    FactoryResolver,
+    VariableResolver,
+)
+from kupala.routing import PLAN_ATTRIBUTE, RouteGroup
+from kupala.timings import collect_timings
+
+
+class Service:
+    pass
+
+
+service = Service()
+ServiceDep = typing.Annotated[Service, VariableResolver(service)]
+Host = typing.Annotated[str, lambda request: request.url.hostname]
+ParamName = typing.Annotated[str, lambda request, spec: spec.param_name]
+
+exits: list[str] = []
+
+
+@contextlib.asynccontextmanager
+async def make_session() -> typing.AsyncGenerator[str]:
+    yield "session"
+    exits.append("session")
+
+
+Session = typing.Annotated[str, FactoryResolver(make_session)]
+
+
+def test_compile_plan() -> None:
+    async def view(
+        request: Request,
+        app: Kupala,
+        svc: ServiceDep,
+        host: Host,
+        name: ParamName,
+        spec: DependencySpec,
+        session: Session,
+        user_id: FromPath[int],
+    ) -> None: ...  # pragma: no cover
+
+    app = Kupala()
+    plan = PlanCache(view).get(app)
+    assert plan.constants["app"] is app
+    assert plan.constants["svc"] is service
+    assert plan.constants["spec"].param_name == "spec"
+    assert plan.connection_params == ("request",)
+    assert [spec.param_name for spec, _ in plan.request_calls] == ["host", "name"]
+    assert [spec.param_name for spec, _ in plan.async_steps] == ["session", "user_id"]
+    assert plan.concurrent_steps == ()
+    assert plan.needs_context
+
+
+def test_plan_without_async_resolvers_needs_no_context() -> None:
+    async def view(request: Request, svc: ServiceDep) -> None: ...  # pragma: no cover
+
+    plan = PlanCache(view).get(Kupala())
+    assert not plan.needs_context
+
+
+def test_app_resolvers_override_builtins() -> None:
+    async def view(svc: Service, request: Request) -> None: ...  # pragma: no cover
+
+    other = Service()
+    plan = compile_plan(
+        PlanCache(view).specs, Kupala(), {Service: VariableResolver(other), Request: VariableResolver(1)}
+    )
+    assert plan.constants == {"svc": other, "request": 1}
+
+
+def test_resolves_dependencies() -> None:
+    routes = RouteGroup()
+
+    @routes.get("/users/{user_id}")
+    async def async_view(
+        request: Request, svc: ServiceDep, host: Host, name: ParamName, session: Session, user_id: FromPath[int]
+    ) -> Response:
+        assert svc is service
+        return JSONResponse([request.url.path, host, name, session, user_id, exits])
+
+    @routes.get("/sync")
+    def sync_view(host: Host) -> Response:
+        return PlainTextResponse(host)
+
+    exits.clear()
+    client = TestClient(Kupala(routes=routes))
+    assert client.get("/users/1").json() == ["/users/1", "testserver", "name", "session", 1, []]
+    assert exits == ["session"]
+    assert client.get("/sync").text == "testserver"
+
+
+def test_compiles_plans_on_startup() -> None:
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(svc: ServiceDep) -> Response:
+        return PlainTextResponse("ok")  # pragma: no cover
+
+    app = Kupala(routes=routes)
+    plans: PlanCache = getattr(view, PLAN_ATTRIBUTE)
+    assert plans._plan is None
+    with TestClient(app):
+        assert plans._plan is not None
+
+
+def test_none_for_required_dependency() -> None:
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(value: typing.Annotated[str, lambda request: None]) -> Response:
+        return PlainTextResponse("ok")  # pragma: no cover
+
+    with pytest.raises(DependencyRequiresValueError):
+        TestClient(Kupala(routes=routes)).get("/")
+
+
+async def test_resolves_concurrent_dependencies() -> None:
+    first_started = anyio.Event()
+
+    async def first() -> str:
+        first_started.set()
+        return "first"
+
+    async def second() -> str:
+        await first_started.wait()  # deadlocks if resolved after the first one
+        return "second"
+
+    async def view(
+        a: typing.Annotated[str, ConcurrentResolver(FactoryResolver(second))],
+        b: typing.Annotated[str, ConcurrentResolver(FactoryResolver(first))],
+    ) -> list[str]:
+        return [a, b]
+
+    plan = PlanCache(view).get(Kupala())
+    assert len(plan.concurrent_steps) == 2
+    with anyio.fail_after(1), collect_timings() as timings:
+        request = Request({"type": "http", "headers": [], "path_params": {}})
+        assert await call_with_dependencies(plan, request, view) == ["second", "first"]
+    assert "deps" in timings.spans
+
+
+def test_request_scope_shares_value_in_call_graph() -> None:
+    calls: list[str] = []
+
+    @contextlib.asynccontextmanager
+    async def make_connection() -> typing.AsyncGenerator[str]:
+        calls.append("open")
+        yield "connection"
+        calls.append("close")
+
+    Connection = typing.Annotated[str, DependencyScope.REQUEST, make_connection]
+
+    def make_repository(connection: Connection) -> str:
+        return "repository:" + connection
+
+    Repository = typing.Annotated[str, make_repository]
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(first: Connection, second: Connection, repository: Repository) -> Response:
+        calls.append("view")
+        return JSONResponse([first, second, repository])
+
+    client = TestClient(Kupala(routes=routes))
+    assert client.get("/").json() == ["connection", "connection", "repository:connection"]
+    assert calls == ["open", "view", "close"]
+    client.get("/")
+    assert calls == ["open", "view", "close"] * 2
+
+
+def test_singleton_scope() -> None:
+    calls: list[str] = []
+
+    @contextlib.asynccontextmanager
+    async def make_client() -> typing.AsyncGenerator[int]:
+        calls.append("open")
+        yield len(calls)
+        calls.append("close")
+
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(
+        client: typing.Annotated[int, FactoryResolver(make_client, scope=DependencyScope.SINGLETON)],
+    ) -> Response:
+        return JSONResponse(client)
+
+    with TestClient(Kupala(routes=routes)) as client:
+        assert client.get("/").json() == 1
+        assert client.get("/").json() == 1
+        assert calls == ["open"]
+    assert calls == ["open", "close"]
+
+
+def test_teardown_runs_after_response_in_reverse_order() -> None:
+    events: list[str] = []
+
+    def make_sync() -> typing.Iterator[str]:
+        events.append("enter sync")
+        yield "sync"
+        events.append("exit sync")
+
+    @contextlib.asynccontextmanager
+    async def make_async() -> typing.AsyncGenerator[str]:
+        events.append("enter async")
+        yield "async"
+        events.append("exit async")
+
+    async def stream() -> typing.AsyncGenerator[str]:
+        events.append("streaming")
+        yield "body"
+
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(
+        a: typing.Annotated[str, contextlib.contextmanager(make_sync)],
+        b: typing.Annotated[str, make_async],
+    ) -> Response:
+        return StreamingResponse(stream())
+
+    assert TestClient(Kupala(routes=routes)).get("/").text == "body"
+    assert events == ["enter sync", "enter async", "streaming", "exit async", "exit sync"]
+
+
+async def test_endpoint_called_directly_returns_response() -> None:
+    events: list[str] = []
+
+    @contextlib.asynccontextmanager
+    async def make_value() -> typing.AsyncGenerator[str]:
+        yield "value"
+        events.append("exit")
+
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(value: typing.Annotated[str, make_value]) -> Response:
+        return PlainTextResponse(value)
+
+    endpoint = typing.cast(typing.Callable[[Request], typing.Awaitable[Response]], view)
+    response = await endpoint(Request({"type": "http", "app": Kupala(), "headers": [], "path_params": {}}))
+    assert isinstance(response, PlainTextResponse)
+    assert events == ["exit"]  # no route to send the response, dependencies exit when the endpoint returns
+
+
+async def test_streaming_response_without_route_warns() -> None:
+    @contextlib.asynccontextmanager
+    async def make_value() -> typing.AsyncGenerator[str]:
+        yield "value"
+
+    async def stream() -> typing.AsyncGenerator[str]:
+        yield "body"  # pragma: no cover
+
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(value: typing.Annotated[str, make_value]) -> Response:
+        return StreamingResponse(stream())
+
+    endpoint = typing.cast(typing.Callable[[Request], typing.Awaitable[Response]], view)
+    with pytest.warns(RuntimeWarning, match="dependencies have exited"):
+        await endpoint(Request({"type": "http", "app": Kupala(), "headers": [], "path_params": {}}))
+
+
+async def test_request_scope_memoizes_events() -> None:
+    event = anyio.Event()
+
+    def make_event() -> anyio.Event:
+        return event
+
+    resolver = FactoryResolver(make_event, scope=DependencyScope.REQUEST)
+
+    async def view(
+        a: typing.Annotated[anyio.Event, ConcurrentResolver(resolver)],
+        b: typing.Annotated[anyio.Event, resolver],
+    ) -> list[anyio.Event]:
+        return [a, b]
+
+    request = Request({"type": "http", "headers": [], "path_params": {}})
+    with anyio.fail_after(1):
+        assert await call_with_dependencies(PlanCache(view).get(Kupala()), request, view) == [event, event]
+
+
+async def test_request_scope_with_concurrent_resolvers() -> None:
+    calls: list[str] = []
+
+    async def make_value() -> str:
+        calls.append("call")
+        await anyio.lowlevel.checkpoint()
+        return "value"
+
+    resolver = FactoryResolver(make_value, scope=DependencyScope.REQUEST)
+
+    async def view(
+        a: typing.Annotated[str, ConcurrentResolver(resolver)],
+        b: typing.Annotated[str, ConcurrentResolver(resolver)],
+    ) -> list[str]:
+        return [a, b]
+
+    request = Request({"type": "http", "headers": [], "path_params": {}})
+    assert await call_with_dependencies(PlanCache(view).get(Kupala()), request, view) == ["value", "value"]
+    assert calls == ["call"]
@@ -0,0 +1,180 @@
+import contextlib
+import dataclasses
+import json
+import typing
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.testclient import TestClient
+
+from kupala import Kupala
+from kupala.dependencies import FromJSON, FromQuery
+from kupala.dependency_resolvers import DependencySpec, JSONDataResolver, ResolveContext
+from kupala.exceptions import BadRequest, PayloadTooLarge, UnprocessableEntity
+from kupala.routing import RouteGroup
+
+
+@dataclasses.dataclass
+class Credentials:
+    login: str
+    password: str
+
+
+class Profile(typing.TypedDict):
+    login: str
+    age: int
+
+
+def make_request(body: bytes, headers: dict[str, str] | None = None) -> Request:
+    chunks = [body[i : i + 4] for i in range(0, len(body), 4)] or [b""]
+
+    async def receive() -> dict[str, typing.Any]:
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    raw_headers = [(key.encode(), value.encode()) for key, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "POST", "headers": raw_headers}, receive)
+
+
+async def resolve_json(request: Request, tp: typing.Any, resolver: JSONDataResolver | None = None) -> typing.Any:
+    resolver = resolver or JSONDataResolver()
+    spec = DependencySpec(
+        param_name="data",
+        param_type=tp,
+        default=None,
+        optional=False,
+        annotation=tp,
+        resolver=resolver,
+        resolver_options=[],
+    )
+    with contextlib.ExitStack() as sync_stack:
+        async with contextlib.AsyncExitStack() as async_stack:
+            return await resolver.resolve(ResolveContext(request, sync_stack, async_stack, {}), spec)
+
+
+class TestJSONDataResolver:
+    async def test_decodes_types(self) -> None:
+        request = make_request(b'{"login": "root", "password": "secret", "age": 30}')
+        assert await resolve_json(request, Credentials) == Credentials(login="root", password="secret")
+        assert await resolve_json(request, Profile) == {"login": "root", "age": 30}
+
+    async def test_decodes_body_once(self) -> None:
+        request = make_request(b'{"login": "root", "password": "secret"}')
+        first = await resolve_json(request, dict[str, str])
+        assert await resolve_json(request, dict[str, str]) == first
+        assert request.scope["kupala.json"] is not None
+
+    async def test_field_errors(self) -> None:
+        with pytest.raises(UnprocessableEntity) as ex:
+            await resolve_json(make_request(b'{"login": 1}'), Credentials)
+        assert ex.value.errors == {"login": ["Must be a string."], "password": ["This field is required."]}
+
+    async def test_invalid_json(self) -> None:
+        with pytest.raises(BadRequest):
+            await resolve_json(make_request(b"{"), Credentials)
+
+    async def test_rejects_by_content_length(self) -> None:
+        request = make_request(b"{}", headers={"content-length": "1000"})
+        with pytest.raises(PayloadTooLarge):
+            await resolve_json(request, dict, JSONDataResolver(max_size=10))
+        assert not hasattr(request, "_body")
+
+    async def test_rejects_while_streaming(self) -> None:
+        request = make_request(b'{"login": "root", "password": "secret"}')
+        with pytest.raises(PayloadTooLarge):
+            await resolve_json(request, Credentials, JSONDataResolver(max_size=10))
+
+
+def test_from_json_endpoint() -> None:
+    routes = RouteGroup()
+
+    @routes.post("/")
+    async def view(credentials: FromJSON[Credentials], profile: FromJSON[Profile]) -> Response:
+        return JSONResponse([credentials.login, profile["age"]])
+
+    client = TestClient(Kupala(routes=routes))
+    assert client.post("/", json={"login": "root", "password": "secret", "age": 1}).json() == ["root", 1]
+    assert client.post("/", json={"login": "root"}).status_code == 422
+
+
+def test_from_query_endpoint() -> None:
+    routes = RouteGroup()
+
+    @dataclasses.dataclass
+    class Pagination:
+        page: int = 1
+        page_size: int = 20
+
+    @routes.get("/")
+    async def view(
+        pagination: FromQuery[Pagination],
+        ids: FromQuery[list[int]],
+        search: FromQuery[str] | None,
+        active: FromQuery[bool] = True,
+    ) -> Response:
+        return JSONResponse([pagination.page, pagination.page_size, ids, search, active])
+
+    client = TestClient(Kupala(routes=routes))
+    assert client.get("/?page=2&ids=1&ids=2&search=a").json() == [2, 20, [1, 2], "a", True]
+    assert client.get("/?active=no").json() == [1, 20, [], None, False]
+    assert client.get("/?page=x").status_code == 422
+
+
+async def test_query_errors() -> None:
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(page: FromQuery[int]) -> Response:
+        raise NotImplementedError  # pragma: no cover
+
+    async def handle_errors(request: Request, exc: Exception) -> Response:
+        assert isinstance(exc, UnprocessableEntity)
+        return JSONResponse(exc.errors, status_code=422)
+
+    client = TestClient(Kupala(routes=routes, exception_handlers={UnprocessableEntity: handle_errors}))
+    assert client.get("/?page=x").json() == {"page": ["Must be an integer."]}
+    assert client.get("/").json() == {"page": ["This field is required."]}
+
+
+def test_from_query_optional_collections() -> None:
+    routes = RouteGroup()
+
+    @dataclasses.dataclass
+    class Filters:
+        tags: list[str] | None = None
+
+    @routes.get("/")
+    async def view(
+        ids: FromQuery[list[int] | None], filters: FromQuery[Filters], page: FromQuery[int | None]
+    ) -> Response:
+        return JSONResponse([ids, filters.tags, page])
+
+    client = TestClient(Kupala(routes=routes))
+    assert client.get("/?ids=1&ids=2&tags=a&page=2").json() == [[1, 2], ["a"], 2]
+    assert client.get("/").json() == [None, None, None]
+
+
+def test_unsupported_query_type_fails_at_startup() -> None:
+    routes = RouteGroup()
+
+    @routes.get("/")
+    async def view(value: FromQuery[dict[str, int]]) -> Response:
+        raise NotImplementedError  # pragma: no cover
+
+    with pytest.raises(TypeError, match="Unsupported type"), TestClient(Kupala(routes=routes)):
+        pass  # pragma: no cover
+
+
+async def test_json_body_is_decoded_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[bytes] = []
+
+    def loads(body: bytes) -> typing.Any:
+        calls.append(body)
+        return json.loads(body)
+
+    monkeypatch.setattr("kupala.dependency_resolvers._json_loads", loads)
+    request = make_request(b'{"login": "root", "password": "secret", "age": 30}')
+    assert await resolve_json(request, Credentials) == Credentials(login="root", password="secret")
+    assert await resolve_json(request, Profile) == {"login": "root", "age": 30}
+    assert len(calls) == 1
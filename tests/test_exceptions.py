@@ -11,6 +11,7 @@ from kupala.exceptions import (
     NotAuthenticated,
     NotAuthorized,
     NotFound,
+    PayloadTooLarge,
     RequestTimeout,
     TooManyRequests,
     UnprocessableEntity,
@@ -103,6 +104,7 @@ class TestHTTPError:
         (406, NotAcceptable, "Not Acceptable"),
         (408, RequestTimeout, "Request Timeout"),
         (409, Conflict, "Conflict"),
+        (413, PayloadTooLarge, "Content Too Large"),
         (415, UnsupportedMediaType, "Unsupported Media Type"),
         (422, UnprocessableEntity, "Unprocessable Content"),
         (422, ValidatonError, "Unprocessable Content"),
@@ -0,0 +1,132 @@
+import contextlib
+import logging
+import typing
+
+import anyio
+import anyio.lowlevel
+import pytest
+from starlette.testclient import TestClient
+
+from kupala import Kupala
+from kupala.applications import multi_lifespan
+from kupala.initializers import Initializer, run_initializers
+
+
+def make_initializer(name: str, events: list[str]) -> typing.Callable[[typing.Any], typing.AsyncContextManager[str]]:
+    @contextlib.asynccontextmanager
+    async def initializer(app: typing.Any) -> typing.AsyncGenerator[str]:
+        events.append(f"start {name}")
+        await anyio.lowlevel.checkpoint()
+        try:
+            yield name
+        finally:
+            events.append(f"stop {name}")
+
+    return initializer
+
+
+async def test_starts_independent_initializers_concurrently() -> None:
+    both_started = anyio.Event()
+    started: list[str] = []
+
+    @contextlib.asynccontextmanager
+    async def initializer(app: typing.Any) -> typing.AsyncGenerator[None]:
+        started.append("started")
+        if len(started) == 2:
+            both_started.set()
+        await both_started.wait()  # deadlocks if initializers start one after another
+        yield
+
+    with anyio.fail_after(1):
+        async with run_initializers(None, [Initializer(initializer), Initializer(initializer)]):
+            assert started == ["started", "started"]
+
+
+async def test_plain_initializers_start_in_declaration_order() -> None:
+    events: list[str] = []
+    initializers: list[typing.Any] = [
+        Initializer(make_initializer("metrics", events)),
+        make_initializer("database", events),
+        make_initializer("cache", events),
+        Initializer(make_initializer("mail", events)),
+    ]
+    async with run_initializers(None, initializers):
+        assert events.index("start metrics") < events.index("start database") < events.index("start cache")
+    assert events.index("stop cache") < events.index("stop database") < events.index("stop metrics")
+
+
+async def test_respects_dependencies() -> None:
+    events: list[str] = []
+    initializers = [
+        Initializer(make_initializer("cache", events), name="cache", depends_on=["database", "redis"]),
+        Initializer(make_initializer("database", events), name="database"),
+        Initializer(make_initializer("redis", events), name="redis", depends_on=["database"]),
+    ]
+    async with run_initializers(None, initializers) as report:
+        assert events == ["start database", "start redis", "start cache"]
+        assert report.states == ["cache", "database", "redis"]
+        assert list(report.timings) == ["cache", "database", "redis"]
+    assert events[3:] == ["stop cache", "stop redis", "stop database"]
+
+
+async def test_logs_startup_time(caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.INFO, logger="kupala.startup"):
+        async with run_initializers(None, [Initializer(make_initializer("db", []), name="database")]):
+            pass
+    assert caplog.records[0].initializer == "database"  # type: ignore[attr-defined]
+    assert "Started 1 initializers" in caplog.records[1].message
+
+
+async def test_invalid_dependencies() -> None:
+    with pytest.raises(ValueError, match="unknown initializer"):
+        async with run_initializers(None, [Initializer(make_initializer("a", []), name="a", depends_on=["b"])]):
+            pass  # pragma: no cover
+
+    cycle = [
+        Initializer(make_initializer("a", []), name="a", depends_on=["b"]),
+        Initializer(make_initializer("b", []), name="b", depends_on=["a"]),
+    ]
+    with pytest.raises(ValueError, match="circular dependencies: a, b"):
+        async with run_initializers(None, cycle):
+            pass  # pragma: no cover
+
+
+async def test_failed_initializer_stops_others() -> None:
+    events: list[str] = []
+
+    @contextlib.asynccontextmanager
+    async def failing(app: typing.Any) -> typing.AsyncGenerator[None]:
+        await anyio.sleep(0.01)
+        raise RuntimeError("connection refused")
+        yield  # pragma: no cover
+
+    with pytest.raises(RuntimeError, match="connection refused"):
+        async with run_initializers(None, [make_initializer("database", events), failing]):
+            pass  # pragma: no cover
+    assert events == ["start database", "stop database"]
+
+
+def test_application_initializers() -> None:
+    events: list[str] = []
+    initializers: list[typing.Any] = [make_initializer("database", events), make_initializer("redis", events)]
+    app = Kupala(initializers=initializers)
+    with TestClient(app):
+        assert events == ["start database", "start redis"]
+        assert list(app.state.startup_timings) == [
+            "make_initializer.<locals>.initializer",
+            "make_initializer.<locals>.initializer[2]",
+        ]
+    assert events[2:] == ["stop redis", "stop database"]
+
+
+async def test_concurrent_multi_lifespan() -> None:
+    @contextlib.asynccontextmanager
+    async def first(app: typing.Any) -> typing.AsyncGenerator[dict[str, str]]:
+        yield {"first": "1"}
+
+    @contextlib.asynccontextmanager
+    async def second(app: typing.Any) -> typing.AsyncGenerator[None]:
+        yield
+
+    async with multi_lifespan(first, second, concurrent=True)(Kupala()) as state:
+        assert state == {"first": "1"}
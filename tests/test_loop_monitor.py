@@ -0,0 +1,76 @@
+import logging
+import time
+import warnings
+
+import anyio
+import jinja2
+import pytest
+
+from kupala.applications import Kupala
+from kupala.encryptors import Encryptor
+from kupala.loop_monitor import BlockingCallWarning, LoopMonitor
+from kupala.mail import Mail
+from kupala.metrics import default_registry
+from kupala.passwords import Passwords
+from kupala.templating import Templates
+
+
+def get_lag_observations() -> float:
+    [family] = [family for family in default_registry.collect() if family.name == "kupala_event_loop_lag_seconds"]
+    return next((sample.value for sample in family.samples if sample.name.endswith("_count")), 0.0)
+
+
+def block_event_loop() -> None:
+    time.sleep(0.15)
+
+
+async def test_loop_monitor_measures_lag() -> None:
+    monitor = LoopMonitor(interval=0.01)
+    app = Kupala(extensions=[monitor])
+    assert LoopMonitor.of(app) is monitor
+
+    observations = get_lag_observations()
+    async with app.initialize(app):
+        await anyio.sleep(0.05)
+    assert get_lag_observations() > observations
+
+
+async def test_loop_monitor_logs_blocking_stack(caplog: pytest.LogCaptureFixture) -> None:
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    app = Kupala(extensions=[monitor])
+    with caplog.at_level(logging.WARNING, logger="kupala.loop_monitor"):
+        async with app.initialize(app):
+            await anyio.sleep(0.02)
+            block_event_loop()
+            await anyio.sleep(0.02)
+
+    [record] = caplog.records
+    assert record.getMessage().startswith("Event loop is blocked for")
+    assert "in block_event_loop" in record.getMessage()
+
+
+async def test_loop_monitor_debug_flags_blocking_calls() -> None:
+    passwords = Passwords()
+    encryptor = Encryptor(b"PjLYEOKo6mBkKAPMmxPhPDUrRhHWy8dvwqs7SjhGObk=")
+    mail = Mail(
+        dsn="memory://",
+        from_address="root@localhost",
+        from_name="Root",
+        templates=Templates(jinja_env=jinja2.Environment(loader=jinja2.DictLoader({"text.txt": "Body"}))),
+    )
+    app = Kupala(extensions=[LoopMonitor(debug=True)])
+    async with app.initialize(app):
+        with pytest.warns(BlockingCallWarning, match="Use Passwords.amake instead"):
+            passwords.make("password")
+        with pytest.warns(BlockingCallWarning, match="Encryptor.encrypt"):
+            encryptor.encrypt(b"data")
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            await passwords.amake("password")
+            await encryptor.aencrypt(b"data")
+            await mail.send_templated_mail(to="me@me.com", subject="Test", text_template="text.txt")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        passwords.make("password")
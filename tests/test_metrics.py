@@ -0,0 +1,137 @@
+import os
+import pathlib
+
+import pytest
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from kupala.applications import Kupala
+from kupala.metrics import Counter, Gauge, Histogram, Metrics, MetricsRegistry, mark_process_dead
+from kupala.metrics._metrics import make_key
+from kupala.metrics._multiprocess import MmapDict
+from kupala.metrics.middleware import http_requests_total
+from kupala.routing import Mount, Route
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+class TestMetrics:
+    def test_counter(self, registry: MetricsRegistry) -> None:
+        counter = Counter("jobs_total", "Jobs.", registry=registry)
+        counter.inc()
+        counter.inc(2)
+        assert counter.get() == 3
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+
+    def test_labels(self, registry: MetricsRegistry) -> None:
+        counter = Counter("jobs_total", "Jobs.", ["queue"], registry=registry)
+        counter.labels("default").inc()
+        counter.labels(queue="default").inc()
+        assert counter.labels("default").get() == 2
+
+        with pytest.raises(ValueError, match="use .labels"):
+            counter.inc()
+        with pytest.raises(ValueError, match="expects labels"):
+            counter.labels("a", "b")
+
+    def test_gauge(self, registry: MetricsRegistry) -> None:
+        gauge = Gauge("workers", "Workers.", registry=registry)
+        gauge.set(10)
+        gauge.dec(3)
+        with gauge.track_inprogress():
+            assert gauge.get() == 8
+        assert gauge.get() == 7
+
+    def test_duplicate_name(self, registry: MetricsRegistry) -> None:
+        Counter("jobs_total", "Jobs.", registry=registry)
+        with pytest.raises(ValueError, match="already registered"):
+            Gauge("jobs_total", "Jobs.", registry=registry)
+
+    def test_exposition(self, registry: MetricsRegistry) -> None:
+        Counter("jobs_total", 'Jobs "done".', ["queue"], registry=registry).labels("mail").inc()
+        histogram = Histogram("job_seconds", "Job duration.", registry=registry, buckets=[0.1, 1])
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        assert registry.generate_latest().decode() == (
+            '# HELP jobs_total Jobs \\"done\\".\n'
+            "# TYPE jobs_total counter\n"
+            'jobs_total{queue="mail"} 1.0\n'
+            "# HELP job_seconds Job duration.\n"
+            "# TYPE job_seconds histogram\n"
+            'job_seconds_bucket{le="0.1"} 1.0\n'
+            'job_seconds_bucket{le="1.0"} 2.0\n'
+            'job_seconds_bucket{le="+Inf"} 3.0\n'
+            "job_seconds_count 3.0\n"
+            "job_seconds_sum 5.55\n"
+        )
+
+    def test_histogram_exposes_empty_buckets(self, registry: MetricsRegistry) -> None:
+        Histogram("job_seconds", "Job duration.", registry=registry, buckets=[0.1, 1]).observe(0.5)
+        assert 'job_seconds_bucket{le="0.1"} 0.0\n' in registry.generate_latest().decode()
+
+
+class TestMultiprocess:
+    def test_mmap_dict(self, tmp_path: pathlib.Path) -> None:
+        path = str(tmp_path / "counter_1.db")
+        values = MmapDict(path)
+        values.write_value("a", 1)
+        values.write_value("b" * 2_000_000, 2)  # grows the file
+        values.write_value("a", 3)
+        values.close()
+
+        values = MmapDict(path)
+        assert dict(values.read_all_values()) == {"a": 3, "b" * 2_000_000: 2}
+        values.close()
+
+    def test_aggregates_processes(self, tmp_path: pathlib.Path) -> None:
+        registry = MetricsRegistry(tmp_path)
+        counter = Counter("jobs_total", "Jobs.", registry=registry)
+        gauge = Gauge("memory", "Memory.", registry=registry, multiprocess_mode="max")
+        pid_gauge = Gauge("connections", "Connections.", registry=registry)
+        counter.inc(2)
+        gauge.set(10)
+        pid_gauge.set(1)
+
+        # another worker
+        for file_type, metric_name, value in [("counter", "jobs_total", 3), ("gauge_max", "memory", 20)]:
+            other = MmapDict(str(tmp_path / f"{file_type}_99999.db"))
+            other.write_value(make_key(metric_name, metric_name, {}, "Doc."), value)
+            other.close()
+
+        text = registry.generate_latest().decode()
+        assert "jobs_total 5.0" in text
+        assert "memory 20.0" in text
+        assert f'connections{{pid="{os.getpid()}"}} 1.0' in text
+
+        mark_process_dead(tmp_path, 99999)
+        assert "memory 10.0" in registry.generate_latest().decode()
+        assert "jobs_total 5.0" in registry.generate_latest().decode()
+
+
+class TestMetricsExtension:
+    def test_tracks_requests_by_route_template(self) -> None:
+        app = Kupala(
+            routes=[Mount("/users", routes=[Route("/{id}", PlainTextResponse("user"))])],
+            extensions=[Metrics()],
+        )
+        client = TestClient(app)
+        before = http_requests_total.labels("GET", "/users/{id}", 200).get()
+        missing_before = http_requests_total.labels("GET", "<unmatched>", 404).get()
+
+        client.get("/users/1")
+        client.get("/users/2")
+        client.get("/missing")
+
+        assert http_requests_total.labels("GET", "/users/{id}", 200).get() == before + 2
+        assert http_requests_total.labels("GET", "<unmatched>", 404).get() == missing_before + 1
+
+        response = client.get("/metrics")
+        assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+        assert 'kupala_http_requests_total{method="GET",route="/users/{id}",status="200"}' in response.text
+        assert "kupala_http_request_duration_seconds_bucket" in response.text
@@ -0,0 +1,266 @@
+import dataclasses
+import importlib.util
+import typing
+
+import pytest
+from redis.asyncio import Redis
+
+from kupala import Kupala
+from kupala.rate_limiters import (
+    LeasedRateLimiter,
+    MemoryRateLimitBackend,
+    Rate,
+    RateLimitCheck,
+    RateLimitedError,
+    RateLimiter,
+    RedisRateLimitBackend,
+    rate_limit_checks_total,
+)
+from kupala.rate_limiters.backends.base import CheckResult
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingBackend(MemoryRateLimitBackend):
+    calls = 0
+
+    async def check(self, checks: typing.Sequence[RateLimitCheck]) -> list[CheckResult]:
+        self.calls += 1
+        return await super().check(checks)
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def limiter(clock: Clock) -> RateLimiter:
+    return RateLimiter(MemoryRateLimitBackend(clock), local_cache_size=0)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("10/minute", Rate(10, 60)),
+        ("100 per hour", Rate(100, 3600)),
+        ("5/10s", Rate(5, 10)),
+        ("1/day", Rate(1, 86400)),
+        ("3 per 2 seconds", Rate(3, 2)),
+    ],
+)
+def test_parse_rate(value: str, expected: Rate) -> None:
+    assert Rate.parse(value) == expected
+
+
+@pytest.mark.parametrize("value", ["10", "ten/minute", "10/fortnight", "10/ms", "10/hs"])
+def test_parse_invalid_rate(value: str) -> None:
+    with pytest.raises(ValueError):
+        Rate.parse(value)
+
+
+async def test_fixed_window(limiter: RateLimiter, clock: Clock) -> None:
+    policy = limiter.fixed_window("3/minute", "login")
+    clock.now = 6000 * 60  # window start
+    results = [await policy.hit("user") for _ in range(4)]
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results] == [2, 1, 0, 0]
+    assert results[-1].retry_after == 60
+
+    clock.now += 60
+    assert await policy.hit("user")
+    assert await policy.hit("other")
+
+
+async def test_sliding_window(limiter: RateLimiter, clock: Clock) -> None:
+    policy = limiter.sliding_window("10/10s", "api")
+    clock.now = 1000 * 10
+    for _ in range(10):
+        assert await policy.hit("user")
+    assert not await policy.hit("user")
+
+    clock.now += 15  # half of the previous window is still counted
+    results = [await policy.hit("user") for _ in range(6)]
+    assert [result.allowed for result in results] == [True] * 5 + [False]
+    assert results[-1].retry_after == pytest.approx(1)
+
+
+async def test_token_bucket(limiter: RateLimiter, clock: Clock) -> None:
+    policy = limiter.token_bucket("10/10s", "api")
+    for _ in range(10):
+        assert await policy.hit("user")
+
+    result = await policy.hit("user")
+    assert not result
+    assert result.retry_after == 1
+    assert result.reset_after == 10
+
+    clock.now += 2.5
+    assert [bool(await policy.hit("user")) for _ in range(3)] == [True, True, False]
+    assert not await policy.hit("user", cost=11)
+
+
+async def test_batch_counts_only_when_all_pass(limiter: RateLimiter) -> None:
+    per_minute = limiter.fixed_window("10/minute", "minute")
+    per_second = limiter.fixed_window("1/second", "second")
+
+    assert [r.allowed for r in await limiter.check([(per_minute, "user", 1), (per_second, "user", 1)])] == [True, True]
+    assert [r.allowed for r in await limiter.check([(per_minute, "user", 1), (per_second, "user", 1)])] == [True, False]
+    assert (await per_minute.hit("user", cost=0)).remaining == 9
+
+
+async def test_hit_or_raise(limiter: RateLimiter) -> None:
+    policy = limiter.fixed_window("1/minute", "login")
+    await policy.hit_or_raise("user")
+    with pytest.raises(RateLimitedError) as exc_info:
+        await policy.hit_or_raise("user")
+    assert exc_info.value.result.retry_after > 0
+    assert exc_info.value.error_code == "rate_limited"
+
+
+async def test_clear(limiter: RateLimiter) -> None:
+    policy = limiter.fixed_window("1/minute", "login")
+    await policy.hit("user")
+    assert not await policy.hit("user")
+    await policy.clear("user")
+    assert await policy.hit("user")
+
+
+async def test_local_cache_rejects_without_backend_call(clock: Clock) -> None:
+    backend = CountingBackend(clock)
+    limiter = RateLimiter(backend)
+    policy = limiter.fixed_window("1/minute", "login")
+    limited = rate_limit_checks_total.labels("login", "limited_local")
+    limited_before = limited.get()
+
+    await policy.hit("user")
+    assert not await policy.hit("user")
+    assert backend.calls == 2
+
+    result = await policy.hit("user")
+    assert not result
+    assert result.retry_after > 0
+    assert backend.calls == 2
+    assert limited.get() == limited_before + 1
+
+    assert await policy.hit("other")
+    assert backend.calls == 3
+
+    await policy.clear("user")
+    assert await policy.hit("user")
+
+
+async def test_record_counts_checks_independently(clock: Clock) -> None:
+    backend = MemoryRateLimitBackend(clock)
+    checks = [
+        RateLimitCheck("a", "fixed_window", limit=5, period=60_000, cost=3),
+        RateLimitCheck("b", "fixed_window", limit=5, period=60_000, cost=6),
+    ]
+    assert [result.allowed for result in await backend.record(checks)] == [True, False]
+    results = await backend.check([dataclasses.replace(check, cost=0) for check in checks])
+    assert [result.remaining for result in results] == [2, 0]  # the rejected check saturates the limit
+
+
+async def test_leased_limiter_serves_hits_locally(clock: Clock) -> None:
+    backend = CountingBackend(clock)
+    limiter = LeasedRateLimiter(backend, max_error=0.1, local_cache_size=0)
+    policy = limiter.fixed_window("100/minute", "api")
+    allowed_local = rate_limit_checks_total.labels("api", "allowed_local")
+    allowed_before = allowed_local.get()
+
+    results = [await policy.hit("user") for _ in range(11)]
+    assert all(results)
+    assert [result.remaining for result in results[:3]] == [99, 98, 97]
+    assert backend.calls == 1  # the first hit leased 10 units
+    assert allowed_local.get() == allowed_before + 10
+
+    assert await policy.hit("user")
+    assert backend.calls == 2
+
+    await limiter.sync()
+    assert (await backend.check([policy.make_check("user", cost=0)]))[0].remaining == 88
+
+
+async def test_leased_limiter_error_bound(clock: Clock) -> None:
+    backend = MemoryRateLimitBackend(clock)
+    workers = [LeasedRateLimiter(backend, max_error=0.25, local_cache_size=0) for _ in range(2)]
+    policies = [worker.token_bucket("20/hour", "api") for worker in workers]
+
+    admitted = 0
+    for index in range(100):
+        admitted += bool(await policies[index % 2].hit("user"))
+        if index % 5 == 0:
+            await workers[index % 2].sync()
+    assert 20 <= admitted <= 20 + 2 * 5  # each worker may overspend by its lease of 20 * 0.25 units
+
+
+@pytest.mark.parametrize("strategy", ["fixed_window", "sliding_window", "token_bucket"])
+async def test_leased_limiter_sync_saturates_storage(clock: Clock, strategy: str) -> None:
+    backend = MemoryRateLimitBackend(clock)
+    workers = [LeasedRateLimiter(backend, max_error=0.6, local_cache_size=0) for _ in range(2)]
+    policies = [getattr(worker, strategy)("10/hour", "api") for worker in workers]
+    for policy in policies:  # both workers lease 6 units before syncing
+        for _ in range(6):
+            assert await policy.hit("user")
+
+    for worker in workers:
+        await worker.sync()  # the second worker's units do not fit, those left are counted
+    assert (await backend.check([policies[0].make_check("user", cost=0)]))[0].remaining == 0
+    assert not await policies[1].hit("user")
+
+
+async def test_leased_limiter_lease_expires(clock: Clock) -> None:
+    backend = CountingBackend(clock)
+    limiter = LeasedRateLimiter(backend, max_error=0.5, lease_ttl=0, local_cache_size=0)
+    policy = limiter.fixed_window("10/minute", "api")
+    for _ in range(3):
+        assert await policy.hit("user")
+    assert backend.calls == 3
+
+
+async def test_leased_limiter_syncs_on_shutdown(clock: Clock) -> None:
+    backend = MemoryRateLimitBackend(clock)
+    limiter = LeasedRateLimiter(backend, max_error=1, sync_interval=60, local_cache_size=0)
+    policy = limiter.fixed_window("10/minute", "api")
+    async with limiter.initializer(Kupala()):
+        for _ in range(5):
+            assert await policy.hit("user")
+    assert (await backend.check([policy.make_check("user", cost=0)]))[0].remaining == 5
+
+
+def test_from_url() -> None:
+    assert isinstance(RateLimiter.from_url("memory://").backend, MemoryRateLimitBackend)
+    assert isinstance(RateLimiter.from_url("redis://").backend, RedisRateLimitBackend)
+
+
+@pytest.mark.skipif(not importlib.util.find_spec("redis"), reason="Redis is not installed.")
+class TestRedisRateLimitBackend:
+    async def test_strategies(self) -> None:
+        limiter = RateLimiter(RedisRateLimitBackend(Redis.from_url("redis://")), "test_rate_limit", local_cache_size=0)
+        for policy in [
+            limiter.fixed_window("2/minute", "fixed"),
+            limiter.sliding_window("2/minute", "sliding"),
+            limiter.token_bucket("2/minute", "token"),
+        ]:
+            await policy.clear("user")
+            results = [await policy.hit("user") for _ in range(3)]
+            assert [result.allowed for result in results] == [True, True, False]
+            assert results[-1].retry_after > 0
+
+    async def test_record(self) -> None:
+        backend = RedisRateLimitBackend(Redis.from_url("redis://"))
+        checks = [
+            RateLimitCheck("test_rate_limit:record:a", "fixed_window", limit=5, period=60_000, cost=3),
+            RateLimitCheck("test_rate_limit:record:b", "fixed_window", limit=5, period=60_000, cost=6),
+        ]
+        for check in checks:
+            await backend.clear(check.key)
+        assert [result.allowed for result in await backend.record(checks)] == [True, False]
+        results = await backend.check([dataclasses.replace(check, cost=0) for check in checks])
+        assert [result.remaining for result in results] == [2, 0]
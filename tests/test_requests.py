@@ -0,0 +1,28 @@
+from starlette.types import Scope
+
+from kupala.requests import get_header, get_headers
+
+
+def make_scope(headers: list[tuple[bytes, bytes]]) -> Scope:
+    return {"type": "http", "headers": headers}
+
+
+def test_get_header() -> None:
+    scope = make_scope([(b"accept", b"text/html"), (b"x-value", b"1"), (b"x-value", b"2")])
+    assert get_header(scope, b"accept") == b"text/html"
+    assert get_header(scope, b"x-value") == b"1"
+    assert get_header(scope, b"missing") is None
+
+
+def test_get_header_rebuilds_index_when_headers_replaced() -> None:
+    scope = make_scope([(b"accept", b"text/html")])
+    assert get_header(scope, b"accept") == b"text/html"
+
+    scope["headers"] = [(b"accept", b"application/json")]
+    assert get_header(scope, b"accept") == b"application/json"
+
+
+def test_get_headers_is_shared() -> None:
+    scope = make_scope([(b"accept", b"text/html")])
+    assert get_headers(scope) is get_headers(scope)
+    assert get_headers(scope)["accept"] == "text/html"
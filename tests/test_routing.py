@@ -0,0 +1,143 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Router as BaseRouter
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocket
+
+from kupala import Kupala
+from kupala.routing import BaseRoute, DispatchIndex, Host, Mount, Route, Router, WebSocketRoute
+
+
+def view(request: Request) -> Response:
+    return PlainTextResponse(f"{request.scope['route'].name}:{request.path_params}")
+
+
+async def ws_view(websocket: WebSocket) -> None:
+    await websocket.accept()
+    await websocket.send_text("ws")
+    await websocket.close()
+
+
+def make_routes() -> list[BaseRoute]:
+    return [
+        Route("/", view, name="home"),
+        Route("/users", view, name="users", methods=["GET"]),
+        Route("/users/me", view, name="me"),
+        Route("/users/{id:int}", view, name="user"),
+        Route("/users/{slug}", view, name="user_slug"),
+        Route("/users/{id:int}/posts/", view, name="user_posts"),
+        Route("/files/{path:path}", view, name="files"),
+        Route("/{page}", view, name="page"),
+        Route("/post-{id:int}", view, name="post"),
+        WebSocketRoute("/ws", ws_view, name="ws"),
+        Host("api.example.com", app=BaseRouter([Route("/host", view, name="host")])),
+        Mount(
+            "/admin",
+            name="admin",
+            routes=[
+                Route("/", view, name="index"),
+                Route("/users/{id}", view, name="user"),
+                Mount("/blog/{blog}", routes=[Route("/posts/{post:int}", view, name="post")]),
+            ],
+        ),
+        Route("/users/late", view, name="late"),
+    ]
+
+
+paths = [
+    ("GET", "/"),
+    ("GET", "/users"),
+    ("POST", "/users"),
+    ("GET", "/users/"),
+    ("GET", "/users/me"),
+    ("GET", "/users/1"),
+    ("GET", "/users/root"),
+    ("GET", "/users/late"),
+    ("GET", "/users/1/posts"),
+    ("GET", "/users/1/posts/"),
+    ("GET", "/files/a/b/c.txt"),
+    ("GET", "/about"),
+    ("GET", "/about/"),
+    ("GET", "/post-1"),
+    ("GET", "/admin"),
+    ("GET", "/admin/"),
+    ("GET", "/admin/users/2"),
+    ("GET", "/admin/blog/news/posts/3"),
+    ("GET", "/admin/blog/news/posts/x"),
+    ("GET", "/missing/deep/path"),
+]
+
+
+@pytest.mark.parametrize("method, path", paths)
+def test_dispatch_matches_starlette_router(method: str, path: str) -> None:
+    expected_client = TestClient(Starlette(routes=make_routes()), follow_redirects=False)
+    client = TestClient(Starlette(routes=[Mount("", app=Router(make_routes()))]), follow_redirects=False)
+    expected = expected_client.request(method, path)
+    actual = client.request(method, path)
+    assert (actual.status_code, actual.text, actual.headers.get("location")) == (
+        expected.status_code,
+        expected.text,
+        expected.headers.get("location"),
+    )
+
+
+def test_dispatch_host_routes() -> None:
+    routes = [
+        Host("api.example.com", app=BaseRouter([Route("/host", view, name="host")])),
+        Route("/{page}", view, name="page"),
+    ]
+    client = TestClient(Router(routes), base_url="http://api.example.com")
+    assert client.get("/host").text == "host:{}"
+
+
+def test_dispatch_websockets() -> None:
+    client = TestClient(Router(make_routes()))
+    with client.websocket_connect("/ws") as session:
+        assert session.receive_text() == "ws"
+
+
+def test_candidates_keep_declaration_order() -> None:
+    routes = make_routes()
+    index = DispatchIndex(routes)
+    names = [getattr(route, "name", None) for route in index.candidates("/users/me")]
+    assert names == ["users", "me", "user", "user_slug", "user_posts", "page", "post", None]
+    assert [getattr(route, "name", None) for route in index.candidates("/admin/x")] == ["page", "post", None, "admin"]
+
+
+def test_router_rebuilds_index_on_new_routes() -> None:
+    router = Router([Route("/", view, name="home")])
+    client = TestClient(router)
+    assert client.get("/").status_code == 200
+
+    router.routes.append(Route("/about", view, name="about"))
+    assert client.get("/about").text == "about:{}"
+
+
+def test_kupala_uses_indexed_router() -> None:
+    app = Kupala(routes=[Route("/", view, name="home")])
+    assert isinstance(app.router, Router)
+    with TestClient(app) as client:
+        assert client.get("/").text == "home:{}"
+
+
+@pytest.mark.parametrize(
+    "method, path, expected, qualified_name",
+    [
+        ("GET", "/users/me", "me", "me"),
+        ("GET", "/admin/users/2", "user", "admin:user"),
+        ("GET", "/admin/blog/news/posts/3", "post", "admin:post"),  # unnamed mounts add nothing
+        ("GET", "/admin/blog/news/posts/x", None, ""),  # the innermost mount
+        ("POST", "/users", None, None),
+        ("GET", "/admin/missing", "admin", "admin"),
+        ("GET", "/missing/deep/path", None, None),
+    ],
+)
+def test_find_route(method: str, path: str, expected: str | None, qualified_name: str | None) -> None:
+    router = Router(make_routes())
+    scope = {"type": "http", "method": method, "path": path, "root_path": "", "headers": []}
+    route = router.find_route(scope)
+    assert getattr(route, "name", None) == expected
+    found = router.find_named_route(scope)
+    assert (found[1] if found else None) == qualified_name
@@ -0,0 +1,230 @@
+import gzip
+import os
+import pathlib
+import typing
+
+import pytest
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+from kupala.staticfiles import (
+    PRECOMPRESSED_SUFFIXES,
+    StaticFiles,
+    StaticManifest,
+    get_precompress_encodings,
+    precompress_file,
+)
+from kupala.testing import RequestFactory
+from kupala.urls import static_url
+
+
+def make_request(**kwargs: typing.Any) -> Request:
+    return typing.cast(typing.Callable[..., Request], RequestFactory)(**kwargs)
+
+
+@pytest.fixture
+def manifest(tmp_path: pathlib.Path) -> StaticManifest:
+    source = tmp_path / "assets"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "app.css").write_text("body {}")
+    (source / "app.min.js").write_text("alert(1)")
+    return StaticManifest(tmp_path / "public", sources=[source])
+
+
+class TestStaticManifest:
+    def test_collect(self, manifest: StaticManifest) -> None:
+        paths = manifest.collect()
+        assert sorted(paths) == ["app.min.js", "css/app.css"]
+        assert paths["css/app.css"].startswith("css/app.")
+        assert paths["app.min.js"].startswith("app.min.")
+        assert paths["app.min.js"].endswith(".js")
+        assert (manifest.directory / paths["css/app.css"]).read_text() == "body {}"
+        assert (manifest.directory / "css/app.css").read_text() == "body {}"
+
+    def test_hash_depends_on_content(self, manifest: StaticManifest) -> None:
+        first = manifest.collect()
+        second = manifest.collect()
+        assert first == second
+
+        (manifest.sources[0] / "css" / "app.css").write_text("body {color: red}")
+        assert manifest.collect()["css/app.css"] != first["css/app.css"]
+
+    def test_load(self, manifest: StaticManifest) -> None:
+        paths = manifest.collect()
+        loaded = StaticManifest(manifest.directory)
+        assert loaded.lookup("css/app.css") == paths["css/app.css"]
+        assert loaded.lookup("missing.css") is None
+        assert loaded.is_hashed(paths["css/app.css"])
+        assert not loaded.is_hashed("css/app.css")
+
+    def test_load_missing_manifest(self, tmp_path: pathlib.Path) -> None:
+        manifest = StaticManifest(tmp_path)
+        assert manifest.lookup("app.css") is None
+
+
+class TestStaticFiles:
+    def test_hashed_files_are_immutable(self, manifest: StaticManifest) -> None:
+        paths = manifest.collect()
+        app = StaticFiles(directory=manifest.directory, manifest=manifest)
+        client = TestClient(app)
+
+        response = client.get("/" + paths["css/app.css"])
+        assert response.text == "body {}"
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+        response = client.get("/css/app.css")
+        assert response.text == "body {}"
+        assert "cache-control" not in response.headers
+
+    def test_uses_manifest_from_app_state(self, manifest: StaticManifest) -> None:
+        paths = manifest.collect()
+        app = Starlette(routes=[Mount("/static", StaticFiles(directory=manifest.directory), name="static")])
+        app.state.static_manifest = manifest
+        client = TestClient(app)
+
+        response = client.get("/static/" + paths["app.min.js"])
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+class TestStaticURL:
+    def test_resolves_hashed_path(self, manifest: StaticManifest) -> None:
+        paths = manifest.collect()
+        app = Starlette(
+            routes=[
+                Route("/", lambda: Response("index"), name="home"),
+                Mount("/static", Response("static"), name="static"),
+            ]
+        )
+        app.state.static_manifest = manifest
+        request = make_request(scope__app=app)
+        assert static_url(request, "css/app.css") == "http://testserver/static/" + paths["css/app.css"]
+
+    def test_falls_back_to_versioned_url(self, manifest: StaticManifest) -> None:
+        manifest.collect()
+        request = make_request()
+        request.app.state.static_manifest = manifest
+        assert str(static_url(request, "missing.css")).startswith("http://testserver/static/missing.css?v=")
+
+    def test_ignores_manifest_in_debug(self, manifest: StaticManifest) -> None:
+        manifest.collect()
+        request = make_request()
+        request.app.debug = True
+        request.app.state.static_manifest = manifest
+        assert str(static_url(request, "css/app.css")).startswith("http://testserver/static/css/app.css?v=")
+
+
+class TestPrecompressedStaticFiles:
+    @pytest.fixture
+    def directory(self, tmp_path: pathlib.Path) -> pathlib.Path:
+        (tmp_path / "app.css").write_text("body {}" * 100)
+        precompress_file(tmp_path / "app.css", ["br", "gzip"])
+        return tmp_path
+
+    def test_serves_best_accepted_encoding(self, directory: pathlib.Path) -> None:
+        client = TestClient(StaticFiles(directory=directory))
+
+        response = client.get("/app.css", headers={"accept-encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+        assert response.headers["content-type"] == "text/css; charset=utf-8"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.text == "body {}" * 100
+
+        response = client.get("/app.css", headers={"accept-encoding": "gzip, br;q=0"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == "body {}" * 100
+
+        response = client.get("/app.css", headers={"accept-encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.text == "body {}" * 100
+
+    def test_etag_depends_on_encoding(self, directory: pathlib.Path) -> None:
+        client = TestClient(StaticFiles(directory=directory))
+        br_etag = client.get("/app.css", headers={"accept-encoding": "br"}).headers["etag"]
+        gzip_etag = client.get("/app.css", headers={"accept-encoding": "gzip"}).headers["etag"]
+        assert br_etag != gzip_etag
+        assert not br_etag.startswith("W/")
+
+        response = client.get("/app.css", headers={"accept-encoding": "br", "if-none-match": br_etag})
+        assert response.status_code == 304
+
+    def test_range_request_serves_identity(self, directory: pathlib.Path) -> None:
+        client = TestClient(StaticFiles(directory=directory))
+        response = client.get("/app.css", headers={"accept-encoding": "br", "range": "bytes=0-3"})
+        assert response.status_code == 206
+        assert response.text == "body"
+
+    def test_caches_files(self, directory: pathlib.Path) -> None:
+        app = StaticFiles(directory=directory, cache_revalidate_interval=60)
+        client = TestClient(app)
+        assert client.get("/app.css").status_code == 200
+
+        (directory / "app.css").unlink()
+        assert client.get("/app.css").text == "body {}" * 100
+
+        app.clear_cache()
+        with pytest.raises(HTTPException):
+            client.get("/app.css")
+
+    def test_revalidates_cached_files(self, directory: pathlib.Path) -> None:
+        client = TestClient(StaticFiles(directory=directory, precompressed=(), cache_revalidate_interval=0))
+        response = client.get("/app.css")
+        assert response.text == "body {}" * 100
+
+        (directory / "app.css").write_text("a {}")  # replaced in place, as unhashed assets are on deploy
+        changed = client.get("/app.css")
+        assert changed.text == "a {}"
+        assert changed.headers["etag"] != response.headers["etag"]
+
+    def test_cache_is_bounded(self, directory: pathlib.Path) -> None:
+        (directory / "other.css").write_text("a {}")
+        app = StaticFiles(directory=directory, cache_size=1)
+        client = TestClient(app)
+        client.get("/app.css")
+        client.get("/other.css")
+        assert list(app._cache) == ["other.css"]
+
+        app = StaticFiles(directory=directory, cache_memory_limit=10)
+        client = TestClient(app)
+        client.get("/app.css")
+        client.get("/other.css")
+        assert list(app._cache) == ["other.css"]
+
+    def test_disabled_cache(self, directory: pathlib.Path) -> None:
+        app = StaticFiles(directory=directory, cache_size=0)
+        client = TestClient(app)
+        assert client.get("/app.css").status_code == 200
+        assert not app._cache
+
+    def test_falls_back_for_missing_files(self, directory: pathlib.Path) -> None:
+        client = TestClient(Starlette(routes=[Mount("/", StaticFiles(directory=directory))]))
+        assert client.get("/missing.css").status_code == 404
+        assert client.post("/app.css").status_code == 405
+
+
+class TestPrecompressFile:
+    def test_writes_siblings(self, tmp_path: pathlib.Path) -> None:
+        path = tmp_path / "app.js"
+        path.write_text("console.log(1);" * 100)
+        written = precompress_file(path)
+        assert sorted(p.name for p in written) == sorted(
+            "app.js" + PRECOMPRESSED_SUFFIXES[encoding] for encoding in get_precompress_encodings()
+        )
+        assert gzip.decompress((tmp_path / "app.js.gz").read_bytes()) == path.read_bytes()
+
+        assert precompress_file(path) == []
+
+    def test_skips_incompressible(self, tmp_path: pathlib.Path) -> None:
+        path = tmp_path / "app.js"
+        path.write_bytes(os.urandom(64))
+        assert precompress_file(path, ["gzip"]) == []
+
+    def test_unavailable_encoding(self, tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr("kupala.staticfiles.brotli", None)
+        path = tmp_path / "app.js"
+        path.write_text("console.log(1);" * 100)
+        with pytest.raises(ValueError, match='install "brotli" package'):
+            precompress_file(path, ["br"])
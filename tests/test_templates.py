@@ -2,6 +2,7 @@ import jinja2
 from starlette.requests import Request
 
 from kupala.templating import Templates
+from kupala.timings import collect_timings
 
 jinja_env = jinja2.Environment(
     loader=jinja2.DictLoader(
@@ -33,3 +34,12 @@ def test_render_to_response() -> None:
     templates = Templates(jinja_env=jinja_env)
     request = Request({"type": "http", "method": "GET", "url": "http://testserver/"})
     assert templates.render_to_response(request, "index.html", {"name": "world"}).body == b"Hello, world!"
+
+
+def test_records_timings() -> None:
+    templates = Templates(jinja_env=jinja_env)
+    request = Request({"type": "http", "method": "GET", "url": "http://testserver/"})
+    with collect_timings() as timings:
+        templates.render("index.html", {"name": "world"})
+        templates.render_to_response(request, "index.html", {"name": "world"})
+    assert timings.spans["template"].count == 2
@@ -0,0 +1,48 @@
+import time
+
+from kupala.timings import Timings, collect_timings, get_timings, record, span
+
+
+def test_span_does_nothing_without_collector() -> None:
+    assert get_timings() is None
+    with span("db"):
+        pass
+    record("db", 1)
+
+
+def test_collect_timings() -> None:
+    with collect_timings() as timings:
+        assert get_timings() is timings
+        with span("db"):
+            time.sleep(0.001)
+        record("db", 0.5)
+        record("cache", 0.25)
+
+    assert get_timings() is None
+    durations = timings.as_dict()
+    assert durations["db"] > 500
+    assert durations["cache"] == 250
+    assert durations["total"] > 1
+    assert timings.spans["db"].count == 2
+
+
+def test_open_spans() -> None:
+    timings = Timings()
+    timings.begin("handler")
+    assert timings.as_dict()["handler"] > 0
+    assert timings.spans["handler"].count == 0
+
+    timings.end("handler")
+    assert timings.spans["handler"].count == 1
+    assert timings.spans["handler"].started_at is None
+
+
+def test_to_header() -> None:
+    timings = Timings()
+    timings.add("db", 0.001)
+    timings.add("db", 0.002)
+    timings.add("cache", 0.0005)
+    header = timings.to_header()
+    assert header.startswith("total;dur=")
+    assert 'db;dur=3.00;desc="2"' in header
+    assert "cache;dur=0.50" in header
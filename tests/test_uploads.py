@@ -0,0 +1,137 @@
+import dataclasses
+import typing
+
+import pytest
+from starlette.datastructures import UploadFile
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.testclient import TestClient
+
+from kupala import Kupala
+from kupala.dependencies import FromForm
+from kupala.exceptions import PayloadTooLarge, UnprocessableEntity
+from kupala.files import Files, MemoryBackend
+from kupala.routing import RouteGroup
+from kupala.uploads import StoredFile, Upload, get_uploads, stream_form
+
+storage = Files(MemoryBackend())
+
+
+@dataclasses.dataclass
+class ProfileForm:
+    name: str
+    avatar: typing.Annotated[
+        StoredFile, Upload("avatars/{name}.{extension}", max_size=10, content_types=["image/*"], storage=storage)
+    ]
+    age: int | None = None
+
+
+def make_request(files: dict[str, typing.Any], data: dict[str, str]) -> Request:
+    client = TestClient(Kupala())
+    prepared = client.build_request("POST", "/", files=files, data=data)
+    body = prepared.read()
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    async def receive() -> dict[str, typing.Any]:
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    headers = [(key.lower().encode(), value.encode()) for key, value in prepared.headers.items()]
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+def test_get_uploads() -> None:
+    assert list(get_uploads(ProfileForm)) == ["avatar"]
+    assert get_uploads(str) == {}
+
+
+async def test_stream_form() -> None:
+    request = make_request({"avatar": ("me.png", b"image", "image/png"), "other": ("x.txt", b"x")}, {"name": "root"})
+    form, stored = await stream_form(request, get_uploads(ProfileForm))
+    assert form["name"] == "root"
+    assert form["avatar"] == StoredFile("avatars/me.png", "me.png", "image/png", 5)
+    assert "other" not in form
+    assert [stored_file for _, stored_file in stored] == [form["avatar"]]
+    assert await (await storage.open("avatars/me.png")).read() == b"image"
+    await storage.delete("avatars/me.png")
+
+
+async def test_stream_form_rejects_large_files() -> None:
+    request = make_request({"avatar": ("big.png", b"x" * 100, "image/png")}, {"name": "root"})
+    with pytest.raises(PayloadTooLarge):
+        await stream_form(request, get_uploads(ProfileForm))
+    assert not await storage.exists("avatars/big.png")
+
+
+async def test_stream_form_rejects_large_fields() -> None:
+    request = make_request({"avatar": ("me.png", b"image", "image/png")}, {"name": "root" * 10})
+    with pytest.raises(PayloadTooLarge):
+        await stream_form(request, get_uploads(ProfileForm), max_field_size=10)
+    assert not await storage.exists("avatars/me.png")
+
+
+async def test_stream_form_limits_files() -> None:
+    files = [("avatar", ("me.png", b"image", "image/png")), ("other", ("x.txt", b"x", "text/plain"))]
+    request = make_request(files, {"name": "root"})  # type: ignore[arg-type]
+    with pytest.raises(PayloadTooLarge, match="Too many files"):
+        await stream_form(request, get_uploads(ProfileForm), max_files=1)
+    assert not await storage.exists("avatars/me.png")
+
+
+async def test_stream_form_checks_content_type() -> None:
+    request = make_request({"avatar": ("me.txt", b"text", "text/plain")}, {"name": "root"})
+    with pytest.raises(UnprocessableEntity) as ex:
+        await stream_form(request, get_uploads(ProfileForm))
+    assert ex.value.errors == {"avatar": ["File type is not allowed."]}
+
+
+def test_from_form_endpoint() -> None:
+    routes = RouteGroup()
+
+    @dataclasses.dataclass
+    class DocumentForm:
+        title: str
+        file: UploadFile
+
+    @routes.post("/profile")
+    async def profile_view(form: FromForm[ProfileForm]) -> Response:
+        return JSONResponse([form.name, form.age, form.avatar.path, form.avatar.size])
+
+    @routes.post("/documents")
+    async def documents_view(form: FromForm[DocumentForm]) -> Response:
+        return JSONResponse([form.title, form.file.filename])
+
+    client = TestClient(Kupala(routes=routes))
+    files = {"avatar": ("photo.png", b"image", "image/png")}
+    response = client.post("/profile", files=files, data={"name": "root", "age": "30"})
+    assert response.json() == ["root", 30, "avatars/photo.png", 5]
+    assert client.post("/profile", files=files, data={"name": "root", "age": "x"}).status_code == 422
+    assert client.post("/profile", data={"name": "root"}).status_code == 422
+
+    response = client.post("/documents", files={"file": ("a.txt", b"text")}, data={"title": "Doc"})
+    assert response.json() == ["Doc", "a.txt"]
+
+
+async def test_from_form_deletes_files_when_another_parameter_is_invalid() -> None:
+    routes = RouteGroup()
+
+    @dataclasses.dataclass
+    class AgeForm:
+        age: int
+
+    @routes.post("/profile")
+    async def profile_view(profile: FromForm[ProfileForm], extra: FromForm[AgeForm]) -> Response:
+        return JSONResponse(extra.age)
+
+    client = TestClient(Kupala(routes=routes))
+    response = client.post(
+        "/profile", files={"avatar": ("a.png", b"image", "image/png")}, data={"name": "a", "age": "1"}
+    )
+    assert response.json() == 1
+    assert await storage.exists("avatars/a.png")
+
+    for name, data in [("b", {"name": "b", "age": "x"}), ("c", {"name": "c"})]:
+        response = client.post("/profile", files={"avatar": (f"{name}.png", b"image", "image/png")}, data=data)
+        assert response.status_code == 422
+        assert not await storage.exists(f"avatars/{name}.png")
+    await storage.delete("avatars/a.png")
@@ -0,0 +1,135 @@
+import typing
+
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Host, Mount, NoMatchFound, Route, Router, WebSocketRoute
+from starlette.testclient import TestClient
+
+from kupala.testing import RequestFactory
+from kupala.urls import URLIndex, abs_url_for, pathname_matches, reset_url_index, url_matches, url_path_for
+
+
+def make_request(**kwargs: typing.Any) -> Request:
+    return typing.cast(typing.Callable[..., Request], RequestFactory)(**kwargs)
+
+
+def view() -> Response:  # pragma: no cover
+    return Response("")
+
+
+routes = [
+    Route("/", view, name="home"),
+    Route("/users/{id:int}", view, name="user"),
+    Route("/users/{id:int}/files/{file:path}", view, name="user_file"),
+    Route("/users/{slug}", view, name="user"),
+    WebSocketRoute("/ws", view, name="ws"),
+    Mount("/static", Response("static"), name="static"),
+    Mount(
+        "/admin",
+        name="admin",
+        routes=[
+            Route("/", view, name="index"),
+            Route("/users/{id}", view, name="user"),
+            Mount("/blog/{blog}", routes=[Route("/posts/{post:int}", view, name="post")]),
+        ],
+    ),
+    Mount("/api", routes=[Route("/health", view, name="health")]),
+]
+
+cases = [
+    ("home", {}),
+    ("user", {"id": 1}),
+    ("user", {"slug": "root"}),
+    ("user_file", {"id": 1, "file": "a/b.txt"}),
+    ("ws", {}),
+    ("static", {"path": "/css/app.css"}),
+    ("admin", {"path": "dashboard"}),
+    ("admin:index", {}),
+    ("admin:user", {"id": "2"}),
+    ("admin:post", {"blog": "news", "post": 3}),
+    ("health", {}),
+]
+
+
+@pytest.mark.parametrize("name, path_params", cases)
+def test_index_matches_router(name: str, path_params: dict[str, object]) -> None:
+    expected = Router(routes).url_path_for(name, **path_params)
+    actual = URLIndex(routes).lookup(name, path_params)
+    assert actual == expected
+    assert actual is not None
+    assert actual.protocol == expected.protocol
+
+
+@pytest.mark.parametrize(
+    "name, path_params",
+    [("missing", {}), ("user", {}), ("user", {"id": 1, "extra": 2}), ("admin", {})],
+)
+def test_index_does_not_resolve_unknown(name: str, path_params: dict[str, object]) -> None:
+    assert URLIndex(routes).lookup(name, path_params) is None
+
+
+def test_index_stops_at_unsupported_routes() -> None:
+    index = URLIndex(
+        [
+            Route("/", view, name="home"),
+            Host("example.com", app=Router([Route("/", view, name="host_home")])),
+            Route("/about", view, name="about"),
+        ]
+    )
+    assert not index.complete
+    assert index.lookup("home", {}) == "/"
+    assert index.lookup("about", {}) is None
+
+
+def test_url_path_for_falls_back_to_router() -> None:
+    app = Starlette(
+        routes=[
+            Host("example.com", app=Router([Route("/", view, name="host_home")]), name="host"),
+            Route("/about", view, name="about"),
+        ]
+    )
+    request = make_request(scope__app=app)
+    assert url_path_for(request, "about") == "/about"
+    with pytest.raises(NoMatchFound):
+        url_path_for(request, "missing")
+
+
+def test_abs_url_for() -> None:
+    app = Starlette(routes=routes)
+    request = make_request(scope__app=app, scope__root_path="/app")
+    assert abs_url_for(request, "admin:user", id=1) == request.url_for("admin:user", id=1)
+    assert str(abs_url_for(request, "ws")) == "ws://testserver/app/ws"
+
+
+def test_reset_url_index() -> None:
+    app = Starlette(routes=[Route("/", view, name="home")])
+    request = make_request(scope__app=app)
+    assert abs_url_for(request, "home") == "http://testserver/"
+
+    app.router.routes.append(Route("/about", view, name="about"))
+    reset_url_index(app)
+    assert abs_url_for(request, "about") == "http://testserver/about"
+
+
+def test_url_matches() -> None:
+    request = make_request(scope__path="/users/1/")
+    assert url_matches(request, "http://testserver/users/1")
+    assert url_matches(request, abs_url_for(request, "home").replace(path="/users/1"))
+    assert not url_matches(request, "/users/2")
+
+
+def test_pathname_matches() -> None:
+    app = Starlette(routes=routes)
+    request = make_request(scope__app=app, scope__path="/admin/users/1")
+    assert pathname_matches(request, "admin:user", path_params={"id": 1})
+    assert not pathname_matches(request, "admin:user", path_params={"id": 2})
+
+
+def test_url_index_in_request() -> None:
+    def view(request: Request) -> Response:
+        return Response(str(abs_url_for(request, "user", id=1)))
+
+    client = TestClient(Starlette(routes=[Route("/", view, name="home"), Route("/users/{id}", view, name="user")]))
+    assert client.get("/").text == "http://testserver/users/1"